@@ -1,390 +1,1588 @@
-from coordinates import Coordinates
-import math
-
-class Airfoil:
-
-    # N1 and N2 parameters (N1 = 0.5 and N2 = 1 for airfoil shape)
-    N1 = 0.5
-    N2 = 1
-
-    # Number of iterations for processing data
-    # Max iterations for inner convergence (reaching surfaces)
-    maxInnerIterations = 20
-
-    # Max iterations for converging mean camber line
-    maxMeanCamberLineIterations = 30
-
-    # Convergence threshold in thickness direction
-    thicknessConvergenceThreshold = 0.0001
-
-    # Non-dimensionalized Airfoil
-    # @param: name        = name for creation of files this Airfoil is based on
-    #         coordinates = Coordinates
-    def __init__(self, name, coordinates = None):
-        self.name = name
-
-        if (coordinates != None):
-
-            self.coordinates = coordinates
-
-        else:
-
-            self.coordinates = Airfoil.loadCoordinates(name)
-
-    # Save this airfoil's coordinates to a .dat file
-    # Use formatting with commas between coordinates
-    def saveCoordinates(self):
-
-        # Take all coordinates and format them
-        formattedXVals = []
-        formattedYVals = []
-
-        for i in range(len(self.coordinates.xVals)):
-
-            formattedXVals.append("{0:.6f}".format(self.coordinates.xVals[i]))
-            formattedYVals.append("{0:.6f}".format(self.coordinates.yVals[i]))
-
-        with open("Airfoil/" + self.name + ".dat", "w") as file:
-
-            for i in range(len(formattedXVals)):
-
-                file.write(str(formattedXVals[i]) + "," + str(formattedYVals[i]) + "\n")
-
-            # Add extra line at end to fit past formatting
-            file.write(str(formattedXVals[0]) + "," + str(formattedYVals[0]) + "\n")
-
-    # Load a set of airfoil coordinates from a .dat file
-    # @param:  name = name of airfoil for .dat file
-    # @return: Coordinates
-    @staticmethod
-    def loadCoordinates(name):
-
-        # Open file
-        file = open("Airfoil/" + name + ".dat", "r")
-
-        # Create a new Coordinates object
-        coordinates = Coordinates()
-
-        # Add coordinates from file to coordinates object
-        # Do not read last line because it is a repeat
-        for line in file:
-
-            title = False
-
-            for letter in line:
-                if letter.isalpha():
-                    title = True
-
-            if not title:
-
-                possibleValues = line.split(" ")
-
-                # Get numbers from line
-                values = []
-
-                for possibleValue in possibleValues:
-                    if possibleValue != "":
-                        values.append(possibleValue)
-
-                # Check if value connected by comma
-                if len(values) == 1:
-                    values = values[0].split(",")
-
-                # Check if value connected by tab
-                if len(values) == 1:
-                    values = values[0].split("\t")
-
-                coordinates.addCoordinate(float(values[0]), float(values[1]))
-
-        # If last coordinate is repeat of first coordinate remove it
-        if coordinates.xVals[0] == coordinates.xVals[-1]:
-            coordinates.xVals.pop()
-            coordinates.yVals.pop()
-
-        return coordinates
-
-    # Process an airfoil for characteristics
-    # @param:  airfoil               = Airfoil object to be processed
-    #          numberChordwisePoints = Integer number of points wanted on chord
-    # @return: AirfoilData object
-    @staticmethod
-    def process(airfoil, numberChordwisePoints):
-
-        # Coordinate values for reference
-        xValsRef = airfoil.coordinates.xVals
-        yValsRef = airfoil.coordinates.yVals
-
-        # Used to separate lower and upper surfaces
-        zeroIndex = -1
-
-        for i in range(len(xValsRef)):
-
-            if xValsRef[i] == 0:
-                zeroIndex = i
-                break
-
-        # Assign x upper and lower values for reference
-        xUpperValsRef = xValsRef[zeroIndex:]
-        xUpperValsRef.append(xValsRef[0])
-        xLowerValsRef = xValsRef[zeroIndex::-1]
-
-        # Assign y upper and lower values for reference
-        yUpperValsRef = yValsRef[zeroIndex:]
-        yUpperValsRef.append(yValsRef[0])
-        yLowerValsRef = yValsRef[zeroIndex::-1]
-
-        # Upper and lower coordinates for reference
-        upperCoordinatesRef = Coordinates(xUpperValsRef, yUpperValsRef)
-        lowerCoordinatesRef = Coordinates(xLowerValsRef, yLowerValsRef)
-
-        # Generate x values to output, number given as parameter
-        # Equally spaced x values from 0 to 1
-        xVals = []
-
-        spacing = 1 / (numberChordwisePoints - 1)
-
-        for i in range(numberChordwisePoints):
-
-            xVals.append(spacing * i)
-
-        # Generate interpolated y values based on reference coordinates
-        # Uses linear interpolation to estimate y values in between
-        # known reference y values
-        yUpperVals = []
-        yLowerVals = []
-
-        for i in range(len(xVals)):
-
-            yUpperVals.append(upperCoordinatesRef.interpolate(xVals[i]))
-            yLowerVals.append(lowerCoordinatesRef.interpolate(xVals[i]))
-
-        # Create copy of xVals for mean camber line to be refined
-        xMeanCamberLineVals = xVals
-
-        # Initial estimate for mean camber line to be refined
-        # Uses average of top and bottom surface
-        yMeanCamberLineVals = []
-
-        for i in range(len(xVals)):
-
-            yMeanCamberLineVals.append((yUpperVals[i] + yLowerVals[i]) / 2)
-
-        # Initial estimate for upper and lower
-        # semi-thicknesses to be refined
-        # Uses half difference between top and bottom surface
-        # Lower semi-thicknesses are negated so when added to
-        # mean camber line it goes down instead
-        upperSemiThicknesses = []
-        lowerSemiThicknesses = []
-
-        for i in range(len(xVals)):
-            upperSemiThicknesses.append((yUpperVals[i] - yLowerVals[i]) / 2)
-            lowerSemiThicknesses.append((yLowerVals[i] - yUpperVals[i]) / 2)
-
-        # Boolean if converged on mean camber line
-        converged = False
-
-        # How many times the outer loop has run, to see if reached max
-        iterations = 0
-
-        while iterations < Airfoil.maxMeanCamberLineIterations and not converged:
-
-            iterations += 1
-
-            # Perpendicular angles from mean camber line
-            # Starts with value for beginning
-            meanCamberLineAngles = [math.pi / 2]
-
-            # Estimates of upper and lower surface points for current iteration
-            # Start with values for beginnings
-            xUpperValsEst = [0]
-            yUpperValsEst = [0]
-
-            xLowerValsEst = [0]
-            yLowerValsEst = [0]
-
-            # For each non-end coordinate on surfaces
-            # create new points by going a semi-thickness distance
-            # perpendicularly away from the mean camber line
-            for i in range(len(xVals) - 2):
-
-                index = i + 1
-
-                # Estimate slope for this point on the mean camber line
-                # based on points before and after
-                slope = (yMeanCamberLineVals[index + 1] - yMeanCamberLineVals[index - 1]) / (xMeanCamberLineVals[index + 1] - xMeanCamberLineVals[index - 1])
-
-                # Find perpendicular angle to point based on the slope
-                angle = math.atan(slope) + (math.pi / 2)
-                meanCamberLineAngles.append(angle)
-
-                # Estimate upper and lower surface based on this angle
-                xUpperValsEst.append(xMeanCamberLineVals[index] + (upperSemiThicknesses[index] * math.cos(angle)))
-                yUpperValsEst.append(yMeanCamberLineVals[index] + (upperSemiThicknesses[index] * math.sin(angle)))
-
-                xLowerValsEst.append(xMeanCamberLineVals[index] + (lowerSemiThicknesses[index] * math.cos(angle)))
-                yLowerValsEst.append(yMeanCamberLineVals[index] + (lowerSemiThicknesses[index] * math.sin(angle)))
-
-            # Add end values
-            meanCamberLineAngles.append(math.pi / 2)
-
-            xUpperValsEst.append(1)
-            yUpperValsEst.append(0)
-
-            xLowerValsEst.append(1)
-            yLowerValsEst.append(0)
-
-            # Converge upper and lower surface
-            Airfoil.convergeSurface(xUpperValsEst, yUpperValsEst, upperCoordinatesRef, meanCamberLineAngles,
-                                    upperSemiThicknesses, xMeanCamberLineVals, yMeanCamberLineVals)
-            Airfoil.convergeSurface(xLowerValsEst, yLowerValsEst, lowerCoordinatesRef, meanCamberLineAngles,
-                                    lowerSemiThicknesses, xMeanCamberLineVals, yMeanCamberLineVals)
-
-            # Find largest difference between upper and lower semiThicknesses
-            # If less then threshold then done converging
-            largestDifference = 0
-
-            for i in range(len(upperSemiThicknesses)):
-
-                if abs(upperSemiThicknesses[i] - lowerSemiThicknesses[i]) > largestDifference:
-
-                    largestDifference = abs(upperSemiThicknesses[i] - lowerSemiThicknesses[i])
-
-            if largestDifference < Airfoil.thicknessConvergenceThreshold:
-                converged = True
-
-            # Set new mean camber line to be average of
-            # of upper and lower surfaces
-            for i in range(len(xVals)):
-                xMeanCamberLineVals[i] = (xUpperValsEst[i] + xLowerValsEst[i]) / 2
-                yMeanCamberLineVals[i] = (yUpperValsEst[i] + yLowerValsEst[i]) / 2
-
-        # Create coordinates for interpolation of mean camber line
-        meanCamberLineCoordinates = Coordinates(xMeanCamberLineVals, yMeanCamberLineVals)
-
-        # Find y values on mean camber line for each x value
-        yFinalMeanCamberLineVals = []
-
-        for xVal in xVals:
-
-            yFinalMeanCamberLineVals.append(meanCamberLineCoordinates.interpolate(xVal))
-
-        # Create coordinates for interpolation of thicknesses
-        thicknessCoordinates = Coordinates()
-
-        # Adding upper and lower semiThicknesses to get thicknesses
-        # Lower semiThickness are subtracted because they are negated
-        for i in range(len(xVals)):
-            thicknessCoordinates.addCoordinate(xMeanCamberLineVals[i], upperSemiThicknesses[i] - lowerSemiThicknesses[i])
-
-        # Find thickness values for each x value
-        # Multiplied by 100 to make percentage since chord length is 1
-        thicknesses = []
-
-        for xVal in xVals:
-            thicknesses.append(abs(100 * thicknessCoordinates.interpolate(xVal)))
-
-        # Find camber percentages by multiplying camber line y values
-        # by 100 since chord length is 1
-        cambers = []
-
-        for yVal in yFinalMeanCamberLineVals:
-            cambers.append(100 * yVal)
-
-        # Find index of maximum thickness and maximum camber
-        maxThicknessIndex = 0
-        maxCamberIndex = 0
-
-        for i in range(len(xVals)):
-
-            if thicknesses[i] > thicknesses[maxThicknessIndex]:
-                maxThicknessIndex = i
-
-            if cambers[i] > cambers[maxCamberIndex]:
-                maxCamberIndex = i
-
-        # Return data object with found values
-        return AirfoilData(airfoil, xVals, yUpperVals, yLowerVals,
-                           yFinalMeanCamberLineVals, thicknesses, cambers,
-                           maxThicknessIndex, maxCamberIndex)
-
-    # Converge estimates onto a surface
-    # @param: xValsEst = estimated x values to converge
-    #         yValsESt = estimated y values to converge
-    #         coordinatesRef       = reference coordinates to interpolate on
-    #         meanCamberLineAngles = tangent angles to mean camber line
-    #         semiThicknesses      = distance from mean camber line to surface
-    #         xMeanCamberLinesVals = x values of current mean camber line
-    #         yMeanCamberLinesVals = y values of current mean camber line
-    @staticmethod
-    def convergeSurface(xValsEst, yValsEst, coordinatesRef, meanCamberLineAngles, semiThicknesses,
-                        xMeanCamberLinesVals, yMeanCamberLinesVals):
-
-        iteration = 0
-        converged = False
-
-        while iteration < Airfoil.maxInnerIterations and not converged:
-
-            iteration += 1
-
-            # Used for perturbance
-            dt = 0.0001
-
-            # Find largest delta y value to see if under threshold
-            largestDeltaYVal = -math.inf
-
-            # Perturb values and apply gradient to modify semiThickness
-            for i in range(len(xValsEst)):
-
-                oldYVal = coordinatesRef.interpolate(xValsEst[i])
-                deltaYVal = oldYVal - yValsEst[i]
-
-                # Check if delta y value is larger than largest found
-                if deltaYVal > largestDeltaYVal:
-                    largestDeltaYVal = deltaYVal
-
-                # Perturb positions slightly
-                xValPert = xMeanCamberLinesVals[i] + ((semiThicknesses[i] + dt) * math.cos(meanCamberLineAngles[i]))
-                yValPert = yMeanCamberLinesVals[i] + ((semiThicknesses[i] + dt) * math.sin(meanCamberLineAngles[i]))
-
-                # Find change between what y would be on old curve and new y
-                oldYValPert   = coordinatesRef.interpolate(xValPert)
-                deltaYValPert = oldYValPert - yValPert
-
-                # Gradient
-                gradient = (deltaYValPert - deltaYVal) / dt
-
-                # Update semiThickness
-                semiThicknesses[i] = semiThicknesses[i] - (deltaYVal / gradient)
-
-                # Update coordinate estimates
-                xValsEst[i] = xMeanCamberLinesVals[i] + (semiThicknesses[i] * math.cos(meanCamberLineAngles[i]))
-                yValsEst[i] = yMeanCamberLinesVals[i] + (semiThicknesses[i] * math.sin(meanCamberLineAngles[i]))
-
-            # If largest change in a y value is less than threshold
-            # then done converging
-            if largestDeltaYVal < Airfoil.thicknessConvergenceThreshold:
-                converged = True
-
-class AirfoilData:
-
-    # Data for an Airfoil
-    # @param: airfoil             = Airfoil this data represents
-    #         xVals               = List of x values
-    #         yUpperVals          = List of y upper values
-    #         yLowerVals          = List of y lower values
-    #         yMeanCamberLineVals = List of y values for MCL
-    #         thicknesses         = List of thickness as percentages
-    #         cambers             = List of camber percentages
-    #         maxThicknessIndex   = index for largest thickness
-    #         maxCamberIndex      = index for largest camber
-    def __init__(self, airfoil, xVals, yUpperVals, yLowerVals, yMeanCamberLineVals, thicknesses, cambers, maxThicknessIndex, maxCamberIndex):
-        self.airfoil             = airfoil
-        self.xVals               = xVals
-        self.yUpperVals          = yUpperVals
-        self.yLowerVals          = yLowerVals
-        self.yMeanCamberLineVals = yMeanCamberLineVals
-        self.thicknesses         = thicknesses
-        self.cambers             = cambers
-        self.maxThicknessIndex   = maxThicknessIndex
-        self.maxCamberIndex      = maxCamberIndex
\ No newline at end of file
+from coordinates import Coordinates, StackedCoordinates
+from telemetry import ProcessTelemetry
+import export
+import math
+import numpy as np
+
+class Airfoil:
+
+    # N1 and N2 parameters (N1 = 0.5 and N2 = 1 for airfoil shape)
+    N1 = 0.5
+    N2 = 1
+
+    # Number of iterations for processing data
+    # Max iterations for inner convergence (reaching surfaces)
+    maxInnerIterations = 20
+
+    # Max iterations for converging mean camber line
+    maxMeanCamberLineIterations = 30
+
+    # Convergence threshold in thickness direction
+    thicknessConvergenceThreshold = 0.0001
+
+    # Function called with the ProcessTelemetry of every process call and of every
+    # result ResultCache finds cached, None to only record telemetry when process is asked to
+    telemetrySink = None
+
+    # Non-dimensionalized Airfoil
+    # @param: name        = name for creation of files this Airfoil is based on
+    #         coordinates = Coordinates
+    def __init__(self, name, coordinates = None):
+        self.name = name
+
+        if (coordinates != None):
+
+            self.coordinates = coordinates
+
+        else:
+
+            self.coordinates = Airfoil.loadCoordinates(name)
+
+    # Save this airfoil's coordinates to a .dat file
+    # Use formatting with commas between coordinates unless another format is given
+    # @param: path     = path of file to write, None for the Airfoil folder
+    #         format   = format in export.EXPORT_FORMATS
+    #         compress = True to compress the file
+    def saveCoordinates(self, path=None, format="comma", compress=False):
+
+        if path is None:
+            path = "Airfoil/" + self.name + ".dat"
+
+        export.exportCoordinates(self.name, self.coordinates, path, format, compress)
+
+    # Load a set of airfoil coordinates from a .dat file
+    # @param:  name = name of airfoil for .dat file
+    # @return: Coordinates
+    @staticmethod
+    def loadCoordinates(name):
+
+        return Airfoil.readCoordinates("Airfoil/" + name + ".dat")
+
+    # Read a set of airfoil coordinates from a .dat file at any path
+    # @param:  path = path of .dat file
+    # @return: Coordinates
+    @staticmethod
+    def readCoordinates(path):
+
+        with open(path, "rb") as file:
+            text = file.read()
+
+        return Airfoil.parseCoordinates(text, path)
+
+    # Parse the text of a .dat file in one pass
+    # Accepts Selig layout (one loop starting at the trailing edge),
+    # Lednicer layout (point counts, then each surface from the leading edge)
+    # and the comma format written by saveCoordinates
+    # @param:  text   = contents of .dat file as str or bytes
+    #          source = name of file used in error messages
+    # @return: Coordinates in Selig order
+    @staticmethod
+    def parseCoordinates(text, source="<text>"):
+
+        if isinstance(text, str):
+            text = text.encode()
+
+        # Skip title lines and blank lines before the first line of numbers
+        bodyStart = 0
+        firstDataLine = 0
+
+        while bodyStart < len(text):
+
+            lineEnd = text.find(b"\n", bodyStart)
+
+            if lineEnd == -1:
+                lineEnd = len(text)
+
+            if Airfoil._isNumberLine(text[bodyStart:lineEnd]):
+                break
+
+            bodyStart = lineEnd + 1
+            firstDataLine += 1
+
+        body = text[bodyStart:].rstrip()
+
+        if len(body) == 0:
+            raise ValueError(source + ": no coordinates found")
+
+        # Detect delimiter once from first line of numbers
+        if b"," in body[:body.find(b"\n")]:
+            body = body.replace(b",", b" ")
+
+        # Parse every number at once
+        tokens = body.split()
+
+        try:
+            values = np.array(tokens, dtype=float)
+        except ValueError:
+            Airfoil._raiseLineError(body, firstDataLine, source)
+
+        # Every non-blank line must hold a pair of numbers
+        lines = body.split(b"\n")
+        dataLineCount = len(lines) - lines.count(b"") - sum(map(bytes.isspace, lines))
+
+        if len(tokens) != 2 * dataLineCount:
+            Airfoil._raiseLineError(body, firstDataLine, source)
+
+        values = values.reshape(-1, 2)
+
+        # Lednicer files start with the number of upper and lower points
+        if values[0, 0] > 1 and values[0, 1] > 1 and values[0, 0] % 1 == 0 and values[0, 1] % 1 == 0:
+            values = Airfoil._lednicerToSelig(values, firstDataLine, source)
+
+        # If last coordinate is repeat of first coordinate remove it
+        if values[0, 0] == values[-1, 0]:
+            values = values[:-1]
+
+        return Coordinates(values[:, 0], values[:, 1])
+
+    # Check if a line of a .dat file holds numbers
+    # @param:  line = line of text as bytes
+    # @return: True if every value on the line is a number
+    @staticmethod
+    def _isNumberLine(line):
+
+        values = line.replace(b",", b" ").split()
+
+        if len(values) == 0:
+            return False
+
+        try:
+            for value in values:
+                float(value)
+        except ValueError:
+            return False
+
+        return True
+
+    # Raise an error naming the first line that is not a pair of numbers
+    # @param: body          = bytes of .dat file from first line of numbers
+    #         firstDataLine = index of first line of numbers in whole file
+    #         source        = name of file used in error messages
+    @staticmethod
+    def _raiseLineError(body, firstDataLine, source):
+
+        for i, line in enumerate(body.split(b"\n")):
+
+            values = line.replace(b",", b" ").split()
+
+            if len(values) == 0:
+                continue
+
+            if len(values) != 2 or not Airfoil._isNumberLine(line):
+                raise ValueError(source + ", line " + str(firstDataLine + i + 1) + ": expected two numbers, got " +
+                                 repr(line.strip().decode(errors="replace")))
+
+        raise ValueError(source + ": could not parse coordinates")
+
+    # Reorder Lednicer coordinates into Selig order
+    # @param:  values        = numpy array of rows, first row holds point counts
+    #          firstDataLine = index of first line of numbers, for error messages
+    #          source        = name of file used in error messages
+    # @return: numpy array of rows from upper trailing edge around to lower trailing edge
+    @staticmethod
+    def _lednicerToSelig(values, firstDataLine, source):
+
+        upperCount = int(values[0, 0])
+        lowerCount = int(values[0, 1])
+
+        if upperCount + lowerCount != len(values) - 1:
+            raise ValueError(source + ", line " + str(firstDataLine + 1) + ": point counts " +
+                             str(upperCount) + " and " + str(lowerCount) + " do not match " +
+                             str(len(values) - 1) + " coordinates")
+
+        upper = values[1:upperCount + 1]
+        lower = values[upperCount + 1:]
+
+        # Both surfaces start at the leading edge, only keep it once
+        if lower[0, 0] == upper[0, 0] and lower[0, 1] == upper[0, 1]:
+            lower = lower[1:]
+
+        return np.concatenate((upper[::-1], lower))
+
+    # Process an airfoil for characteristics
+    # @param:  airfoil               = Airfoil object to be processed
+    #          numberChordwisePoints = Integer number of points wanted on chord
+    #          mode                  = "vectorized" to solve all points at once as arrays,
+    #                                  "newton" to solve like "vectorized" while only iterating points still moving,
+    #                                  reporting iterations of each point
+    #                                  or "scalar" to solve point by point
+    #          progress              = function called with the iteration number and the
+    #                                  max number of iterations at the start of each iteration
+    #                                  of the mean camber line, may raise ProcessCancelled
+    #          telemetry             = True to record a ProcessTelemetry on the AirfoilData,
+    #                                  also recorded whenever Airfoil.telemetrySink is set
+    #          spacing               = how chordwise points are spread, see chordwiseXVals
+    # @return: AirfoilData object
+    @staticmethod
+    def process(airfoil, numberChordwisePoints, mode="vectorized", progress=None, telemetry=False,
+                spacing="uniform"):
+
+        record = None
+
+        if telemetry or Airfoil.telemetrySink is not None:
+            record = ProcessTelemetry(mode, numberChordwisePoints)
+
+        if mode == "vectorized":
+            data = Airfoil.processVectorized(airfoil, numberChordwisePoints, progress=progress, telemetry=record,
+                                             spacing=spacing)
+
+        elif mode == "newton":
+            data = Airfoil.processVectorized(airfoil, numberChordwisePoints, newton=True, progress=progress,
+                                             telemetry=record, spacing=spacing)
+
+        elif mode == "scalar":
+            data = Airfoil.processScalar(airfoil, numberChordwisePoints, progress, record, spacing)
+
+        else:
+            raise ValueError("Unknown processing mode: " + str(mode))
+
+        if record is not None:
+
+            data.telemetry = record
+
+            if Airfoil.telemetrySink is not None:
+                Airfoil.telemetrySink(record)
+
+        return data
+
+    # Split airfoil coordinates into upper and lower reference surfaces
+    # Both surfaces start at the zero x value and run to the trailing edge,
+    # the upper surface ends with the first point to close the loop
+    # Surfaces are views of the coordinates, not copies
+    # @param:  coordinates = Coordinates of whole airfoil
+    # @return: upper Coordinates, lower Coordinates
+    @staticmethod
+    def splitSurfaces(coordinates):
+
+        # Points ending with a copy of the first point
+        closedPoints = coordinates.closedPoints()
+
+        # Used to separate lower and upper surfaces
+        # Without a zero x value the last point is used
+        zeroIndices = np.flatnonzero(closedPoints[0, :-1] == 0)
+        zeroIndex = int(zeroIndices[0]) if len(zeroIndices) > 0 else len(coordinates) - 1
+
+        # Upper and lower coordinates for reference
+        return Coordinates.view(closedPoints[:, zeroIndex:]), Coordinates.view(closedPoints[:, zeroIndex::-1])
+
+    # Chordwise x values processing starts from
+    # Points much closer together than the airfoil is thick near the leading edge can keep
+    # the mean camber line from settling, like processing with many uniform points does,
+    # "adaptive" bunches points the least of the non-uniform spacings
+    # @param:  numberChordwisePoints = Integer number of points wanted on chord
+    #          spacing               = "uniform" for equally spaced points,
+    #                                  "cosine" for points bunched at both edges,
+    #                                  "halfcosine" for points bunched at the leading edge
+    #                                  or "adaptive" for points bunched where the surfaces curve most
+    #          coordinates           = Coordinates of the airfoil, only needed for "adaptive"
+    # @return: numpy array of x values from 0 to 1
+    @staticmethod
+    def chordwiseXVals(numberChordwisePoints, spacing="uniform", coordinates=None):
+
+        fractions = np.arange(numberChordwisePoints) / (numberChordwisePoints - 1)
+
+        if spacing == "uniform":
+
+            # Same values as adding up equal spaces, kept exact for earlier results
+            return (1 / (numberChordwisePoints - 1)) * np.arange(numberChordwisePoints)
+
+        if spacing == "cosine":
+            xVals = 0.5 * (1 - np.cos(math.pi * fractions))
+
+        elif spacing == "halfcosine":
+            xVals = 1 - np.cos((math.pi / 2) * fractions)
+
+        elif spacing == "adaptive":
+            xVals = Airfoil.adaptiveXVals(fractions, coordinates)
+
+        else:
+            raise ValueError("Unknown spacing: " + str(spacing))
+
+        xVals[0], xVals[-1] = 0, 1
+
+        return xVals
+
+    # Chordwise x values spaced by surface curvature
+    # Spacing shrinks with the square root of curvature, which evens out the error
+    # of linear interpolation between points, so the leading edge gets most points
+    # @param:  fractions   = numpy array of equally spaced values from 0 to 1
+    #          coordinates = Coordinates of the airfoil
+    # @return: numpy array of x values from 0 to 1
+    @staticmethod
+    def adaptiveXVals(fractions, coordinates):
+
+        if coordinates is None:
+            raise ValueError("Adaptive spacing needs the airfoil coordinates")
+
+        # Fine grid the point density is found on
+        fineXVals = np.linspace(0, 1, max(20 * len(fractions), 1000))
+        curvatures = np.zeros(len(fineXVals))
+
+        for surface in Airfoil.splitSurfaces(coordinates):
+
+            xVals = np.asarray(surface.xVals)
+            yVals = np.asarray(surface.yVals)
+
+            # Turning angle at each point divided by the length around it
+            dx = np.diff(xVals)
+            dy = np.diff(yVals)
+            lengths = np.hypot(dx, dy)
+
+            usable = lengths > 0
+            dx, dy, lengths = dx[usable], dy[usable], lengths[usable]
+            pointXVals = xVals[:-1][usable]
+
+            if len(lengths) < 2:
+                continue
+
+            angles = np.abs(np.angle(np.exp(1j * np.diff(np.arctan2(dy, dx)))))
+            surfaceCurvatures = 2 * angles / (lengths[:-1] + lengths[1:])
+
+            order = np.argsort(pointXVals[1:], kind="stable")
+            curvatures = np.maximum(curvatures, np.interp(fineXVals, pointXVals[1:][order],
+                                                          surfaceCurvatures[order]))
+
+        # Point density, then place points at equal steps of its running total
+        densities = np.sqrt(1 + curvatures)
+        totals = np.concatenate(([0], np.cumsum((densities[1:] + densities[:-1]) / 2 * np.diff(fineXVals))))
+
+        return np.interp(fractions * totals[-1], totals, fineXVals)
+
+    # Process an airfoil for characteristics one point at a time
+    # @param:  airfoil               = Airfoil object to be processed
+    #          numberChordwisePoints = Integer number of points wanted on chord
+    #          progress              = function called at the start of each iteration,
+    #                                  see process
+    #          telemetry             = ProcessTelemetry to record into, None for no recording
+    #          spacing               = how chordwise points are spread, see chordwiseXVals
+    # @return: AirfoilData object
+    @staticmethod
+    def processScalar(airfoil, numberChordwisePoints, progress=None, telemetry=None, spacing="uniform"):
+
+        # Upper and lower coordinates for reference
+        upperCoordinatesRef, lowerCoordinatesRef = Airfoil.splitSurfaces(airfoil.coordinates)
+
+        if telemetry is not None:
+            telemetry.endPhase("split")
+
+        # Generate x values to output, number given as parameter
+        chordwiseXVals = Airfoil.chordwiseXVals(numberChordwisePoints, spacing, airfoil.coordinates)
+
+        xVals = chordwiseXVals.tolist()
+
+        # Generate interpolated y values based on reference coordinates
+        # Uses linear interpolation to estimate y values in between
+        # known reference y values
+        yUpperVals = upperCoordinatesRef.interpolateMany(xVals).tolist()
+        yLowerVals = lowerCoordinatesRef.interpolateMany(xVals).tolist()
+
+        # Create copy of xVals for mean camber line to be refined
+        xMeanCamberLineVals = xVals
+
+        # Initial estimate for mean camber line to be refined
+        # Uses average of top and bottom surface
+        yMeanCamberLineVals = []
+
+        for i in range(len(xVals)):
+
+            yMeanCamberLineVals.append((yUpperVals[i] + yLowerVals[i]) / 2)
+
+        # Initial estimate for upper and lower
+        # semi-thicknesses to be refined
+        # Uses half difference between top and bottom surface
+        # Lower semi-thicknesses are negated so when added to
+        # mean camber line it goes down instead
+        upperSemiThicknesses = []
+        lowerSemiThicknesses = []
+
+        for i in range(len(xVals)):
+            upperSemiThicknesses.append((yUpperVals[i] - yLowerVals[i]) / 2)
+            lowerSemiThicknesses.append((yLowerVals[i] - yUpperVals[i]) / 2)
+
+        if telemetry is not None:
+            telemetry.countInterpolations(2, 2 * numberChordwisePoints)
+            telemetry.endPhase("resample")
+
+        # Boolean if converged on mean camber line
+        converged = False
+
+        # How many times the outer loop has run, to see if reached max
+        iterations = 0
+
+        while iterations < Airfoil.maxMeanCamberLineIterations and not converged:
+
+            iterations += 1
+
+            if progress is not None:
+                progress(iterations, Airfoil.maxMeanCamberLineIterations)
+
+            if telemetry is not None:
+                telemetry.startOuterIteration()
+
+            # Perpendicular angles from mean camber line
+            # Starts with value for beginning
+            meanCamberLineAngles = [math.pi / 2]
+
+            # Estimates of upper and lower surface points for current iteration
+            # Start with values for beginnings
+            xUpperValsEst = [0]
+            yUpperValsEst = [0]
+
+            xLowerValsEst = [0]
+            yLowerValsEst = [0]
+
+            # For each non-end coordinate on surfaces
+            # create new points by going a semi-thickness distance
+            # perpendicularly away from the mean camber line
+            for i in range(len(xVals) - 2):
+
+                index = i + 1
+
+                # Estimate slope for this point on the mean camber line
+                # based on points before and after
+                slope = (yMeanCamberLineVals[index + 1] - yMeanCamberLineVals[index - 1]) / (xMeanCamberLineVals[index + 1] - xMeanCamberLineVals[index - 1])
+
+                # Find perpendicular angle to point based on the slope
+                angle = math.atan(slope) + (math.pi / 2)
+                meanCamberLineAngles.append(angle)
+
+                # Estimate upper and lower surface based on this angle
+                xUpperValsEst.append(xMeanCamberLineVals[index] + (upperSemiThicknesses[index] * math.cos(angle)))
+                yUpperValsEst.append(yMeanCamberLineVals[index] + (upperSemiThicknesses[index] * math.sin(angle)))
+
+                xLowerValsEst.append(xMeanCamberLineVals[index] + (lowerSemiThicknesses[index] * math.cos(angle)))
+                yLowerValsEst.append(yMeanCamberLineVals[index] + (lowerSemiThicknesses[index] * math.sin(angle)))
+
+            # Add end values
+            meanCamberLineAngles.append(math.pi / 2)
+
+            xUpperValsEst.append(1)
+            yUpperValsEst.append(0)
+
+            xLowerValsEst.append(1)
+            yLowerValsEst.append(0)
+
+            # Converge upper and lower surface
+            Airfoil.convergeSurface(xUpperValsEst, yUpperValsEst, upperCoordinatesRef, meanCamberLineAngles,
+                                    upperSemiThicknesses, xMeanCamberLineVals, yMeanCamberLineVals, telemetry)
+            Airfoil.convergeSurface(xLowerValsEst, yLowerValsEst, lowerCoordinatesRef, meanCamberLineAngles,
+                                    lowerSemiThicknesses, xMeanCamberLineVals, yMeanCamberLineVals, telemetry)
+
+            # Find largest difference between upper and lower semiThicknesses
+            # If less then threshold then done converging
+            largestDifference = 0
+
+            for i in range(len(upperSemiThicknesses)):
+
+                if abs(upperSemiThicknesses[i] - lowerSemiThicknesses[i]) > largestDifference:
+
+                    largestDifference = abs(upperSemiThicknesses[i] - lowerSemiThicknesses[i])
+
+            if telemetry is not None:
+                telemetry.endOuterIteration(largestDifference)
+
+            if largestDifference < Airfoil.thicknessConvergenceThreshold:
+                converged = True
+
+            # Set new mean camber line to be average of
+            # of upper and lower surfaces
+            for i in range(len(xVals)):
+                xMeanCamberLineVals[i] = (xUpperValsEst[i] + xLowerValsEst[i]) / 2
+                yMeanCamberLineVals[i] = (yUpperValsEst[i] + yLowerValsEst[i]) / 2
+
+        if telemetry is not None:
+            telemetry.converged = converged
+            telemetry.endPhase("converge")
+
+        # Create coordinates for interpolation of mean camber line
+        meanCamberLineCoordinates = Coordinates(xMeanCamberLineVals, yMeanCamberLineVals)
+
+        # Find y values on mean camber line for each x value
+        yFinalMeanCamberLineVals = meanCamberLineCoordinates.interpolateMany(xVals).tolist()
+
+        # Create coordinates for interpolation of thicknesses
+        thicknessCoordinates = Coordinates()
+
+        # Adding upper and lower semiThicknesses to get thicknesses
+        # Lower semiThickness are subtracted because they are negated
+        for i in range(len(xVals)):
+            thicknessCoordinates.addCoordinate(xMeanCamberLineVals[i], upperSemiThicknesses[i] - lowerSemiThicknesses[i])
+
+        # Find thickness values for each x value
+        # Multiplied by 100 to make percentage since chord length is 1
+        thicknesses = []
+
+        for yVal in thicknessCoordinates.interpolateMany(xVals).tolist():
+            thicknesses.append(abs(100 * yVal))
+
+        # Find camber percentages by multiplying camber line y values
+        # by 100 since chord length is 1
+        cambers = []
+
+        for yVal in yFinalMeanCamberLineVals:
+            cambers.append(100 * yVal)
+
+        # Find index of maximum thickness and maximum camber
+        maxThicknessIndex = 0
+        maxCamberIndex = 0
+
+        for i in range(len(xVals)):
+
+            if thicknesses[i] > thicknesses[maxThicknessIndex]:
+                maxThicknessIndex = i
+
+            if cambers[i] > cambers[maxCamberIndex]:
+                maxCamberIndex = i
+
+        if telemetry is not None:
+            telemetry.countInterpolations(2, 2 * numberChordwisePoints)
+            telemetry.endPhase("final")
+
+        # Return data object with found values
+        data = AirfoilData(airfoil, xVals, yUpperVals, yLowerVals,
+                           yFinalMeanCamberLineVals, thicknesses, cambers,
+                           maxThicknessIndex, maxCamberIndex)
+
+        data.warmStart = WarmStart(airfoil.coordinates.points.copy(), chordwiseXVals, np.array(xMeanCamberLineVals),
+                                   np.array(yMeanCamberLineVals), np.array(upperSemiThicknesses),
+                                   np.array(lowerSemiThicknesses))
+
+        return data
+
+    # Process an airfoil for characteristics with every chordwise point
+    # solved at once as NumPy arrays
+    # Follows the same steps as processScalar
+    # @param:  airfoil               = Airfoil object to be processed
+    #          numberChordwisePoints = Integer number of points wanted on chord
+    #          newton                = True to converge surfaces with convergeSurfaceNewton
+    #                                  and report per-point iteration counts
+    #          progress              = function called at the start of each iteration,
+    #                                  see process
+    #          telemetry             = ProcessTelemetry to record into, None for no recording
+    #          spacing               = how chordwise points are spread, see chordwiseXVals
+    # @return: AirfoilData object
+    @staticmethod
+    def processVectorized(airfoil, numberChordwisePoints, newton=False, progress=None, telemetry=None,
+                          spacing="uniform"):
+
+        # Upper and lower coordinates for reference
+        upperCoordinatesRef, lowerCoordinatesRef = Airfoil.splitSurfaces(airfoil.coordinates)
+
+        if telemetry is not None:
+            telemetry.endPhase("split")
+
+        xVals = Airfoil.chordwiseXVals(numberChordwisePoints, spacing, airfoil.coordinates)
+
+        # Interpolated y values based on reference coordinates
+        yUpperVals = upperCoordinatesRef.interpolateMany(xVals)
+        yLowerVals = lowerCoordinatesRef.interpolateMany(xVals)
+
+        # Initial estimate for mean camber line using average of surfaces
+        xMeanCamberLineVals = xVals.copy()
+        yMeanCamberLineVals = (yUpperVals + yLowerVals) / 2
+
+        # Initial estimate for semi-thicknesses using half difference
+        # Lower semi-thicknesses are negated
+        upperSemiThicknesses = (yUpperVals - yLowerVals) / 2
+        lowerSemiThicknesses = (yLowerVals - yUpperVals) / 2
+
+        # Inner iterations spent on each point, summed over outer iterations
+        upperIterationCounts = np.zeros(numberChordwisePoints, dtype=int)
+        lowerIterationCounts = np.zeros(numberChordwisePoints, dtype=int)
+
+        if telemetry is not None:
+            telemetry.countInterpolations(2, 2 * numberChordwisePoints)
+            telemetry.endPhase("resample")
+
+        converged = False
+        iterations = 0
+
+        while iterations < Airfoil.maxMeanCamberLineIterations and not converged:
+
+            iterations += 1
+
+            if progress is not None:
+                progress(iterations, Airfoil.maxMeanCamberLineIterations)
+
+            if telemetry is not None:
+                telemetry.startOuterIteration()
+
+            # Directions perpendicular to the mean camber line
+            cosAngles, sinAngles = Airfoil.meanCamberLineDirections(xMeanCamberLineVals, yMeanCamberLineVals)
+
+            # Estimate surfaces a semi-thickness away from the mean camber line
+            xUpperValsEst = xMeanCamberLineVals + (upperSemiThicknesses * cosAngles)
+            yUpperValsEst = yMeanCamberLineVals + (upperSemiThicknesses * sinAngles)
+
+            xLowerValsEst = xMeanCamberLineVals + (lowerSemiThicknesses * cosAngles)
+            yLowerValsEst = yMeanCamberLineVals + (lowerSemiThicknesses * sinAngles)
+
+            # End values
+            xUpperValsEst[0], yUpperValsEst[0], xUpperValsEst[-1], yUpperValsEst[-1] = 0, 0, 1, 0
+            xLowerValsEst[0], yLowerValsEst[0], xLowerValsEst[-1], yLowerValsEst[-1] = 0, 0, 1, 0
+
+            # Converge upper and lower surface
+            if newton:
+
+                xUpperValsEst, yUpperValsEst, upperIterations = Airfoil.convergeSurfaceNewton(
+                    xUpperValsEst, yUpperValsEst, upperCoordinatesRef, cosAngles, sinAngles,
+                    upperSemiThicknesses, xMeanCamberLineVals, yMeanCamberLineVals, telemetry)
+                xLowerValsEst, yLowerValsEst, lowerIterations = Airfoil.convergeSurfaceNewton(
+                    xLowerValsEst, yLowerValsEst, lowerCoordinatesRef, cosAngles, sinAngles,
+                    lowerSemiThicknesses, xMeanCamberLineVals, yMeanCamberLineVals, telemetry)
+
+                upperIterationCounts += upperIterations
+                lowerIterationCounts += lowerIterations
+
+            else:
+
+                xUpperValsEst, yUpperValsEst = Airfoil.convergeSurfaceVectorized(
+                    xUpperValsEst, yUpperValsEst, upperCoordinatesRef, cosAngles, sinAngles,
+                    upperSemiThicknesses, xMeanCamberLineVals, yMeanCamberLineVals, telemetry)
+                xLowerValsEst, yLowerValsEst = Airfoil.convergeSurfaceVectorized(
+                    xLowerValsEst, yLowerValsEst, lowerCoordinatesRef, cosAngles, sinAngles,
+                    lowerSemiThicknesses, xMeanCamberLineVals, yMeanCamberLineVals, telemetry)
+
+            # Done when largest difference between semi-thicknesses is under threshold
+            differences = np.abs(upperSemiThicknesses - lowerSemiThicknesses)
+            largestDifference = np.max(differences, initial=0, where=~np.isnan(differences))
+
+            if telemetry is not None:
+                telemetry.endOuterIteration(largestDifference)
+
+            if largestDifference < Airfoil.thicknessConvergenceThreshold:
+                converged = True
+
+            # New mean camber line is average of upper and lower surfaces
+            xMeanCamberLineVals = (xUpperValsEst + xLowerValsEst) / 2
+            yMeanCamberLineVals = (yUpperValsEst + yLowerValsEst) / 2
+
+        if telemetry is not None:
+            telemetry.converged = converged
+            telemetry.endPhase("converge")
+
+        data = Airfoil.dataFromSolution(airfoil, xVals, yUpperVals, yLowerVals, xMeanCamberLineVals,
+                                        yMeanCamberLineVals, upperSemiThicknesses, lowerSemiThicknesses)
+
+        if telemetry is not None:
+            telemetry.countInterpolations(2, 2 * numberChordwisePoints)
+            telemetry.endPhase("final")
+
+        if newton:
+            data.upperIterationCounts = upperIterationCounts.tolist()
+            data.lowerIterationCounts = lowerIterationCounts.tolist()
+
+        return data
+
+    # Process many airfoils together, stacking them into (airfoils x points) arrays
+    # Gives the same results as processing each airfoil with the "vectorized" mode,
+    # an airfoil stops iterating once its mean camber line converges and
+    # airfoils that cannot be processed are dropped with their error
+    # @param:  airfoils              = list of Airfoil objects to be processed
+    #          numberChordwisePoints = Integer number of points wanted on chord, the same for every airfoil
+    #          spacing               = spacing passed to chordwiseXVals for each airfoil
+    #          progress              = function called at the start of each iteration, see process
+    # @return: BatchData object
+    @staticmethod
+    def processBatch(airfoils, numberChordwisePoints, spacing="uniform", progress=None):
+
+        count = len(airfoils)
+        result = BatchData(airfoils, numberChordwisePoints)
+
+        # Every airfoil shares one grid unless it is adapted to each airfoil
+        grid = None if spacing == "adaptive" else Airfoil.chordwiseXVals(numberChordwisePoints, spacing)
+
+        # Airfoils that can be split and given chordwise points, errors of the rest are kept
+        upperCoordinatesRefs = []
+        lowerCoordinatesRefs = []
+
+        for index, airfoil in enumerate(airfoils):
+
+            try:
+
+                upperCoordinatesRef, lowerCoordinatesRef = Airfoil.splitSurfaces(airfoil.coordinates)
+                result.chordwiseXVals[index] = grid if grid is not None else \
+                    Airfoil.chordwiseXVals(numberChordwisePoints, spacing, airfoil.coordinates)
+
+            except Exception as error:
+
+                result.fail(index, error)
+                upperCoordinatesRef = lowerCoordinatesRef = Coordinates([0, 1], [0, 0])
+
+            upperCoordinatesRefs.append(upperCoordinatesRef)
+            lowerCoordinatesRefs.append(lowerCoordinatesRef)
+
+        if count == 0:
+            return result
+
+        # Reference surfaces of every airfoil searched together
+        upperCoordinatesRef = StackedCoordinates(upperCoordinatesRefs)
+        lowerCoordinatesRef = StackedCoordinates(lowerCoordinatesRefs)
+
+        rows = np.arange(count)
+        xVals = result.chordwiseXVals
+
+        # Interpolated y values based on reference coordinates
+        yUpperVals, upperFailed = upperCoordinatesRef.interpolateMany(rows, xVals)
+        yLowerVals, lowerFailed = lowerCoordinatesRef.interpolateMany(rows, xVals)
+
+        result.failDivision(rows[upperFailed | lowerFailed])
+
+        # Initial estimate for mean camber line using average of surfaces
+        xMeanCamberLineVals = xVals.copy()
+        yMeanCamberLineVals = (yUpperVals + yLowerVals) / 2
+
+        # Initial estimate for semi-thicknesses using half difference
+        # Lower semi-thicknesses are negated
+        upperSemiThicknesses = (yUpperVals - yLowerVals) / 2
+        lowerSemiThicknesses = (yLowerVals - yUpperVals) / 2
+
+        # Rows of airfoils still iterating
+        active = rows[result.succeeded()]
+        iterations = 0
+
+        while iterations < Airfoil.maxMeanCamberLineIterations and len(active) > 0:
+
+            iterations += 1
+
+            if progress is not None:
+                progress(iterations, Airfoil.maxMeanCamberLineIterations)
+
+            result.iterations[active] = iterations
+
+            # Views instead of copies while every airfoil is iterating
+            batchRows = active if len(active) < count else slice(None)
+
+            xMeanCamberLine = xMeanCamberLineVals[batchRows]
+            yMeanCamberLine = yMeanCamberLineVals[batchRows]
+
+            # Directions perpendicular to the mean camber line
+            cosAngles, sinAngles = Airfoil.meanCamberLineDirections(xMeanCamberLine, yMeanCamberLine)
+
+            upperSemi = upperSemiThicknesses[batchRows]
+            lowerSemi = lowerSemiThicknesses[batchRows]
+
+            # Estimate surfaces a semi-thickness away from the mean camber line
+            xUpperValsEst = xMeanCamberLine + (upperSemi * cosAngles)
+            yUpperValsEst = yMeanCamberLine + (upperSemi * sinAngles)
+
+            xLowerValsEst = xMeanCamberLine + (lowerSemi * cosAngles)
+            yLowerValsEst = yMeanCamberLine + (lowerSemi * sinAngles)
+
+            # End values
+            xUpperValsEst[:, 0], yUpperValsEst[:, 0], xUpperValsEst[:, -1], yUpperValsEst[:, -1] = 0, 0, 1, 0
+            xLowerValsEst[:, 0], yLowerValsEst[:, 0], xLowerValsEst[:, -1], yLowerValsEst[:, -1] = 0, 0, 1, 0
+
+            # Converge upper and lower surfaces of every airfoil
+            xUpperValsEst, yUpperValsEst, upperFailed = Airfoil.convergeSurfaceBatch(
+                xUpperValsEst, yUpperValsEst, upperCoordinatesRef, active, cosAngles, sinAngles,
+                upperSemi, xMeanCamberLine, yMeanCamberLine)
+            xLowerValsEst, yLowerValsEst, lowerFailed = Airfoil.convergeSurfaceBatch(
+                xLowerValsEst, yLowerValsEst, lowerCoordinatesRef, active, cosAngles, sinAngles,
+                lowerSemi, xMeanCamberLine, yMeanCamberLine)
+
+            upperSemiThicknesses[batchRows] = upperSemi
+            lowerSemiThicknesses[batchRows] = lowerSemi
+
+            # Done when largest difference between semi-thicknesses is under threshold
+            differences = np.abs(upperSemi - lowerSemi)
+            largestDifferences = np.max(differences, axis=1, initial=0, where=~np.isnan(differences))
+
+            converged = largestDifferences < Airfoil.thicknessConvergenceThreshold
+            result.converged[batchRows] = converged
+
+            # New mean camber line is average of upper and lower surfaces
+            xMeanCamberLineVals[batchRows] = (xUpperValsEst + xLowerValsEst) / 2
+            yMeanCamberLineVals[batchRows] = (yUpperValsEst + yLowerValsEst) / 2
+
+            failed = upperFailed | lowerFailed
+            result.failDivision(active[failed])
+
+            active = active[~(converged | failed)]
+
+        result.finish(yUpperVals, yLowerVals, xMeanCamberLineVals, yMeanCamberLineVals, upperSemiThicknesses,
+                      lowerSemiThicknesses)
+
+        return result
+
+    # Directions perpendicular to a mean camber line
+    # Slopes of non-end points are based on points before and after,
+    # ends stay vertical
+    # @param:  xMeanCamberLineVals = numpy array of x values of mean camber line,
+    #                                or one mean camber line a row
+    #          yMeanCamberLineVals = numpy array of y values of mean camber line
+    # @return: numpy array of cosines, numpy array of sines of perpendicular angles
+    @staticmethod
+    def meanCamberLineDirections(xMeanCamberLineVals, yMeanCamberLineVals):
+
+        meanCamberLineAngles = np.full(np.shape(xMeanCamberLineVals), math.pi / 2)
+
+        slopes = ((yMeanCamberLineVals[..., 2:] - yMeanCamberLineVals[..., :-2]) /
+                  (xMeanCamberLineVals[..., 2:] - xMeanCamberLineVals[..., :-2]))
+
+        meanCamberLineAngles[..., 1:-1] = np.arctan(slopes) + (math.pi / 2)
+
+        return np.cos(meanCamberLineAngles), np.sin(meanCamberLineAngles)
+
+    # Build AirfoilData from a converged mean camber line and semi-thicknesses
+    # The solution is kept on the data as a WarmStart for Airfoil.reprocess
+    # @param:  airfoil              = Airfoil object that was processed
+    #          chordwiseXVals       = numpy array of x values processing started from
+    #          yUpperVals           = numpy array of upper surface y values at chordwiseXVals
+    #          yLowerVals           = numpy array of lower surface y values at chordwiseXVals
+    #          xMeanCamberLineVals  = numpy array of x values of converged mean camber line
+    #          yMeanCamberLineVals  = numpy array of y values of converged mean camber line
+    #          upperSemiThicknesses = numpy array of upper semi-thicknesses
+    #          lowerSemiThicknesses = numpy array of lower semi-thicknesses, negated
+    #          points               = coordinate points processed, or function giving them, for the WarmStart,
+    #                                 None to copy the points of airfoil
+    # @return: AirfoilData object
+    @staticmethod
+    def dataFromSolution(airfoil, chordwiseXVals, yUpperVals, yLowerVals, xMeanCamberLineVals, yMeanCamberLineVals,
+                         upperSemiThicknesses, lowerSemiThicknesses, points=None):
+
+        # Like processScalar, final values are found at the
+        # converged mean camber line x values
+        xVals = xMeanCamberLineVals
+
+        meanCamberLineCoordinates = Coordinates(xMeanCamberLineVals, yMeanCamberLineVals)
+        yFinalMeanCamberLineVals = meanCamberLineCoordinates.interpolateMany(xVals)
+
+        # Thickness percentages, lower semi-thicknesses are negated
+        thicknessCoordinates = Coordinates(xMeanCamberLineVals, upperSemiThicknesses - lowerSemiThicknesses)
+        thicknesses = np.abs(100 * thicknessCoordinates.interpolateMany(xVals))
+
+        # Camber percentages
+        cambers = 100 * yFinalMeanCamberLineVals
+
+        data = AirfoilData(airfoil, xVals.tolist(), yUpperVals.tolist(), yLowerVals.tolist(),
+                           yFinalMeanCamberLineVals.tolist(), thicknesses.tolist(), cambers.tolist(),
+                           Airfoil.firstMaxIndex(thicknesses), Airfoil.firstMaxIndex(cambers))
+
+        if points is None:
+            points = airfoil.coordinates.points.copy()
+
+        data.warmStart = WarmStart(points, chordwiseXVals, xMeanCamberLineVals, yMeanCamberLineVals,
+                                   upperSemiThicknesses, lowerSemiThicknesses)
+
+        return data
+
+    # Reprocess an edited airfoil starting from the data of an earlier process call
+    # Only chordwise points whose surface points are near changed coordinates are
+    # converged again, the rest of the mean camber line and semi-thicknesses are kept
+    # A point stays in the work set while its mean camber line point moves more than
+    # the threshold, pulling in its neighbours since their slopes depend on it
+    # Falls back to Airfoil.process when the earlier data has no WarmStart
+    # or coordinates were added or removed
+    # @param:  airfoil      = Airfoil object with edited coordinates
+    #          previousData = AirfoilData from processing the airfoil before it was edited
+    #          mode         = processing mode passed to Airfoil.process when falling back
+    #          progress     = function called at the start of each iteration, see process
+    #          spacing      = spacing passed to Airfoil.process when falling back
+    # @return: AirfoilData object
+    @staticmethod
+    def reprocess(airfoil, previousData, mode="vectorized", progress=None, spacing="uniform"):
+
+        warmStart = previousData.warmStart
+        numberChordwisePoints = len(previousData.xVals)
+        points = airfoil.coordinates.points
+
+        if warmStart is None or warmStart.points.shape != points.shape:
+            return Airfoil.process(airfoil, numberChordwisePoints, mode, progress, spacing=spacing)
+
+        upperCoordinatesRef, lowerCoordinatesRef = Airfoil.splitSurfaces(airfoil.coordinates)
+
+        # Surfaces at the x values processing started from, cheap enough to always find again
+        xVals = warmStart.chordwiseXVals
+
+        yUpperVals = upperCoordinatesRef.interpolateMany(xVals)
+        yLowerVals = lowerCoordinatesRef.interpolateMany(xVals)
+
+        xMeanCamberLineVals = warmStart.xMeanCamberLineVals.copy()
+        yMeanCamberLineVals = warmStart.yMeanCamberLineVals.copy()
+        upperSemiThicknesses = warmStart.upperSemiThicknesses.copy()
+        lowerSemiThicknesses = warmStart.lowerSemiThicknesses.copy()
+
+        # Indices of chordwise points being converged
+        active = Airfoil.changedChordwisePoints(warmStart, points)
+
+        converged = len(active) == 0
+        iterations = 0
+
+        while iterations < Airfoil.maxMeanCamberLineIterations and not converged:
+
+            iterations += 1
+
+            if progress is not None:
+                progress(iterations, Airfoil.maxMeanCamberLineIterations)
+
+            cosAngles, sinAngles = Airfoil.meanCamberLineDirections(xMeanCamberLineVals, yMeanCamberLineVals)
+
+            cosActive = cosAngles[active]
+            sinActive = sinAngles[active]
+            xMeanCamberLineActive = xMeanCamberLineVals[active]
+            yMeanCamberLineActive = yMeanCamberLineVals[active]
+            upperSemiThicknessesActive = upperSemiThicknesses[active]
+            lowerSemiThicknessesActive = lowerSemiThicknesses[active]
+
+            # Estimate surfaces a semi-thickness away from the mean camber line
+            xUpperValsEst = xMeanCamberLineActive + (upperSemiThicknessesActive * cosActive)
+            yUpperValsEst = yMeanCamberLineActive + (upperSemiThicknessesActive * sinActive)
+
+            xLowerValsEst = xMeanCamberLineActive + (lowerSemiThicknessesActive * cosActive)
+            yLowerValsEst = yMeanCamberLineActive + (lowerSemiThicknessesActive * sinActive)
+
+            # End values, indices are sorted so ends can only be first or last
+            if active[0] == 0:
+                xUpperValsEst[0], yUpperValsEst[0], xLowerValsEst[0], yLowerValsEst[0] = 0, 0, 0, 0
+
+            if active[-1] == numberChordwisePoints - 1:
+                xUpperValsEst[-1], yUpperValsEst[-1], xLowerValsEst[-1], yLowerValsEst[-1] = 1, 0, 1, 0
+
+            xUpperValsEst, yUpperValsEst = Airfoil.convergeSurfaceVectorized(
+                xUpperValsEst, yUpperValsEst, upperCoordinatesRef, cosActive, sinActive,
+                upperSemiThicknessesActive, xMeanCamberLineActive, yMeanCamberLineActive)
+            xLowerValsEst, yLowerValsEst = Airfoil.convergeSurfaceVectorized(
+                xLowerValsEst, yLowerValsEst, lowerCoordinatesRef, cosActive, sinActive,
+                lowerSemiThicknessesActive, xMeanCamberLineActive, yMeanCamberLineActive)
+
+            upperSemiThicknesses[active] = upperSemiThicknessesActive
+            lowerSemiThicknesses[active] = lowerSemiThicknessesActive
+
+            # New mean camber line is average of upper and lower surfaces
+            xNewMeanCamberLine = (xUpperValsEst + xLowerValsEst) / 2
+            yNewMeanCamberLine = (yUpperValsEst + yLowerValsEst) / 2
+
+            movement = np.maximum(np.abs(xNewMeanCamberLine - xMeanCamberLineActive),
+                                  np.abs(yNewMeanCamberLine - yMeanCamberLineActive))
+
+            xMeanCamberLineVals[active] = xNewMeanCamberLine
+            yMeanCamberLineVals[active] = yNewMeanCamberLine
+
+            # Keep converging points that still moved, and their neighbours
+            # as their slopes depend on them
+            moving = active[movement >= Airfoil.thicknessConvergenceThreshold]
+            active = Airfoil.withNeighbours(moving, numberChordwisePoints)
+
+            converged = len(moving) == 0
+
+        return Airfoil.dataFromSolution(airfoil, xVals, yUpperVals, yLowerVals, xMeanCamberLineVals,
+                                        yMeanCamberLineVals, upperSemiThicknesses, lowerSemiThicknesses)
+
+    # Find the chordwise points affected by changed coordinates
+    # A chordwise point is affected when the mean camber line or either surface point
+    # found from it lies between the x values of changed coordinates and their neighbours
+    # @param:  warmStart = WarmStart of data from before the change
+    #          points    = numpy array of current coordinate points, same shape as warmStart.points
+    # @return: sorted numpy array of indices of affected chordwise points and their neighbours
+    @staticmethod
+    def changedChordwisePoints(warmStart, points):
+
+        changed = np.flatnonzero((warmStart.points != points).any(axis=0))
+
+        xMeanCamberLineVals = warmStart.xMeanCamberLineVals
+
+        if len(changed) == 0:
+            return np.array([], dtype=int)
+
+        # Coordinates next to a changed one share a segment with it,
+        # the first and last coordinates are neighbours on the closed loop
+        neighbours = np.concatenate((changed - 1, changed, (changed + 1) % points.shape[1]))
+        xChanged = np.concatenate((points[0, neighbours], warmStart.points[0, neighbours]))
+
+        lowX = np.min(xChanged)
+        highX = np.max(xChanged)
+
+        cosAngles = Airfoil.meanCamberLineDirections(xMeanCamberLineVals, warmStart.yMeanCamberLineVals)[0]
+
+        xUpperVals = xMeanCamberLineVals + (warmStart.upperSemiThicknesses * cosAngles)
+        xLowerVals = xMeanCamberLineVals + (warmStart.lowerSemiThicknesses * cosAngles)
+
+        affected = np.flatnonzero(((xMeanCamberLineVals >= lowX) & (xMeanCamberLineVals <= highX)) |
+                                  ((xUpperVals >= lowX) & (xUpperVals <= highX)) |
+                                  ((xLowerVals >= lowX) & (xLowerVals <= highX)))
+
+        return Airfoil.withNeighbours(affected, len(xMeanCamberLineVals))
+
+    # Add the indices before and after each index
+    # @param:  indices = numpy array of indices
+    #          count   = number of points, indices are kept below it
+    # @return: sorted numpy array of unique indices
+    @staticmethod
+    def withNeighbours(indices, count):
+
+        indices = np.concatenate((indices - 1, indices, indices + 1))
+
+        return np.unique(indices[(indices >= 0) & (indices < count)])
+
+    # Find index of first largest value, ignoring NaN like a comparison loop would
+    # @param:  values = numpy array of values
+    # @return: index of largest value
+    @staticmethod
+    def firstMaxIndex(values):
+
+        if np.isnan(values[0]):
+            return 0
+
+        return int(np.argmax(np.where(np.isnan(values), -np.inf, values)))
+
+    # Converge estimates onto a surface
+    # @param: xValsEst = estimated x values to converge
+    #         yValsESt = estimated y values to converge
+    #         coordinatesRef       = reference coordinates to interpolate on
+    #         meanCamberLineAngles = tangent angles to mean camber line
+    #         semiThicknesses      = distance from mean camber line to surface
+    #         xMeanCamberLinesVals = x values of current mean camber line
+    #         yMeanCamberLinesVals = y values of current mean camber line
+    #         telemetry            = ProcessTelemetry to record into, None for no recording
+    @staticmethod
+    def convergeSurface(xValsEst, yValsEst, coordinatesRef, meanCamberLineAngles, semiThicknesses,
+                        xMeanCamberLinesVals, yMeanCamberLinesVals, telemetry=None):
+
+        iteration = 0
+        converged = False
+
+        # Largest delta y value of each iteration, kept for telemetry
+        residuals = []
+
+        while iteration < Airfoil.maxInnerIterations and not converged:
+
+            iteration += 1
+
+            # Used for perturbance
+            dt = 0.0001
+
+            # Find largest delta y value to see if under threshold
+            largestDeltaYVal = -math.inf
+
+            # Perturb values and apply gradient to modify semiThickness
+            for i in range(len(xValsEst)):
+
+                oldYVal = coordinatesRef.interpolate(xValsEst[i])
+                deltaYVal = oldYVal - yValsEst[i]
+
+                # Check if delta y value is larger than largest found
+                if deltaYVal > largestDeltaYVal:
+                    largestDeltaYVal = deltaYVal
+
+                # Perturb positions slightly
+                xValPert = xMeanCamberLinesVals[i] + ((semiThicknesses[i] + dt) * math.cos(meanCamberLineAngles[i]))
+                yValPert = yMeanCamberLinesVals[i] + ((semiThicknesses[i] + dt) * math.sin(meanCamberLineAngles[i]))
+
+                # Find change between what y would be on old curve and new y
+                oldYValPert   = coordinatesRef.interpolate(xValPert)
+                deltaYValPert = oldYValPert - yValPert
+
+                # Gradient
+                gradient = (deltaYValPert - deltaYVal) / dt
+
+                # Update semiThickness
+                semiThicknesses[i] = semiThicknesses[i] - (deltaYVal / gradient)
+
+                # Update coordinate estimates
+                xValsEst[i] = xMeanCamberLinesVals[i] + (semiThicknesses[i] * math.cos(meanCamberLineAngles[i]))
+                yValsEst[i] = yMeanCamberLinesVals[i] + (semiThicknesses[i] * math.sin(meanCamberLineAngles[i]))
+
+            if telemetry is not None:
+                residuals.append(largestDeltaYVal)
+
+            # If largest change in a y value is less than threshold
+            # then done converging
+            if largestDeltaYVal < Airfoil.thicknessConvergenceThreshold:
+                converged = True
+
+        if telemetry is not None:
+            telemetry.countInterpolations(2 * iteration * len(xValsEst), 2 * iteration * len(xValsEst))
+            telemetry.recordSurface(iteration, converged, residuals)
+
+    # Converge estimates onto a surface, updating every point at once
+    # Same steps as convergeSurface with NumPy arrays
+    # @param:  xValsEst = numpy array of estimated x values to converge
+    #          yValsEst = numpy array of estimated y values to converge
+    #          coordinatesRef       = reference coordinates to interpolate on
+    #          cosAngles            = cosines of perpendicular angles to mean camber line
+    #          sinAngles            = sines of perpendicular angles to mean camber line
+    #          semiThicknesses      = numpy array of distances from mean camber line
+    #                                 to surface, updated in place
+    #          xMeanCamberLinesVals = numpy array of x values of current mean camber line
+    #          yMeanCamberLinesVals = numpy array of y values of current mean camber line
+    #          telemetry            = ProcessTelemetry to record into, None for no recording
+    # @return: converged x values, converged y values
+    @staticmethod
+    def convergeSurfaceVectorized(xValsEst, yValsEst, coordinatesRef, cosAngles, sinAngles, semiThicknesses,
+                                  xMeanCamberLinesVals, yMeanCamberLinesVals, telemetry=None):
+
+        iteration = 0
+        converged = False
+
+        # Largest delta y value of each iteration, kept for telemetry
+        residuals = []
+
+        # Used for perturbance
+        dt = 0.0001
+
+        while iteration < Airfoil.maxInnerIterations and not converged:
+
+            iteration += 1
+
+            # Perturb positions slightly
+            xValsPert = xMeanCamberLinesVals + ((semiThicknesses + dt) * cosAngles)
+            yValsPert = yMeanCamberLinesVals + ((semiThicknesses + dt) * sinAngles)
+
+            # Interpolate estimates and perturbed positions in one call
+            yValsRef = coordinatesRef.interpolateMany(np.concatenate((xValsEst, xValsPert)))
+
+            deltaYVals = yValsRef[:len(xValsEst)] - yValsEst
+            deltaYValsPert = yValsRef[len(xValsEst):] - yValsPert
+
+            gradients = (deltaYValsPert - deltaYVals) / dt
+
+            if not gradients.all():
+                raise ZeroDivisionError("float division by zero")
+
+            # Update semiThicknesses and coordinate estimates
+            semiThicknesses -= deltaYVals / gradients
+
+            xValsEst = xMeanCamberLinesVals + (semiThicknesses * cosAngles)
+            yValsEst = yMeanCamberLinesVals + (semiThicknesses * sinAngles)
+
+            largestDeltaYVal = np.max(deltaYVals, initial=-math.inf, where=~np.isnan(deltaYVals))
+
+            if telemetry is not None:
+                residuals.append(largestDeltaYVal)
+
+            # If largest change in a y value is less than threshold
+            # then done converging
+            if largestDeltaYVal < Airfoil.thicknessConvergenceThreshold:
+                converged = True
+
+        if telemetry is not None:
+            telemetry.countInterpolations(iteration, 2 * iteration * len(xValsEst))
+            telemetry.recordSurface(iteration, converged, residuals)
+
+        return xValsEst, yValsEst
+
+    # Converge estimates of many airfoils onto their surfaces, like convergeSurfaceVectorized
+    # An airfoil stops iterating once its largest y difference is under the threshold
+    # @param:  xValsEst = numpy array of estimated x values to converge (airfoils x points)
+    #          yValsEst = numpy array of estimated y values to converge (airfoils x points)
+    #          coordinatesRef       = StackedCoordinates of reference surfaces to interpolate on
+    #          sets                 = numpy array of index in coordinatesRef of each airfoil
+    #          cosAngles            = cosines of perpendicular angles to mean camber lines
+    #          sinAngles            = sines of perpendicular angles to mean camber lines
+    #          semiThicknesses      = numpy array of distances from mean camber lines
+    #                                 to surfaces, updated in place
+    #          xMeanCamberLinesVals = numpy array of x values of current mean camber lines
+    #          yMeanCamberLinesVals = numpy array of y values of current mean camber lines
+    # @return: converged x values, converged y values,
+    #          numpy array of booleans, True for airfoils that would divide by zero
+    @staticmethod
+    def convergeSurfaceBatch(xValsEst, yValsEst, coordinatesRef, sets, cosAngles, sinAngles, semiThicknesses,
+                             xMeanCamberLinesVals, yMeanCamberLinesVals):
+
+        iteration = 0
+        failed = np.zeros(len(sets), dtype=bool)
+
+        # Rows still iterating
+        active = np.arange(len(sets))
+
+        # Used for perturbance
+        dt = 0.0001
+
+        while iteration < Airfoil.maxInnerIterations and len(active) > 0:
+
+            iteration += 1
+
+            # Views instead of copies while every airfoil is iterating
+            rows = active if len(active) < len(sets) else slice(None)
+
+            cos = cosAngles[rows]
+            sin = sinAngles[rows]
+            semi = semiThicknesses[rows]
+            xMeanCamberLine = xMeanCamberLinesVals[rows]
+            yMeanCamberLine = yMeanCamberLinesVals[rows]
+
+            # Perturb positions slightly
+            xValsPert = xMeanCamberLine + ((semi + dt) * cos)
+            yValsPert = yMeanCamberLine + ((semi + dt) * sin)
+
+            # Interpolate estimates and perturbed positions in one call
+            yValsRef, divisionFailed = coordinatesRef.interpolateMany(
+                sets[rows], np.concatenate((xValsEst[rows], xValsPert), axis=1))
+
+            points = xValsEst.shape[1]
+
+            deltaYVals = yValsRef[:, :points] - yValsEst[rows]
+            deltaYValsPert = yValsRef[:, points:] - yValsPert
+
+            gradients = (deltaYValsPert - deltaYVals) / dt
+
+            # Airfoils that cannot be moved fail like convergeSurfaceVectorized raising
+            divisionFailed |= ~gradients.all(axis=1)
+            failed[active[divisionFailed]] = True
+
+            # Update semiThicknesses and coordinate estimates
+            with np.errstate(divide="ignore", invalid="ignore"):
+                semi -= deltaYVals / gradients
+
+            semiThicknesses[rows] = semi
+
+            xValsEst[rows] = xMeanCamberLine + (semi * cos)
+            yValsEst[rows] = yMeanCamberLine + (semi * sin)
+
+            largestDeltaYVals = np.max(deltaYVals, axis=1, initial=-math.inf, where=~np.isnan(deltaYVals))
+
+            # Airfoils whose largest change in a y value is less than threshold are done converging
+            active = active[~(divisionFailed | (largestDeltaYVals < Airfoil.thicknessConvergenceThreshold))]
+
+        return xValsEst, yValsEst, failed
+
+    # Converge estimates onto a surface with a Newton update for all points at once
+    # Stops on the same largest y difference as convergeSurfaceVectorized, but a point leaves
+    # the work set once its own y difference is under the threshold after taking its last step,
+    # so only the points still far from the surface are interpolated again
+    # A point with a zero gradient off the surface is frozen where it is instead of raising,
+    # its y difference then keeps the surface from counting as converged
+    # @param:  xValsEst = numpy array of estimated x values to converge
+    #          yValsEst = numpy array of estimated y values to converge
+    #          coordinatesRef       = reference coordinates to interpolate on
+    #          cosAngles            = cosines of perpendicular angles to mean camber line
+    #          sinAngles            = sines of perpendicular angles to mean camber line
+    #          semiThicknesses      = numpy array of distances from mean camber line
+    #                                 to surface, updated in place
+    #          xMeanCamberLinesVals = numpy array of x values of current mean camber line
+    #          yMeanCamberLinesVals = numpy array of y values of current mean camber line
+    #          telemetry            = ProcessTelemetry to record into, None for no recording
+    # @return: converged x values, converged y values, numpy array of iterations per point
+    @staticmethod
+    def convergeSurfaceNewton(xValsEst, yValsEst, coordinatesRef, cosAngles, sinAngles, semiThicknesses,
+                              xMeanCamberLinesVals, yMeanCamberLinesVals, telemetry=None):
+
+        # Points that stop after the first iteration keep their count of one
+        iterationCounts = np.ones(len(xValsEst), dtype=int)
+
+        # Indices of points still moving, None while every point is
+        active = None
+
+        # Largest delta y value of frozen points, points that stopped moving
+        # otherwise have delta y values under the threshold
+        largestFrozenDeltaYVal = -math.inf
+
+        # Used for perturbance
+        dt = 0.0001
+
+        iteration = 0
+        converged = False
+
+        # Largest delta y value of each iteration, kept for telemetry
+        residuals = []
+
+        while iteration < Airfoil.maxInnerIterations and not converged:
+
+            iteration += 1
+
+            # Whole arrays instead of copies until few enough points are moving that
+            # copying them out is cheaper, points that stopped only take tiny steps
+            whole = active is None or 2 * len(active) > len(xValsEst)
+
+            if whole:
+                semiThicknessesActive, cosAnglesActive, sinAnglesActive = semiThicknesses, cosAngles, sinAngles
+                xMeanCamberLineActive, yMeanCamberLineActive = xMeanCamberLinesVals, yMeanCamberLinesVals
+                xValsEstActive, yValsEstActive = xValsEst, yValsEst
+            else:
+                rows = active
+                semiThicknessesActive, cosAnglesActive, sinAnglesActive = (
+                    semiThicknesses[rows], cosAngles[rows], sinAngles[rows])
+                xMeanCamberLineActive, yMeanCamberLineActive = xMeanCamberLinesVals[rows], yMeanCamberLinesVals[rows]
+                xValsEstActive, yValsEstActive = xValsEst[rows], yValsEst[rows]
+
+            # Perturb positions slightly
+            xValsPert = xMeanCamberLineActive + ((semiThicknessesActive + dt) * cosAnglesActive)
+            yValsPert = yMeanCamberLineActive + ((semiThicknessesActive + dt) * sinAnglesActive)
+
+            # Interpolate estimates and perturbed positions in one call
+            yValsRef = coordinatesRef.interpolateMany(np.concatenate((xValsEstActive, xValsPert)))
+
+            deltaYValsActive = yValsRef[:len(xValsPert)] - yValsEstActive
+            deltaYValsPert = yValsRef[len(xValsPert):] - yValsPert
+
+            gradients = (deltaYValsPert - deltaYValsActive) / dt
+
+            # Points with a zero gradient take no step
+            if gradients.all():
+                flat = None
+                steps = deltaYValsActive / gradients
+            else:
+                flat = gradients == 0
+                steps = np.divide(deltaYValsActive, gradients, out=np.zeros(len(gradients)), where=~flat)
+                largestFrozenDeltaYVal = max(largestFrozenDeltaYVal, float(np.max(deltaYValsActive[flat])))
+
+            # Update semiThicknesses and coordinate estimates, new estimates are
+            # made on the first iteration so the arrays passed in are left as they are
+            if whole:
+
+                semiThicknesses -= steps
+
+                xValsEst = xMeanCamberLinesVals + (semiThicknesses * cosAngles)
+                yValsEst = yMeanCamberLinesVals + (semiThicknesses * sinAngles)
+
+            else:
+
+                newSemiThicknesses = semiThicknessesActive - steps
+                semiThicknesses[rows] = newSemiThicknesses
+
+                xValsEst[rows] = xMeanCamberLineActive + (newSemiThicknesses * cosAnglesActive)
+                yValsEst[rows] = yMeanCamberLineActive + (newSemiThicknesses * sinAnglesActive)
+
+            if telemetry is not None:
+                telemetry.countInterpolations(1, 2 * len(gradients))
+
+            # NaN values are left out like convergeSurfaceVectorized, only looked for when there are any
+            largestDeltaYVal = float(deltaYValsActive.max())
+
+            if math.isnan(largestDeltaYVal):
+                largestDeltaYVal = float(np.max(deltaYValsActive, initial=-math.inf,
+                                                where=~np.isnan(deltaYValsActive)))
+
+            largestDeltaYVal = max(largestDeltaYVal, largestFrozenDeltaYVal)
+
+            if telemetry is not None:
+                residuals.append(largestDeltaYVal)
+
+            # If largest change in a y value is less than threshold
+            # then done converging
+            if largestDeltaYVal < Airfoil.thicknessConvergenceThreshold:
+                converged = True
+                break
+
+            # Points close enough to the surface and frozen points stop moving
+            done = np.abs(deltaYValsActive) < Airfoil.thicknessConvergenceThreshold
+
+            if flat is not None:
+                done |= flat
+
+            if active is None:
+                active = np.flatnonzero(~done)
+            else:
+
+                if whole:
+                    done = done[active]
+
+                iterationCounts[active[done]] = iteration
+                active = active[~done]
+
+            if len(active) == 0:
+                break
+
+        iterationCounts[slice(None) if active is None else active] = iteration
+
+        if telemetry is not None:
+            telemetry.recordSurface(iteration, converged, residuals)
+
+        return xValsEst, yValsEst, iterationCounts
+
+class ProcessCancelled(Exception):
+
+    # Raised by a progress function to stop Airfoil.process early
+    pass
+
+class AirfoilData:
+
+    # Data for an Airfoil
+    # @param: airfoil             = Airfoil this data represents
+    #         xVals               = List of x values
+    #         yUpperVals          = List of y upper values
+    #         yLowerVals          = List of y lower values
+    #         yMeanCamberLineVals = List of y values for MCL
+    #         thicknesses         = List of thickness as percentages
+    #         cambers             = List of camber percentages
+    #         maxThicknessIndex   = index for largest thickness
+    #         maxCamberIndex      = index for largest camber
+    def __init__(self, airfoil, xVals, yUpperVals, yLowerVals, yMeanCamberLineVals, thicknesses, cambers, maxThicknessIndex, maxCamberIndex):
+        self.airfoil             = airfoil
+        self.xVals               = xVals
+        self.yUpperVals          = yUpperVals
+        self.yLowerVals          = yLowerVals
+        self.yMeanCamberLineVals = yMeanCamberLineVals
+        self.thicknesses         = thicknesses
+        self.cambers             = cambers
+        self.maxThicknessIndex   = maxThicknessIndex
+        self.maxCamberIndex      = maxCamberIndex
+
+        # Inner iterations spent on each point for the upper and lower surface
+        # Only filled in by the "newton" processing mode
+        self.upperIterationCounts = None
+        self.lowerIterationCounts = None
+
+        # ProcessTelemetry of the process call that made this data,
+        # only filled in when telemetry was asked for
+        self.telemetry = None
+
+        # Solver state for Airfoil.reprocess, not kept by ResultCache
+        self.warmStart = None
+
+class WarmStart:
+
+    # Converged solver state kept so an edited airfoil can be reprocessed from it
+    # @param: points               = copy of the coordinate points that were processed,
+    #                                or function giving them when they are first used
+    #         chordwiseXVals       = numpy array of x values processing started from
+    #         xMeanCamberLineVals  = numpy array of x values of converged mean camber line
+    #         yMeanCamberLineVals  = numpy array of y values of converged mean camber line
+    #         upperSemiThicknesses = numpy array of upper semi-thicknesses
+    #         lowerSemiThicknesses = numpy array of lower semi-thicknesses, negated
+    def __init__(self, points, chordwiseXVals, xMeanCamberLineVals, yMeanCamberLineVals, upperSemiThicknesses,
+                 lowerSemiThicknesses):
+        self._points              = points
+        self.chordwiseXVals       = chordwiseXVals
+        self.xMeanCamberLineVals  = xMeanCamberLineVals
+        self.yMeanCamberLineVals  = yMeanCamberLineVals
+        self.upperSemiThicknesses = upperSemiThicknesses
+        self.lowerSemiThicknesses = lowerSemiThicknesses
+
+    # Copy of the coordinate points that were processed
+    @property
+    def points(self):
+
+        if callable(self._points):
+            self._points = self._points()
+
+        return self._points
+
+class BatchData:
+
+    # Columnar results of Airfoil.processBatch, one row for each airfoil
+    # Rows of airfoils that could not be processed are NaN and their error is kept
+    # @param: airfoils              = list of Airfoil objects processed together
+    #         numberChordwisePoints = Integer number of points on chord of every airfoil
+    def __init__(self, airfoils, numberChordwisePoints):
+        count = len(airfoils)
+
+        self.airfoils       = airfoils
+        self.chordwiseXVals = np.zeros((count, numberChordwisePoints))
+
+        # Arrays of the values of AirfoilData, filled in by finish
+        self.xVals               = None
+        self.yUpperVals          = None
+        self.yLowerVals          = None
+        self.yMeanCamberLineVals = None
+        self.thicknesses         = None
+        self.cambers             = None
+        self.maxThicknessIndices = None
+        self.maxCamberIndices    = None
+
+        # Mean camber line iterations run, True for airfoils whose mean camber line converged
+        # and an error message or None for each airfoil
+        self.iterations = np.zeros(count, dtype=int)
+        self.converged  = np.zeros(count, dtype=bool)
+        self.errors     = [None] * count
+
+        # Mean camber line x and y values and upper and lower semi-thicknesses
+        # the solver stopped at, kept for warm starts
+        self.solution = None
+
+    def __len__(self):
+
+        return len(self.airfoils)
+
+    # Keep the error of an airfoil that could not be processed
+    # @param: index = index of airfoil
+    #         error = exception raised while processing it
+    def fail(self, index, error):
+
+        if self.errors[index] is None:
+            self.errors[index] = type(error).__name__ + ": " + str(error)
+
+    # Keep a division by zero error, like processing the airfoils on their own would raise
+    # @param: indices = indices of airfoils
+    def failDivision(self, indices):
+
+        for index in indices:
+            self.fail(index, ZeroDivisionError("float division by zero"))
+
+    # Airfoils processed without an error
+    # @return: numpy array of booleans
+    def succeeded(self):
+
+        return np.array([error is None for error in self.errors], dtype=bool)
+
+    # Find final values from converged mean camber lines and semi-thicknesses
+    # like Airfoil.dataFromSolution, with every airfoil in one interpolation
+    # @param: yUpperVals           = numpy array of upper surface y values at chordwiseXVals
+    #         yLowerVals           = numpy array of lower surface y values at chordwiseXVals
+    #         xMeanCamberLineVals  = numpy array of x values of converged mean camber lines
+    #         yMeanCamberLineVals  = numpy array of y values of converged mean camber lines
+    #         upperSemiThicknesses = numpy array of upper semi-thicknesses
+    #         lowerSemiThicknesses = numpy array of lower semi-thicknesses, negated
+    def finish(self, yUpperVals, yLowerVals, xMeanCamberLineVals, yMeanCamberLineVals, upperSemiThicknesses,
+               lowerSemiThicknesses):
+
+        rows = np.arange(len(self))
+
+        # Final values are found at the converged mean camber line x values
+        meanCamberLineCoordinates = StackedCoordinates.fromRows(xMeanCamberLineVals, yMeanCamberLineVals)
+        yFinalMeanCamberLineVals, meanCamberLineFailed = meanCamberLineCoordinates.interpolateMany(
+            rows, xMeanCamberLineVals)
+
+        # Thickness percentages, lower semi-thicknesses are negated
+        thicknessCoordinates = StackedCoordinates.fromRows(xMeanCamberLineVals,
+                                                           upperSemiThicknesses - lowerSemiThicknesses)
+        thicknesses, thicknessFailed = thicknessCoordinates.interpolateMany(rows, xMeanCamberLineVals)
+        thicknesses = np.abs(100 * thicknesses)
+
+        # Camber percentages
+        cambers = 100 * yFinalMeanCamberLineVals
+
+        self.failDivision(rows[meanCamberLineFailed | thicknessFailed])
+
+        failed = ~self.succeeded()
+
+        self.xVals               = xMeanCamberLineVals.copy()
+        self.yUpperVals          = yUpperVals
+        self.yLowerVals          = yLowerVals
+        self.yMeanCamberLineVals = yFinalMeanCamberLineVals
+        self.thicknesses         = thicknesses
+        self.cambers             = cambers
+        self.solution            = (xMeanCamberLineVals, yMeanCamberLineVals, upperSemiThicknesses,
+                                    lowerSemiThicknesses)
+
+        for values in (self.xVals, self.yUpperVals, self.yLowerVals, self.yMeanCamberLineVals, self.thicknesses,
+                       self.cambers) + self.solution:
+            values[failed] = np.nan
+
+        self.maxThicknessIndices = BatchData.firstMaxIndices(thicknesses, failed)
+        self.maxCamberIndices    = BatchData.firstMaxIndices(cambers, failed)
+
+    # Find index of first largest value of each row like Airfoil.firstMaxIndex
+    # @param:  values = numpy array of values (airfoils x points)
+    #          failed = numpy array of booleans, True for rows given index -1
+    # @return: numpy array of indices
+    @staticmethod
+    def firstMaxIndices(values, failed):
+
+        indices = np.argmax(np.where(np.isnan(values), -np.inf, values), axis=1)
+        indices[np.isnan(values[:, 0])] = 0
+        indices[failed] = -1
+
+        return indices
+
+    # AirfoilData of one airfoil, the same as processing it on its own would give
+    # @param:  index = index of airfoil
+    # @return: AirfoilData object, None if the airfoil could not be processed
+    def data(self, index):
+
+        if self.errors[index] is not None:
+            return None
+
+        data = AirfoilData(self.airfoils[index], self.xVals[index].tolist(), self.yUpperVals[index].tolist(),
+                           self.yLowerVals[index].tolist(), self.yMeanCamberLineVals[index].tolist(),
+                           self.thicknesses[index].tolist(), self.cambers[index].tolist(),
+                           int(self.maxThicknessIndices[index]), int(self.maxCamberIndices[index]))
+
+        xMeanCamberLineVals, yMeanCamberLineVals, upperSemiThicknesses, lowerSemiThicknesses = self.solution
+
+        data.warmStart = WarmStart(self.airfoils[index].coordinates.points.copy(), self.chordwiseXVals[index].copy(),
+                                   xMeanCamberLineVals[index].copy(), yMeanCamberLineVals[index].copy(),
+                                   upperSemiThicknesses[index].copy(), lowerSemiThicknesses[index].copy())
+
+        return data
@@ -0,0 +1,652 @@
+from airfoil import Airfoil
+from cache import ResultCache
+from coordinates import Coordinates
+from cst import CST
+import argparse
+import collections
+import csv
+import export
+import functools
+import glob
+import gzip
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import tarfile
+import zipfile
+
+# Columns written for each processed airfoil
+RESULT_FIELDS = ["name", "path", "points", "maxThickness", "maxThicknessX", "maxCamber", "maxCamberX", "error"]
+
+# Endings of archives airfoils are streamed out of
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+# Endings of files written by export that are read besides .dat files
+EXPORT_SUFFIXES = (".dat.gz", ".npz")
+
+# Columns written for each fitted airfoil
+FIT_FIELDS = ["name", "path", "order", "weightsLower", "weightsUpper", "dz", "rmsResidual", "maxResidual",
+              "rmsNormalResidual", "error"]
+
+# Find .dat files from directories, glob patterns and plain file paths
+# @param:  inputs   = list of directories, glob patterns or file paths
+#          archives = True to also find archives and files written by export in directories
+# @return: sorted list of .dat file paths
+def findFiles(inputs, archives=False):
+
+    paths = []
+
+    for pattern in inputs:
+
+        if os.path.isdir(pattern):
+
+            paths.extend(glob.glob(os.path.join(pattern, "*.dat")))
+
+            if archives:
+                paths.extend(path for path in glob.glob(os.path.join(pattern, "*"))
+                             if isArchive(path) or path.lower().endswith(EXPORT_SUFFIXES))
+
+        elif glob.has_magic(pattern):
+            paths.extend(glob.glob(pattern))
+
+        else:
+            paths.append(pattern)
+
+    return sorted(set(paths))
+
+# Name of an airfoil from its path
+# @param:  path = path of .dat file, which may be compressed
+# @return: name
+def airfoilName(path):
+
+    name = os.path.basename(path)
+
+    if name.lower().endswith(".gz"):
+        name = name[:-3]
+
+    return os.path.splitext(name)[0]
+
+# Load and process one .dat file
+# Errors are caught so one malformed file does not stop a batch
+# @param:  path                  = path of .dat file
+#          numberChordwisePoints = number of points wanted on chord,
+#                                  None to use the number of coordinates
+#          mode                  = processing mode passed to Airfoil.process
+#          cacheDirectory        = folder of a ResultCache to reuse results from, None for no cache,
+#                                  one ResultCache.shared is used for it in each process
+#          cacheBytes            = largest size of the ResultCache in bytes
+#          spacing               = spacing passed to Airfoil.process
+#          coordinates           = Coordinates already read from path, None to read the file
+# @return: dictionary with a value for each of RESULT_FIELDS
+def processFile(path, numberChordwisePoints=None, mode="vectorized", cacheDirectory=None,
+                cacheBytes=64 * 1024 * 1024, spacing="uniform", coordinates=None):
+
+    name = airfoilName(path)
+
+    result = dict.fromkeys(RESULT_FIELDS)
+    result["name"] = name
+    result["path"] = path
+
+    try:
+
+        if coordinates is None:
+            coordinates = Airfoil.readCoordinates(path)
+
+        airfoil = Airfoil(name, coordinates)
+
+        points = numberChordwisePoints
+
+        if points is None:
+            points = len(airfoil.coordinates.xVals)
+
+        if cacheDirectory is None:
+            data = Airfoil.process(airfoil, points, mode, spacing=spacing)
+        else:
+            data = ResultCache.shared(cacheDirectory, cacheBytes).process(airfoil, points, mode, spacing=spacing)
+
+        result["points"] = points
+        result["maxThickness"] = data.thicknesses[data.maxThicknessIndex]
+        result["maxThicknessX"] = data.xVals[data.maxThicknessIndex]
+        result["maxCamber"] = data.cambers[data.maxCamberIndex]
+        result["maxCamberX"] = data.xVals[data.maxCamberIndex]
+
+    except Exception as error:
+
+        result["error"] = type(error).__name__ + ": " + str(error)
+
+    return result
+
+# Fit CST weights to one .dat file
+# Errors are caught so one malformed file does not stop a batch
+# @param:  path        = path of .dat file
+#          order       = order of Bernstein polynomials passed to CST.fit
+#          refine      = number of refinement iterations passed to CST.fit
+#          coordinates = Coordinates already read from path, None to read the file
+# @return: dictionary with a value for each of FIT_FIELDS
+def fitFile(path, order, refine=0, coordinates=None):
+
+    result = dict.fromkeys(FIT_FIELDS)
+    result["name"] = airfoilName(path)
+    result["path"] = path
+    result["order"] = order
+
+    try:
+
+        if coordinates is None:
+            coordinates = Airfoil.readCoordinates(path)
+
+        fit = CST.fit(coordinates, order, refine)
+
+        result["weightsLower"] = fit.weightsLower
+        result["weightsUpper"] = fit.weightsUpper
+        result["dz"] = fit.dz
+        result["rmsResidual"] = fit.rmsResidual
+        result["maxResidual"] = fit.maxResidual
+        result["rmsNormalResidual"] = fit.rmsNormalResidual
+
+    except Exception as error:
+
+        result["error"] = type(error).__name__ + ": " + str(error)
+
+    return result
+
+# Read one .dat file, catching errors so one malformed file does not stop a batch
+# @param:  path = path of .dat file
+# @return: path, Coordinates or None, error message or None
+def loadFile(path):
+
+    try:
+        return path, Airfoil.readCoordinates(path), None
+    except (OSError, ValueError) as error:
+        return path, None, type(error).__name__ + ": " + str(error)
+
+# Group lines of text into the lines of each airfoil
+# Text after coordinates starts the next airfoil once more coordinates follow it,
+# text at the end is kept with the last airfoil
+# @param:  lines = iterable of lines as bytes
+# @return: generator of lists of lines
+def _airfoilBlocks(lines):
+
+    block = []
+    hasNumbers = False
+
+    # Lines of text after coordinates, not yet known to start another airfoil
+    pending = None
+
+    for line in lines:
+
+        isNumber = Airfoil._isNumberLine(line)
+
+        if pending is not None:
+
+            if not isNumber:
+                pending.append(line)
+                continue
+
+            yield block
+            block = pending
+            pending = None
+
+        elif hasNumbers and not isNumber and line.strip():
+
+            pending = [line]
+            continue
+
+        hasNumbers = hasNumbers or isNumber
+        block.append(line)
+
+    if pending is not None:
+        block.extend(pending)
+
+    if block:
+        yield block
+
+# Read airfoils from lines of text holding one or more airfoils one after another
+# Text holding one airfoil gives the same result as Airfoil.parseCoordinates,
+# with more than one each airfoil is named after its first line of text
+# @param:  lines  = iterable of lines as bytes
+#          source = path of the text, airfoils in it are given paths source/name.dat
+# @return: generator of (path, Coordinates or None, error message or None)
+def splitAirfoils(lines, source):
+
+    def parse(block, path):
+
+        try:
+            return path, Airfoil.parseCoordinates(b"".join(block), path), None
+        except ValueError as error:
+            return path, None, type(error).__name__ + ": " + str(error)
+
+    blocks = _airfoilBlocks(lines)
+
+    # The first airfoil is held back until it is known whether another follows
+    first = next(blocks, [])
+    second = next(blocks, None)
+
+    if second is None:
+        yield parse(first, source)
+        return
+
+    for count, block in enumerate(itertools.chain((first, second), blocks)):
+
+        title = block[0].strip().decode(errors="replace") if not Airfoil._isNumberLine(block[0]) else ""
+        name = title.replace("/", "_").replace("\\", "_") or "airfoil" + str(count)
+
+        yield parse(block, source + "/" + name + ".dat")
+
+# Check if a path is an archive of airfoils
+# @param:  path = file path
+# @return: True for zip and tar archives
+def isArchive(path):
+
+    return path.lower().endswith(ARCHIVE_SUFFIXES)
+
+# Read the .dat members of a zip or tar archive without extracting it
+# One member is read at a time, tar archives are read front to back so
+# compressed tar archives are never seeked
+# @param:  path = path of archive
+# @return: generator of (path/member, contents as bytes)
+def archiveMembers(path):
+
+    if path.lower().endswith(".zip"):
+
+        with zipfile.ZipFile(path) as archive:
+
+            for info in archive.infolist():
+
+                if not info.is_dir() and info.filename.lower().endswith(".dat"):
+                    yield path + "/" + info.filename, archive.read(info)
+
+        return
+
+    with tarfile.open(path, "r|*") as archive:
+
+        for info in archive:
+
+            if info.isfile() and info.name.lower().endswith(".dat"):
+                yield path + "/" + info.name, archive.extractfile(info).read()
+
+# Find the pieces of inputs to parse, without parsing them
+# Files are left to be read by whoever parses them and archive members are read here,
+# so the parsing can be spread over worker processes by loadSource
+# @param:  inputs = list of directories, glob patterns, .dat files or archives,
+#                   directories are searched for .dat files and archives
+# @return: generator of (path, contents as bytes or None to read path, error message or None)
+def readSources(inputs):
+
+    for path in findFiles(inputs, archives=True):
+
+        if not isArchive(path):
+            yield path, None, None
+            continue
+
+        try:
+
+            for memberPath, contents in archiveMembers(path):
+                yield memberPath, contents, None
+
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile, tarfile.TarError) as error:
+
+            yield path, None, type(error).__name__ + ": " + str(error)
+
+# Parse the airfoils of one source from readSources
+# Reads files holding airfoils one after another, gzip compressed .dat files and .npz files written by export
+# Errors are caught so one malformed airfoil does not stop a batch
+# @param:  source = (path, contents as bytes or None to read path, error message or None)
+# @return: generator of (path, Coordinates or None, error message or None)
+def loadSource(source):
+
+    path, contents, error = source
+
+    if error is not None:
+        yield path, None, error
+        return
+
+    try:
+
+        if contents is not None:
+
+            yield from splitAirfoils(contents.splitlines(keepends=True), path)
+
+        elif path.lower().endswith(".npz"):
+
+            for name, points in export.loadNpz(path):
+                yield path + "/" + name + ".dat", Coordinates(points[0], points[1]), None
+
+        elif path.lower().endswith(".gz"):
+
+            with gzip.open(path, "rb") as file:
+                yield from splitAirfoils(file, path)
+
+        else:
+
+            with open(path, "rb") as file:
+                yield from splitAirfoils(file, path)
+
+    except (OSError, KeyError, ValueError) as error:
+
+        yield path, None, type(error).__name__ + ": " + str(error)
+
+# Stream airfoils from files, archives and files of airfoils one after another,
+# including gzip compressed .dat files and .npz files written by export
+# Nothing is read until it is asked for, so memory stays flat on large archives
+# Errors are caught so one malformed airfoil does not stop a batch
+# @param:  inputs = list of directories, glob patterns, .dat files or archives,
+#                   directories are searched for .dat files and archives
+# @return: generator of (path, Coordinates or None, error message or None)
+def readInputs(inputs):
+
+    for source in readSources(inputs):
+        yield from loadSource(source)
+
+# Stream Airfoil objects from files, archives and files of airfoils one after another
+# @param:  inputs = list of directories, glob patterns, .dat files or archives, see readInputs
+#          errors = list (path, error message) of airfoils that could not be read are added to,
+#                   None to skip them silently
+# @return: generator of Airfoil objects
+def streamAirfoils(inputs, errors=None):
+
+    for path, coordinates, error in readInputs(inputs):
+
+        if error is None:
+            yield Airfoil(airfoilName(path), coordinates)
+
+        elif errors is not None:
+            errors.append((path, error))
+
+# Call a function on each item of a chunk, for worker processes
+# @param:  args = function, list of items
+# @return: list of results
+def _mapChunk(args):
+
+    function, chunk = args
+
+    return [function(item) for item in chunk]
+
+# Call a function on items on a process pool, reading ahead a bounded number of items
+# Unlike Pool.imap only readAhead chunks are taken from items before their results are
+# used, so a stream of airfoils is never read into memory all at once
+# Results are yielded as soon as each chunk finishes, in whatever order workers finish them, unless ordered
+# @param:  function  = function of one item, must be picklable
+#          items     = iterable of items
+#          workers   = number of worker processes, None for one per CPU,
+#                      1 to call function in this process
+#          chunkSize = number of items handed to a worker at a time
+#          readAhead = most chunks taken from items and not yet yielded, None for 4 per worker
+#          ordered   = True to yield results in the order of items
+# @return: generator of results
+def mapReadAhead(function, items, workers=None, chunkSize=1, readAhead=None, ordered=False):
+
+    if workers == 1:
+
+        for item in items:
+            yield function(item)
+
+        return
+
+    if readAhead is None:
+        readAhead = 4 * (workers or os.cpu_count() or 1)
+
+    items = iter(items)
+
+    # Chunks in order for ordered results, otherwise finished chunks in the order they finish
+    pending = collections.deque()
+    finished = queue.Queue()
+
+    with multiprocessing.Pool(workers) as pool:
+
+        running = 0
+        exhausted = False
+
+        while True:
+
+            while not exhausted and running < readAhead:
+
+                chunk = list(itertools.islice(items, chunkSize))
+
+                if not chunk:
+                    exhausted = True
+                    break
+
+                result = pool.apply_async(_mapChunk, ((function, chunk),),
+                                          callback=None if ordered else finished.put,
+                                          error_callback=None if ordered else finished.put)
+                running += 1
+
+                if ordered:
+                    pending.append(result)
+
+            if running == 0:
+                break
+
+            running -= 1
+
+            if ordered:
+                yield from pending.popleft().get()
+                continue
+
+            results = finished.get()
+
+            if isinstance(results, BaseException):
+                raise results
+
+            yield from results
+
+# Process a loaded airfoil, passing on read errors
+# @param:  loaded   = (path, Coordinates or None, error message or None)
+#          settings = keyword arguments of processFile
+# @return: dictionary with a value for each of RESULT_FIELDS
+def _processLoaded(loaded, **settings):
+
+    path, coordinates, error = loaded
+
+    if error is not None:
+        return dict(dict.fromkeys(RESULT_FIELDS), name=airfoilName(path), path=path,
+                    error=error)
+
+    return processFile(path, coordinates=coordinates, **settings)
+
+# Process a stream of loaded airfoils on a process pool with bounded read-ahead
+# @param:  loaded                = iterable of (path, Coordinates or None, error message or None),
+#                                  like readInputs gives
+#          numberChordwisePoints = number of points wanted on chord,
+#                                  None to use the number of coordinates
+#          mode                  = processing mode passed to Airfoil.process
+#          workers               = number of worker processes, None for one per CPU,
+#                                  1 to process in this process
+#          chunkSize             = number of airfoils handed to a worker at a time
+#          readAhead             = most chunks read ahead of results, see mapReadAhead
+#          cacheDirectory        = folder of a ResultCache to reuse results from, None for no cache
+#          cacheBytes            = largest size of the ResultCache in bytes
+#          spacing               = spacing passed to Airfoil.process
+# @return: generator of result dictionaries, as soon as each one finishes
+def processStream(loaded, numberChordwisePoints=None, mode="vectorized", workers=None, chunkSize=1, readAhead=None,
+                  cacheDirectory=None, cacheBytes=64 * 1024 * 1024, spacing="uniform"):
+
+    function = functools.partial(_processLoaded, numberChordwisePoints=numberChordwisePoints, mode=mode,
+                                 cacheDirectory=cacheDirectory, cacheBytes=cacheBytes, spacing=spacing)
+
+    return mapReadAhead(function, loaded, workers, chunkSize, readAhead)
+
+# Parse and process one source, for worker processes
+# @param:  source   = source from readSources
+#          settings = keyword arguments of processFile
+# @return: list of result dictionaries
+def _processSource(source, **settings):
+
+    return [_processLoaded(loaded, **settings) for loaded in loadSource(source)]
+
+# Parse and process sources from readSources on a process pool with bounded read-ahead
+# Files are parsed by the workers, so parsing is spread over them instead of done here
+# @param:  sources               = iterable of sources, like readSources gives
+#          numberChordwisePoints = number of points wanted on chord,
+#                                  None to use the number of coordinates
+#          mode                  = processing mode passed to Airfoil.process
+#          workers               = number of worker processes, None for one per CPU,
+#                                  1 to process in this process
+#          chunkSize             = number of sources handed to a worker at a time
+#          readAhead             = most chunks read ahead of results, see mapReadAhead
+#          cacheDirectory        = folder of a ResultCache to reuse results from, None for no cache
+#          cacheBytes            = largest size of the ResultCache in bytes
+#          spacing               = spacing passed to Airfoil.process
+# @return: generator of result dictionaries, as soon as each source finishes
+def processSources(sources, numberChordwisePoints=None, mode="vectorized", workers=None, chunkSize=1,
+                   readAhead=None, cacheDirectory=None, cacheBytes=64 * 1024 * 1024, spacing="uniform"):
+
+    function = functools.partial(_processSource, numberChordwisePoints=numberChordwisePoints, mode=mode,
+                                 cacheDirectory=cacheDirectory, cacheBytes=cacheBytes, spacing=spacing)
+
+    for results in mapReadAhead(function, sources, workers, chunkSize, readAhead):
+        yield from results
+
+# Fit a loaded airfoil, passing on read errors
+# @param:  loaded = (path, Coordinates or None, error message or None)
+#          order  = order of Bernstein polynomials passed to CST.fit
+#          refine = number of refinement iterations passed to CST.fit
+# @return: dictionary with a value for each of FIT_FIELDS
+def _fitLoaded(loaded, order, refine=0):
+
+    path, coordinates, error = loaded
+
+    if error is not None:
+        return dict(dict.fromkeys(FIT_FIELDS), name=airfoilName(path), path=path,
+                    order=order, error=error)
+
+    return fitFile(path, order, refine, coordinates)
+
+# Parse and fit one source, for worker processes
+# @param:  source = source from readSources
+#          order  = order of Bernstein polynomials passed to CST.fit
+#          refine = number of refinement iterations passed to CST.fit
+# @return: list of result dictionaries
+def _fitSource(source, order, refine=0):
+
+    return [_fitLoaded(loaded, order, refine) for loaded in loadSource(source)]
+
+# Parse sources from readSources and fit CST weights on a process pool with bounded read-ahead
+# @param:  sources   = iterable of sources, like readSources gives
+#          order     = order of Bernstein polynomials passed to CST.fit
+#          refine    = number of refinement iterations passed to CST.fit
+#          workers   = number of worker processes, None for one per CPU,
+#                      1 to fit in this process
+#          chunkSize = number of sources handed to a worker at a time
+#          readAhead = most chunks read ahead of results, see mapReadAhead
+# @return: generator of result dictionaries, as soon as each source finishes
+def fitSources(sources, order, refine=0, workers=None, chunkSize=1, readAhead=None):
+
+    for results in mapReadAhead(functools.partial(_fitSource, order=order, refine=refine), sources, workers,
+                                chunkSize, readAhead):
+        yield from results
+
+# Write results to a file as they arrive
+# Lists of weights are written space separated in CSV
+# @param:  results = iterable of result dictionaries
+#          file    = open text file to write to
+#          format  = "csv", "json" or "jsonl" for one JSON object per line
+#          fields  = columns of results, RESULT_FIELDS or FIT_FIELDS
+# @return: number of results that had an error
+def writeResults(results, file, format="csv", fields=RESULT_FIELDS):
+
+    failures = 0
+
+    if format == "csv":
+
+        writer = csv.DictWriter(file, fieldnames=fields)
+        writer.writeheader()
+
+    elif format == "json":
+
+        file.write("[")
+
+    elif format != "jsonl":
+
+        raise ValueError("Unknown output format: " + str(format))
+
+    for count, result in enumerate(results):
+
+        if result["error"] is not None:
+            failures += 1
+            print(result["path"] + ": " + result["error"], file=sys.stderr)
+
+        if format == "csv":
+            writer.writerow({field: " ".join(map(repr, value)) if isinstance(value, list) else value
+                             for field, value in result.items()})
+
+        elif format == "json":
+            file.write(("," if count > 0 else "") + "\n" + json.dumps(result))
+
+        else:
+            file.write(json.dumps(result) + "\n")
+
+        file.flush()
+
+    if format == "json":
+        file.write("\n]\n")
+
+    return failures
+
+# Headless command for processing a library of airfoils
+# @param:  arguments = list of command line arguments
+# @return: exit code, 1 if any file failed
+def main(arguments=None):
+
+    parser = argparse.ArgumentParser(description="Process airfoil .dat files and archives in parallel, "
+                                                 "or fit CST weights to them with --fit.")
+    parser.add_argument("inputs", nargs="+", help="directories, glob patterns, .dat files or zip and tar archives")
+    parser.add_argument("-o", "--output", help="file to write results to, standard output if not given")
+    parser.add_argument("-f", "--format", choices=["csv", "json", "jsonl"], default="csv")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes, default one per CPU")
+    parser.add_argument("-c", "--chunk-size", type=int, default=1, help="airfoils handed to a worker at a time")
+    parser.add_argument("--read-ahead", type=int, default=None,
+                        help="most chunks read ahead of written results, default 4 per worker")
+    parser.add_argument("-p", "--points", type=int, default=None,
+                        help="chordwise points, default the number of coordinates in each file")
+    parser.add_argument("-m", "--mode", choices=["vectorized", "newton", "scalar"], default="vectorized")
+    parser.add_argument("-s", "--spacing", choices=["uniform", "cosine", "halfcosine", "adaptive"],
+                        default="uniform", help="how chordwise points are spread")
+    parser.add_argument("--cache", help="folder to cache processed results in")
+    parser.add_argument("--cache-size", type=int, default=64, help="largest cache size in megabytes")
+    parser.add_argument("--fit", type=int, metavar="ORDER", help="fit CST weights of this order instead of processing")
+    parser.add_argument("--refine", type=int, default=0, help="refinement iterations for --fit")
+    args = parser.parse_args(arguments)
+
+    # Files are parsed by the workers, archives are read here a member at a time
+    sources = readSources(args.inputs)
+
+    if args.fit is None:
+        fields = RESULT_FIELDS
+        results = processSources(sources, args.points, args.mode, args.workers, args.chunk_size, args.read_ahead,
+                                 args.cache, args.cache_size * 1024 * 1024, args.spacing)
+    else:
+        fields = FIT_FIELDS
+        results = fitSources(sources, args.fit, args.refine, args.workers, args.chunk_size, args.read_ahead)
+
+    count = 0
+
+    def counted(results):
+
+        nonlocal count
+
+        for result in results:
+            count += 1
+            yield result
+
+    results = counted(results)
+
+    if args.output is None:
+
+        failures = writeResults(results, sys.stdout, args.format, fields)
+
+    else:
+
+        with open(args.output, "w", newline="") as file:
+            failures = writeResults(results, file, args.format, fields)
+
+    print("Processed " + str(count) + " airfoils, " + str(failures) + " failed", file=sys.stderr)
+
+    return 1 if failures > 0 else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
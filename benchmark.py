@@ -0,0 +1,491 @@
+from airfoil import Airfoil
+from cst import CST
+from surface import SurfaceModel
+import argparse
+import contextlib
+import glob
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+# Version of the saved results format
+BENCHMARK_VERSION = 1
+
+# Numbers of coordinates in synthetic airfoils, must be even so CST.genCoordinates has a zero x value
+DEFAULT_SIZES = [50, 100, 200, 500, 1000, 2000, 5000]
+
+# CST weights that synthetic airfoils are randomly varied around
+BASE_WEIGHTS_LOWER = [0.102333995082718, 0.138209581186333, 0.049306525213022, -0.082982724998046]
+BASE_WEIGHTS_UPPER = [0.164917727527345, 0.320594819913800, 0.203199258463692, 0.297424182497028]
+
+# Folder of bundled airfoils used as real world cases
+AIRFOIL_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Airfoil")
+
+# Chordwise points of processBatch, the resolution airfoils are screened at
+SCREENING_POINTS = 100
+
+# Number of CST airfoils processed together by CST.processBatch
+CST_BATCH_SIZE = 64
+
+# Percentiles reported for latency
+PERCENTILES = [50, 90, 99]
+
+# Run a block with a different working directory, Airfoil loads and saves relative to it
+# @param: path = folder to work in
+@contextlib.contextmanager
+def workingDirectory(path):
+
+    previous = os.getcwd()
+    os.chdir(path)
+
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+# Create a synthetic airfoil with CST weights randomly varied from the base weights
+# The same size and seed always give the same airfoil
+# @param:  size = number of coordinates, even
+#          seed = seed for random weights
+# @return: Airfoil
+def syntheticAirfoil(size, seed=0):
+
+    generator = np.random.default_rng([seed, size])
+
+    weightsLower = (np.array(BASE_WEIGHTS_LOWER) + generator.normal(0, 0.01, len(BASE_WEIGHTS_LOWER))).tolist()
+    weightsUpper = (np.array(BASE_WEIGHTS_UPPER) + generator.normal(0, 0.01, len(BASE_WEIGHTS_UPPER))).tolist()
+
+    return Airfoil("synthetic" + str(size), CST.genCoordinates(weightsLower, weightsUpper, 0, size))
+
+# Build the arguments of the first Airfoil.convergeSurface call of Airfoil.processScalar
+# for the upper surface, so convergeSurface can be timed on its own
+# @param:  airfoil               = Airfoil to build the estimates for
+#          numberChordwisePoints = Integer number of points wanted on chord
+# @return: tuple of arguments for Airfoil.convergeSurface
+def convergeSurfaceArguments(airfoil, numberChordwisePoints):
+
+    upperCoordinatesRef, lowerCoordinatesRef = Airfoil.splitSurfaces(airfoil.coordinates)
+
+    xVals = np.linspace(0, 1, numberChordwisePoints)
+    yUpperVals = upperCoordinatesRef.interpolateMany(xVals)
+    yLowerVals = lowerCoordinatesRef.interpolateMany(xVals)
+
+    yMeanCamberLineVals = (yUpperVals + yLowerVals) / 2
+    semiThicknesses = (yUpperVals - yLowerVals) / 2
+
+    angles = np.full(numberChordwisePoints, math.pi / 2)
+    angles[1:-1] = np.arctan((yMeanCamberLineVals[2:] - yMeanCamberLineVals[:-2]) / (xVals[2:] - xVals[:-2])) + (math.pi / 2)
+
+    xEst = xVals + semiThicknesses * np.cos(angles)
+    yEst = yMeanCamberLineVals + semiThicknesses * np.sin(angles)
+
+    xEst[0], yEst[0], xEst[-1], yEst[-1] = 0, 0, 1, 0
+
+    return (xEst.tolist(), yEst.tolist(), upperCoordinatesRef, angles.tolist(), semiThicknesses.tolist(),
+            xVals.tolist(), yMeanCamberLineVals.tolist())
+
+# Time an operation until enough samples are taken or the time budget runs out
+# @param:  function      = function to time, called with the arguments from setup
+#          setup         = function returning a tuple of arguments, not timed, None for no arguments
+#          calls         = number of operations done by one call of function
+#          minSamples    = fewest samples to take
+#          maxSamples    = most samples to take
+#          budget        = seconds to spend sampling once minSamples are taken
+# @return: list of seconds per operation, one per sample
+def timeOperation(function, setup=None, calls=1, minSamples=5, maxSamples=200, budget=1.0):
+
+    samples = []
+    start = time.perf_counter()
+
+    while len(samples) < maxSamples:
+
+        if len(samples) >= minSamples and time.perf_counter() - start > budget:
+            break
+
+        arguments = setup() if setup is not None else ()
+
+        before = time.perf_counter()
+        function(*arguments)
+        samples.append((time.perf_counter() - before) / calls)
+
+    return samples
+
+# Largest amount of memory allocated by Python while running an operation once
+# @param:  function = function to measure
+#          setup    = function returning a tuple of arguments, not measured, None for no arguments
+# @return: peak bytes allocated
+def peakMemory(function, setup=None):
+
+    arguments = setup() if setup is not None else ()
+
+    tracemalloc.start()
+
+    try:
+        function(*arguments)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+# Summarize samples of one operation
+# @param:  operation = name of operation
+#          case      = name of case within operation
+#          points    = number of coordinates in the case
+#          samples   = list of seconds per operation
+#          peakBytes = peak bytes allocated, None if not measured
+# @return: dictionary of results
+def summarize(operation, case, points, samples, peakBytes):
+
+    samples = np.array(samples)
+
+    result = {
+        "operation": operation,
+        "case":      case,
+        "points":    points,
+        "samples":   len(samples),
+        "mean":      float(samples.mean()),
+        "min":       float(samples.min()),
+    }
+
+    for percentile in PERCENTILES:
+        result["p" + str(percentile)] = float(np.percentile(samples, percentile))
+
+    result["throughput"] = 1 / result["p50"]
+    result["pointsPerSecond"] = points / result["p50"]
+    result["peakBytes"] = peakBytes
+
+    return result
+
+# Cases for each operation
+# Every case is (operation, case name, number of points, function, setup, calls per sample)
+# @param:  sizes   = list of numbers of coordinates of synthetic airfoils
+#          seed    = seed for synthetic airfoils and random inputs
+#          folder  = temporary folder with an Airfoil subfolder for load and save cases
+# @return: generator of cases
+def benchmarkCases(sizes, seed, folder):
+
+    airfoils = [syntheticAirfoil(size, seed) for size in sizes]
+    realAirfoils = []
+
+    for path in sorted(glob.glob(os.path.join(AIRFOIL_FOLDER, "*.dat"))):
+
+        name = os.path.splitext(os.path.basename(path))[0]
+
+        try:
+            realAirfoils.append(Airfoil(name, Airfoil.readCoordinates(path)))
+        except (OSError, ValueError):
+            continue
+
+        shutil.copy(path, os.path.join(folder, "Airfoil"))
+
+    for airfoil in airfoils:
+        airfoil.saveCoordinates()
+
+    generator = np.random.default_rng(seed)
+
+    # Loading from .dat files
+    for airfoil in airfoils + realAirfoils:
+        yield ("loadCoordinates", airfoil.name, len(airfoil.coordinates),
+               lambda name=airfoil.name: Airfoil.loadCoordinates(name), None, 1)
+
+    # Single interpolations on the upper surface, timed in groups of calls
+    for airfoil in airfoils:
+
+        upperCoordinatesRef = Airfoil.splitSurfaces(airfoil.coordinates)[0]
+        targets = generator.uniform(0, 1, 1000).tolist()
+
+        def interpolateTargets(coordinatesRef=upperCoordinatesRef, targets=targets):
+            for target in targets:
+                coordinatesRef.interpolate(target)
+
+        yield ("interpolate", airfoil.name, len(airfoil.coordinates), interpolateTargets, None, len(targets))
+
+    # Building a surface model, then querying it with the same targets in one call
+    for airfoil in airfoils:
+
+        model = SurfaceModel(airfoil.coordinates)
+        targets = generator.uniform(0, 1, 1000)
+
+        yield ("surfaceModel", airfoil.name, len(airfoil.coordinates),
+               lambda coordinates=airfoil.coordinates: SurfaceModel(coordinates), None, 1)
+        yield ("surfaceValueAt", airfoil.name, len(airfoil.coordinates),
+               lambda model=model, targets=targets: model.valueAt(targets), None, len(targets))
+
+    # Processing with the same number of chordwise points as coordinates
+    for airfoil in airfoils + realAirfoils:
+        yield ("process", airfoil.name, len(airfoil.coordinates),
+               lambda airfoil=airfoil: Airfoil.process(airfoil, len(airfoil.coordinates)), None, 1)
+
+    # Processing every real airfoil together, timed per airfoil to compare with process
+    if realAirfoils:
+        yield ("processBatch", "real" + str(len(realAirfoils)), SCREENING_POINTS,
+               lambda: Airfoil.processBatch(realAirfoils, SCREENING_POINTS), None, len(realAirfoils))
+
+    # Converging one surface point by point, arguments are copied for each sample as they are changed
+    for airfoil in airfoils:
+
+        arguments = convergeSurfaceArguments(airfoil, len(airfoil.coordinates))
+
+        def copyArguments(arguments=arguments):
+            return tuple(list(argument) if isinstance(argument, list) else argument for argument in arguments)
+
+        yield ("convergeSurface", airfoil.name, len(airfoil.coordinates), Airfoil.convergeSurface, copyArguments, 1)
+
+    # CST generation with new random weights each sample
+    for size in sizes:
+
+        def randomWeights():
+            return ((np.array(BASE_WEIGHTS_LOWER) + generator.normal(0, 0.01, 4)).tolist(),
+                    (np.array(BASE_WEIGHTS_UPPER) + generator.normal(0, 0.01, 4)).tolist())
+
+        yield ("genCoordinates", "synthetic" + str(size), size,
+               lambda weightsLower, weightsUpper, size=size: CST.genCoordinates(weightsLower, weightsUpper, 0, size),
+               randomWeights, 1)
+
+        xVals = np.linspace(0, 1, size).tolist()
+
+        yield ("classShape", "synthetic" + str(size), size,
+               lambda weightsLower, weightsUpper, xVals=xVals: CST.classShape(weightsUpper, 0, xVals),
+               randomWeights, 1)
+
+        # Processing straight from weights, comparable to process on the synthetic airfoil of the same size
+        yield ("cstProcess", "synthetic" + str(size), size,
+               lambda weightsLower, weightsUpper, size=size: CST.process(weightsLower, weightsUpper, 0, size),
+               randomWeights, 1)
+
+        def randomWeightsBatch():
+            return (np.array(BASE_WEIGHTS_LOWER) + generator.normal(0, 0.01, (CST_BATCH_SIZE, 4)),
+                    np.array(BASE_WEIGHTS_UPPER) + generator.normal(0, 0.01, (CST_BATCH_SIZE, 4)))
+
+        # Processing many weight sets together, timed per airfoil to compare with cstProcess
+        yield ("cstProcessBatch", "synthetic" + str(size), size,
+               lambda weightsLower, weightsUpper, size=size: CST.processBatch(weightsLower, weightsUpper, 0, size),
+               randomWeightsBatch, CST_BATCH_SIZE)
+
+    # Saving to .dat files
+    for airfoil in airfoils:
+        yield ("saveCoordinates", airfoil.name, len(airfoil.coordinates), airfoil.saveCoordinates, None, 1)
+
+    # Turning coordinates into canvas points, only when the GUI can be imported
+    try:
+        from main import canvasPoints
+    except ImportError:
+        print("Skipping canvasPoints, tkinter is not available", file=sys.stderr)
+        return
+
+    for airfoil in airfoils:
+
+        closedPoints = airfoil.coordinates.closedPoints()
+
+        yield ("canvasPoints", airfoil.name, len(airfoil.coordinates),
+               lambda closedPoints=closedPoints: canvasPoints(closedPoints[0], closedPoints[1]), None, 1)
+
+# Fit how time grows with number of points for each operation
+# @param:  results = list of result dictionaries
+# @return: dictionary of operation to points, median latencies and exponent of the fitted power law
+def scaling(results):
+
+    curves = {}
+
+    for result in results:
+
+        if result["case"].startswith("synthetic"):
+            curve = curves.setdefault(result["operation"], {"points": [], "p50": []})
+            curve["points"].append(result["points"])
+            curve["p50"].append(result["p50"])
+
+    for curve in curves.values():
+
+        if len(curve["points"]) > 1:
+            curve["exponent"] = float(np.polyfit(np.log(curve["points"]), np.log(curve["p50"]), 1)[0])
+        else:
+            curve["exponent"] = None
+
+    return curves
+
+# Run every benchmark
+# @param:  sizes      = list of numbers of coordinates of synthetic airfoils
+#          seed       = seed for synthetic airfoils and random inputs
+#          budget     = seconds to spend sampling each case
+#          operations = list of operations to run, None for all
+#          memory     = True to measure peak memory of each case
+#          report     = function called with each result as it finishes, None for no reporting
+# @return: dictionary of results, ready to be saved as JSON
+def runBenchmarks(sizes=DEFAULT_SIZES, seed=0, budget=1.0, operations=None, memory=True, report=None):
+
+    results = []
+    folder = tempfile.mkdtemp()
+
+    try:
+
+        os.mkdir(os.path.join(folder, "Airfoil"))
+
+        with workingDirectory(folder):
+
+            for operation, case, points, function, setup, calls in benchmarkCases(sizes, seed, folder):
+
+                if operations is not None and operation not in operations:
+                    continue
+
+                samples = timeOperation(function, setup, calls, budget=budget)
+                peakBytes = peakMemory(function, setup) if memory else None
+
+                result = summarize(operation, case, points, samples, peakBytes)
+                results.append(result)
+
+                if report is not None:
+                    report(result)
+
+    finally:
+
+        shutil.rmtree(folder, ignore_errors=True)
+
+    return {
+        "version":  BENCHMARK_VERSION,
+        "seed":     seed,
+        "sizes":    list(sizes),
+        "python":   platform.python_version(),
+        "numpy":    np.__version__,
+        "machine":  platform.machine(),
+        "results":  results,
+        "scaling":  scaling(results),
+    }
+
+# Compare median latencies of two benchmark runs
+# @param:  baseline  = dictionary of results from runBenchmarks
+#          current   = dictionary of results from runBenchmarks
+#          threshold = fraction slower than the baseline counted as a regression
+# @return: list of (operation, case, baseline seconds, current seconds, ratio, status),
+#          status is "regression", "improvement", "ok", "new" or "missing"
+def compareResults(baseline, current, threshold=0.2):
+
+    baselineResults = {(result["operation"], result["case"]): result for result in baseline["results"]}
+    currentResults = {(result["operation"], result["case"]): result for result in current["results"]}
+
+    comparisons = []
+
+    for key, result in currentResults.items():
+
+        if key not in baselineResults:
+            comparisons.append(key + (None, result["p50"], None, "new"))
+            continue
+
+        ratio = result["p50"] / baselineResults[key]["p50"]
+
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 / (1 + threshold):
+            status = "improvement"
+        else:
+            status = "ok"
+
+        comparisons.append(key + (baselineResults[key]["p50"], result["p50"], ratio, status))
+
+    for key, result in baselineResults.items():
+
+        if key not in currentResults:
+            comparisons.append(key + (result["p50"], None, None, "missing"))
+
+    return comparisons
+
+# Format seconds with a readable unit
+# @param:  seconds = time in seconds, None for no time
+# @return: string
+def formatTime(seconds):
+
+    if seconds is None:
+        return "-"
+
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return "{0:.3g} {1}".format(seconds / scale, unit)
+
+    return "{0:.3g} ns".format(seconds / 1e-9)
+
+# Print one result as a table row
+# @param: result = result dictionary
+def printResult(result):
+
+    memory = "-" if result["peakBytes"] is None else "{0:.1f} KiB".format(result["peakBytes"] / 1024)
+
+    print("{0:<16} {1:<20} {2:>6} {3:>10} {4:>10} {5:>10} {6:>12.0f}/s {7:>12}".format(
+        result["operation"], result["case"], result["points"], formatTime(result["p50"]),
+        formatTime(result["p90"]), formatTime(result["p99"]), result["throughput"], memory), flush=True)
+
+# Benchmark command, optionally saving a baseline or comparing against one
+# @param:  arguments = list of command line arguments
+# @return: exit code, 1 if any operation regressed
+def main(arguments=None):
+
+    parser = argparse.ArgumentParser(description="Benchmark loading, processing, CST and drawing of airfoils.")
+    parser.add_argument("-o", "--output", help="file to save results to as JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results to compare against")
+    parser.add_argument("--current", metavar="RESULTS", help="compare saved JSON results instead of running")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="fraction slower than the baseline counted as a regression")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="numbers of coordinates of synthetic airfoils, even")
+    parser.add_argument("--operations", nargs="+", help="operations to run, default all")
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds to spend sampling each case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="do not measure peak memory")
+    args = parser.parse_args(arguments)
+
+    if any(size % 2 != 0 for size in args.sizes):
+        parser.error("sizes must be even")
+
+    if args.current is not None:
+
+        with open(args.current) as file:
+            current = json.load(file)
+
+    else:
+
+        print("{0:<16} {1:<20} {2:>6} {3:>10} {4:>10} {5:>10} {6:>14} {7:>12}".format(
+            "operation", "case", "points", "p50", "p90", "p99", "throughput", "peak memory"))
+
+        current = runBenchmarks(args.sizes, args.seed, args.budget, args.operations, not args.no_memory,
+                                printResult)
+
+        print()
+
+        for operation, curve in current["scaling"].items():
+            if curve["exponent"] is not None:
+                print("{0:<16} time grows as points^{1:.2f}".format(operation, curve["exponent"]))
+
+    if args.output is not None:
+
+        with open(args.output, "w") as file:
+            json.dump(current, file, indent=1)
+
+    if args.compare is None:
+        return 0
+
+    with open(args.compare) as file:
+        baseline = json.load(file)
+
+    regressions = 0
+
+    print()
+
+    for operation, case, baselineTime, currentTime, ratio, status in compareResults(baseline, current, args.threshold):
+
+        if status == "regression":
+            regressions += 1
+
+        print("{0:<16} {1:<20} {2:>10} {3:>10} {4:>7} {5}".format(
+            operation, case, formatTime(baselineTime), formatTime(currentTime),
+            "-" if ratio is None else "{0:.2f}x".format(ratio), status))
+
+    print(str(regressions) + " regressions beyond " + "{0:.0f}%".format(100 * args.threshold), file=sys.stderr)
+
+    return 1 if regressions > 0 else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,279 @@
+from airfoil import Airfoil, AirfoilData
+from telemetry import ProcessTelemetry
+import hashlib
+import os
+import threading
+import zipfile
+import numpy as np
+
+class ResultCache:
+
+    # Bumped whenever the stored format or the solver changes results
+    version = 2
+
+    # Puts between scans of the folder, which pick up results written by other processes
+    rescanInterval = 256
+
+    # Eviction removes results until the cache is this fraction of maxBytes,
+    # so the puts after it do not evict again straight away
+    evictionTarget = 0.9
+
+    # Caches made by shared, one for each folder and size in this process
+    _shared = {}
+
+    # Persistent cache of processed AirfoilData, one .npz file per result
+    # Least recently used results are removed once the cache grows past maxBytes
+    # The size of the cache is kept as results are put, the folder is only scanned
+    # when it grows past maxBytes and every rescanInterval puts
+    # @param: directory = folder to keep cached results in, created if missing
+    #         maxBytes  = largest total size in bytes of cached results
+    def __init__(self, directory, maxBytes = 64 * 1024 * 1024):
+        self.directory = directory
+        self.maxBytes  = maxBytes
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._totalBytes = sum(size for modifiedTime, size, path in self._scan())
+        self._putsSinceScan = 0
+
+    # One cache for a folder and size in each process, so batches reuse it for every airfoil
+    # @param:  directory = folder to keep cached results in, created if missing
+    #          maxBytes  = largest total size in bytes of cached results
+    # @return: ResultCache
+    @staticmethod
+    def shared(directory, maxBytes = 64 * 1024 * 1024):
+
+        key = (os.path.abspath(directory), maxBytes)
+
+        if key not in ResultCache._shared:
+            ResultCache._shared[key] = ResultCache(directory, maxBytes)
+
+        return ResultCache._shared[key]
+
+    # Total size in bytes of cached results, as kept since the last scan
+    @property
+    def totalBytes(self):
+
+        return self._totalBytes
+
+    # Hash every input that affects the result of Airfoil.process
+    # @param:  coordinates           = Coordinates of the airfoil
+    #          numberChordwisePoints = Integer number of points wanted on chord
+    #          mode                  = processing mode passed to Airfoil.process
+    #          spacing               = spacing passed to Airfoil.process
+    # @return: hexadecimal key string
+    @staticmethod
+    def key(coordinates, numberChordwisePoints, mode="vectorized", spacing="uniform"):
+
+        settings = (ResultCache.version, numberChordwisePoints, mode, spacing, Airfoil.maxInnerIterations,
+                    Airfoil.maxMeanCamberLineIterations, Airfoil.thicknessConvergenceThreshold,
+                    Airfoil.N1, Airfoil.N2)
+
+        digest = hashlib.sha256(repr(settings).encode())
+        digest.update(np.asarray(coordinates.xVals, dtype=np.float64).tobytes())
+        digest.update(np.asarray(coordinates.yVals, dtype=np.float64).tobytes())
+
+        return digest.hexdigest()
+
+    # Path of the file a result is kept in
+    # @param:  key = key from ResultCache.key
+    # @return: file path
+    def path(self, key):
+
+        return os.path.join(self.directory, key + ".npz")
+
+    # Look up a cached result
+    # Damaged results are removed and treated as not cached, so they are processed and put again
+    # @param:  key     = key from ResultCache.key
+    #          airfoil = Airfoil the result is for
+    # @return: AirfoilData, or None if not cached
+    def get(self, key, airfoil):
+
+        path = self.path(key)
+
+        try:
+
+            with np.load(path) as arrays:
+
+                data = AirfoilData(airfoil, arrays["xVals"].tolist(), arrays["yUpperVals"].tolist(),
+                                   arrays["yLowerVals"].tolist(), arrays["yMeanCamberLineVals"].tolist(),
+                                   arrays["thicknesses"].tolist(), arrays["cambers"].tolist(),
+                                   int(arrays["maxThicknessIndex"]), int(arrays["maxCamberIndex"]))
+
+                if "upperIterationCounts" in arrays:
+                    data.upperIterationCounts = arrays["upperIterationCounts"].tolist()
+                    data.lowerIterationCounts = arrays["lowerIterationCounts"].tolist()
+
+        except OSError:
+
+            return None
+
+        except (KeyError, ValueError, EOFError, zipfile.BadZipFile):
+
+            self._remove(path)
+            return None
+
+        # Mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return data
+
+    # Remove a cached result, keeping the size of the cache
+    # @param: path = path of result
+    def _remove(self, path):
+
+        try:
+            size = os.stat(path).st_size
+            os.remove(path)
+        except OSError:
+            return
+
+        with self._lock:
+            self._totalBytes -= size
+
+    # Store a result and remove least recently used results if over size
+    # @param: key  = key from ResultCache.key
+    #         data = AirfoilData to store
+    def put(self, key, data):
+
+        arrays = {
+            "xVals":               np.asarray(data.xVals, dtype=np.float64),
+            "yUpperVals":          np.asarray(data.yUpperVals, dtype=np.float64),
+            "yLowerVals":          np.asarray(data.yLowerVals, dtype=np.float64),
+            "yMeanCamberLineVals": np.asarray(data.yMeanCamberLineVals, dtype=np.float64),
+            "thicknesses":         np.asarray(data.thicknesses, dtype=np.float64),
+            "cambers":             np.asarray(data.cambers, dtype=np.float64),
+            "maxThicknessIndex":   data.maxThicknessIndex,
+            "maxCamberIndex":      data.maxCamberIndex,
+        }
+
+        if data.upperIterationCounts is not None:
+            arrays["upperIterationCounts"] = np.asarray(data.upperIterationCounts)
+            arrays["lowerIterationCounts"] = np.asarray(data.lowerIterationCounts)
+
+        # Write to a temporary file first so other processes and threads never read half a result
+        path = self.path(key)
+        temporaryPath = path + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp"
+
+        with open(temporaryPath, "wb") as file:
+            np.savez(file, **arrays)
+            size = file.tell()
+
+        # A result put again replaces the file it was in
+        try:
+            previousSize = os.stat(path).st_size
+        except OSError:
+            previousSize = 0
+
+        os.replace(temporaryPath, path)
+
+        with self._lock:
+            self._totalBytes += size - previousSize
+            self._putsSinceScan += 1
+            due = self._totalBytes > self.maxBytes or self._putsSinceScan >= ResultCache.rescanInterval
+
+        if due:
+            self.evict()
+
+    # Modification time, size and path of every cached result
+    # @return: list of (modification time, size in bytes, path)
+    def _scan(self):
+
+        entries = []
+
+        with os.scandir(self.directory) as scan:
+
+            for entry in scan:
+
+                if entry.name.endswith(".npz"):
+
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        return entries
+
+    # Scan the folder for its size, and if over maxBytes remove least
+    # recently used results until under evictionTarget of maxBytes
+    def evict(self):
+
+        entries = self._scan()
+        totalBytes = sum(size for modifiedTime, size, path in entries)
+
+        if totalBytes > self.maxBytes:
+
+            entries.sort()
+
+            for modifiedTime, size, path in entries:
+
+                if totalBytes <= ResultCache.evictionTarget * self.maxBytes:
+                    break
+
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+                totalBytes -= size
+
+        with self._lock:
+            self._totalBytes = totalBytes
+            self._putsSinceScan = 0
+
+    # Remove every cached result
+    def clear(self):
+
+        with os.scandir(self.directory) as scan:
+
+            for entry in scan:
+
+                if entry.name.endswith(".npz"):
+                    os.remove(entry.path)
+
+        with self._lock:
+            self._totalBytes = 0
+            self._putsSinceScan = 0
+
+    # Process an airfoil, reusing a cached result when the inputs are unchanged
+    # @param:  airfoil               = Airfoil object to be processed
+    #          numberChordwisePoints = Integer number of points wanted on chord
+    #          mode                  = processing mode passed to Airfoil.process
+    #          progress              = progress function passed to Airfoil.process,
+    #                                  not called when the result is cached
+    #          telemetry             = True to always process so a ProcessTelemetry is recorded,
+    #                                  the result is still stored in the cache, when False cached
+    #                                  results are still reported to Airfoil.telemetrySink with a
+    #                                  ProcessTelemetry marked as cached
+    #          spacing               = spacing passed to Airfoil.process
+    # @return: AirfoilData object
+    def process(self, airfoil, numberChordwisePoints, mode="vectorized", progress=None, telemetry=False,
+                spacing="uniform"):
+
+        key = ResultCache.key(airfoil.coordinates, numberChordwisePoints, mode, spacing)
+
+        record = None
+
+        if not telemetry and Airfoil.telemetrySink is not None:
+            record = ProcessTelemetry(mode, numberChordwisePoints)
+
+        data = None if telemetry else self.get(key, airfoil)
+
+        if data is None:
+
+            data = Airfoil.process(airfoil, numberChordwisePoints, mode, progress, telemetry, spacing)
+            self.put(key, data)
+
+        elif record is not None:
+
+            record.cached = True
+            record.endPhase("cache")
+            Airfoil.telemetrySink(record)
+
+        return data
@@ -0,0 +1,272 @@
+from airfoil import Airfoil
+from library import METRIC_FIELDS
+import json
+import os
+import threading
+import numpy as np
+
+class AirfoilCatalog:
+
+    # Bumped whenever the saved format or the way entries are built changes
+    version = 2
+
+    # Size in pixels of thumbnails
+    thumbnailWidth = 60
+    thumbnailHeight = 24
+
+    # Number of airfoils read and processed together
+    batchSize = 64
+
+    # Index of the .dat files in a folder with metrics and a thumbnail of each airfoil
+    # Every entry keeps the size and modification time of its file, so refresh only
+    # reads files that are new or changed since the index was built
+    # The index is saved as JSON so it is kept between runs
+    # Entries are changed by refresh, usually on a background thread, and read under a lock
+    # @param: folder = folder of .dat files
+    #         path   = path of saved index, None to keep the index in memory only
+    def __init__(self, folder, path=None):
+        self.folder = folder
+        self.path   = path
+
+        self.entries = {}
+        self.lock    = threading.Lock()
+
+        # Bumped whenever entries change, so displays know to redraw
+        self.generation = 0
+
+        self.load()
+
+    # Read the saved index, starting empty if it is missing or from another version
+    def load(self):
+
+        if self.path is None:
+            return
+
+        try:
+
+            with open(self.path, "r") as file:
+                saved = json.load(file)
+
+        except (OSError, ValueError):
+            return
+
+        if not isinstance(saved, dict) or saved.get("version") != AirfoilCatalog.version:
+            return
+
+        with self.lock:
+            self.entries = saved["entries"]
+            self.generation += 1
+
+    # Write the index, through a temporary file so a half written index is never read
+    def save(self):
+
+        if self.path is None:
+            return
+
+        with self.lock:
+            text = json.dumps({"version": AirfoilCatalog.version, "entries": self.entries})
+
+        temporaryPath = self.path + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp"
+
+        with open(temporaryPath, "w") as file:
+            file.write(text)
+
+        os.replace(temporaryPath, self.path)
+
+    # Names of every airfoil in the index
+    # @return: sorted list of names
+    def names(self):
+
+        with self.lock:
+            return sorted(self.entries, key=str.lower)
+
+    # Entry of an airfoil
+    # @param:  name = name of airfoil
+    # @return: dictionary with "stamp", "points", "metrics" and "thumbnail", None if not indexed
+    #          "metrics" is a list of METRIC_FIELDS values, None until processed or if processing failed
+    def entry(self, name):
+
+        with self.lock:
+            return self.entries.get(name)
+
+    # Size and modification time of every .dat file in the folder, without reading them
+    # @return: dictionary of name to [size, modification time in nanoseconds]
+    def scan(self):
+
+        files = {}
+
+        try:
+
+            with os.scandir(self.folder) as items:
+
+                for item in items:
+
+                    if item.name.endswith(".dat") and item.is_file():
+                        stat = item.stat()
+                        files[item.name[:-4]] = [stat.st_size, stat.st_mtime_ns]
+
+        except OSError:
+            pass
+
+        return files
+
+    # Bring the index up to date with the folder
+    # Files are only read if new or changed, entries of removed files are dropped
+    # New files are listed straight away and filled in a batch at a time
+    # @param:  progress = function called with the number of files indexed and the number to index
+    # @return: list of names indexed, list of names removed
+    def refresh(self, progress=None):
+
+        files = self.scan()
+
+        with self.lock:
+
+            removed = [name for name in self.entries if name not in files]
+            changed = sorted(name for name, stamp in files.items()
+                             if name not in self.entries or self.entries[name]["stamp"] != stamp)
+
+            for name in removed:
+                del self.entries[name]
+
+            # Placeholders without a stamp are read again if refresh is interrupted
+            for name in changed:
+                if name not in self.entries:
+                    self.entries[name] = AirfoilCatalog.emptyEntry(None)
+
+            if removed or changed:
+                self.generation += 1
+
+        for start in range(0, len(changed), AirfoilCatalog.batchSize):
+
+            names = changed[start:start + AirfoilCatalog.batchSize]
+            entries = AirfoilCatalog.indexFiles(self.folder, names, [files[name] for name in names])
+
+            with self.lock:
+                self.entries.update(zip(names, entries))
+                self.generation += 1
+
+            if progress is not None:
+                progress(start + len(names), len(changed))
+
+        if removed or changed:
+            self.save()
+
+        return changed, removed
+
+    # Entry of a file that could not be read
+    # @param:  stamp = [size, modification time] of file, None to read it again on the next refresh
+    # @return: dictionary entry
+    @staticmethod
+    def emptyEntry(stamp):
+
+        return {"stamp": stamp, "points": None, "metrics": None, "thumbnail": []}
+
+    # Read and process files in one batch
+    # Airfoils are processed at as many chordwise points as they have coordinates, like the
+    # airfoil information shown in the main window, so both give the same metrics
+    # @param:  folder = folder of files
+    #          names  = list of names of airfoils
+    #          stamps = list of [size, modification time] of each file
+    # @return: list of dictionary entries
+    @staticmethod
+    def indexFiles(folder, names, stamps):
+
+        entries = [AirfoilCatalog.emptyEntry(stamp) for stamp in stamps]
+
+        # Airfoils and their entry indices by number of coordinates
+        groups = {}
+
+        for index, name in enumerate(names):
+
+            try:
+                coordinates = Airfoil.readCoordinates(os.path.join(folder, name + ".dat"))
+            except (OSError, ValueError):
+                continue
+
+            entries[index]["points"] = len(coordinates)
+            entries[index]["thumbnail"] = AirfoilCatalog.thumbnail(coordinates)
+
+            airfoils, indices = groups.setdefault(len(coordinates), ([], []))
+            airfoils.append(Airfoil(name, coordinates))
+            indices.append(index)
+
+        for numberChordwisePoints, (airfoils, indices) in groups.items():
+
+            batch = Airfoil.processBatch(airfoils, numberChordwisePoints)
+
+            for row, index in enumerate(indices):
+
+                if batch.errors[row] is not None:
+                    continue
+
+                maxThicknessIndex = batch.maxThicknessIndices[row]
+                maxCamberIndex = batch.maxCamberIndices[row]
+
+                entries[index]["metrics"] = [float(batch.thicknesses[row, maxThicknessIndex]),
+                                             float(batch.xVals[row, maxThicknessIndex]),
+                                             float(batch.cambers[row, maxCamberIndex]),
+                                             float(batch.xVals[row, maxCamberIndex])]
+
+        return entries
+
+    # Outline of an airfoil as thumbnail pixels, chord across the width and y at the same scale
+    # Points landing on the same pixel as the point before are dropped
+    # @param:  coordinates = Coordinates of airfoil
+    # @return: flat list of alternating x and y pixels of a closed line
+    @staticmethod
+    def thumbnail(coordinates):
+
+        closedPoints = coordinates.closedPoints()
+
+        xPixels = np.rint((AirfoilCatalog.thumbnailWidth - 1) * np.asarray(closedPoints[0], dtype=float))
+        yPixels = np.rint((AirfoilCatalog.thumbnailHeight / 2) -
+                          ((AirfoilCatalog.thumbnailWidth - 1) * np.asarray(closedPoints[1], dtype=float)))
+
+        # Files with odd values still give a thumbnail inside its bounds
+        xPixels = np.clip(np.nan_to_num(xPixels), 0, AirfoilCatalog.thumbnailWidth - 1)
+        yPixels = np.clip(np.nan_to_num(yPixels), 0, AirfoilCatalog.thumbnailHeight - 1)
+
+        keep = np.ones(len(xPixels), dtype=bool)
+        keep[1:] = (xPixels[1:] != xPixels[:-1]) | (yPixels[1:] != yPixels[:-1])
+
+        pixels = np.empty((np.count_nonzero(keep), 2), dtype=int)
+        pixels[:, 0] = xPixels[keep]
+        pixels[:, 1] = yPixels[keep]
+
+        return pixels.ravel().tolist()
+
+    # Names containing some text, ignoring case
+    # Names matching a shorter part of the text can be passed to narrow them down as the user types
+    # @param:  names = list of names to search
+    #          text  = text to look for
+    # @return: list of names containing text, in the order given
+    @staticmethod
+    def filterNames(names, text):
+
+        text = text.lower()
+
+        if len(text) == 0:
+            return list(names)
+
+        return [name for name in names if text in name.lower()]
+
+    # Short description of an entry's metrics
+    # @param:  entry = dictionary entry, None if not indexed
+    # @return: text
+    @staticmethod
+    def describe(entry):
+
+        if entry is None or entry["stamp"] is None:
+            return "Indexing..."
+
+        if entry["points"] is None:
+            return "Could not read file"
+
+        if entry["metrics"] is None:
+            return str(entry["points"]) + " points, could not process"
+
+        metrics = dict(zip(METRIC_FIELDS, entry["metrics"]))
+
+        return ("{0:.1f}% thick at {1:.0f}%, {2:.1f}% camber at {3:.0f}%".format(
+            metrics["maxThickness"], 100 * metrics["maxThicknessX"],
+            metrics["maxCamber"], 100 * metrics["maxCamberX"]))
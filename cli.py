@@ -0,0 +1,283 @@
+import argparse
+import os
+import sys
+
+# Headless command line for airfoils
+# Only standard library modules are imported here so starting up and printing help stay fast,
+# NumPy and the airfoil modules are imported by the commands that need them and tkinter never is
+
+# Columns written for each loaded airfoil
+LOAD_FIELDS = ["name", "path", "points", "error"]
+
+# Path given for airfoils read from standard input
+STDIN_PATH = "<stdin>"
+
+# Read airfoils given on the command line, streaming them out of archives and files
+# holding many airfoils one after another
+# "-" or no inputs reads airfoils from standard input,
+# readPaths reads paths from standard input one line at a time as they arrive
+# @param:  inputs    = list of directories, glob patterns, .dat files, archives or "-"
+#          readPaths = True to read paths from standard input instead
+# @return: generator of (path, Coordinates or None, error message or None)
+def readAirfoils(inputs, readPaths=False):
+
+    import batch
+
+    if readPaths:
+
+        for line in sys.stdin:
+
+            path = line.strip()
+
+            if path:
+                yield from batch.readInputs([path])
+
+        return
+
+    if not inputs:
+        inputs = ["-"]
+
+    files = [path for path in inputs if path != "-"]
+
+    yield from batch.readInputs(files)
+
+    if "-" in inputs:
+
+        yield from batch.splitAirfoils(sys.stdin.buffer, STDIN_PATH)
+
+# Name of an airfoil from its path
+# @param:  path = path of .dat file, which may be compressed, or STDIN_PATH
+# @return: name
+def airfoilName(path):
+
+    import batch
+
+    if path == STDIN_PATH:
+        return "stdin"
+
+    return batch.airfoilName(path)
+
+# Write coordinates of many airfoils with export
+# With one output file every airfoil is written to it, with a directory each airfoil gets
+# its own file and with no output everything goes to standard output
+# @param:  airfoils = iterable of (name, Coordinates)
+#          output   = file or directory path, None for standard output
+#          format   = format in export.EXPORT_FORMATS
+#          multiple = True if more than one airfoil may be written, so output is a directory
+#          compress = True to compress files
+#          workers  = number of worker processes writing to a directory, None for one per CPU
+# @return: number of airfoils written
+def writeCoordinates(airfoils, output, format, multiple, compress=False, workers=1):
+
+    import export
+
+    if output is not None and (multiple or os.path.isdir(output)):
+        return export.exportDirectory(airfoils, output, format, compress, workers)
+
+    return export.exportFile(airfoils, output, format, compress)
+
+# Print errors of airfoils that could not be read and skip them
+# @param:  loaded   = iterable of (path, Coordinates or None, error message or None)
+#          failures = list errors are added to
+# @return: generator of (path, Coordinates)
+def skipFailures(loaded, failures):
+
+    for path, coordinates, error in loaded:
+
+        if error is not None:
+
+            print(path + ": " + error, file=sys.stderr)
+            failures.append(path)
+
+        else:
+
+            yield path, coordinates
+
+# Check airfoils can be read and count their coordinates
+def loadCommand(args):
+
+    import batch
+
+    def results():
+
+        for path, coordinates, error in readAirfoils(args.inputs, args.stdin_paths):
+            yield {"name": airfoilName(path), "path": path,
+                   "points": None if coordinates is None else len(coordinates), "error": error}
+
+    return batch.writeResults(results(), sys.stdout, args.format, LOAD_FIELDS)
+
+# Process airfoils and write their max thickness and camber
+def processCommand(args):
+
+    import batch
+
+    cacheBytes = args.cache_size * 1024 * 1024
+
+    # Airfoils are read here and processed on a pool with bounded read-ahead, or in this process for one worker
+    results = batch.processStream(readAirfoils(args.inputs, args.stdin_paths), args.points, args.mode, args.workers,
+                                  1, args.read_ahead, args.cache, cacheBytes, args.spacing)
+
+    return batch.writeResults(results, sys.stdout, args.format, batch.RESULT_FIELDS)
+
+# Convert airfoils between coordinate formats
+def convertCommand(args):
+
+    failures = []
+
+    airfoils = ((airfoilName(path), coordinates)
+                for path, coordinates in skipFailures(readAirfoils(args.inputs, args.stdin_paths), failures))
+
+    multiple = args.stdin_paths or len([path for path in args.inputs if path != "-"]) > 1 or \
+        any(os.path.isdir(path) for path in args.inputs)
+
+    writeCoordinates(airfoils, args.output, args.format, multiple, args.gzip, args.workers)
+
+    return len(failures)
+
+# Generate airfoils from CST weights
+# Weights come from the command line, or from standard input as one JSON object a line
+# with weightsLower, weightsUpper and optionally dz and name, like fit -f jsonl writes
+def cstCommand(args):
+
+    import json
+    from cst import CST
+
+    if args.lower is not None and args.upper is not None:
+
+        airfoils = [(args.name, CST.genCoordinates(args.lower, args.upper, args.dz, args.points))]
+        multiple = False
+
+    elif args.lower is None and args.upper is None:
+
+        def airfoils():
+
+            for count, line in enumerate(sys.stdin):
+
+                if not line.strip():
+                    continue
+
+                weights = json.loads(line)
+
+                # Rows of fits that failed have no weights
+                if weights.get("error"):
+                    print(str(weights.get("name")) + ": " + weights["error"], file=sys.stderr)
+                    continue
+
+                yield (weights.get("name") or args.name + str(count),
+                       CST.genCoordinates(weights["weightsLower"], weights["weightsUpper"],
+                                          weights.get("dz", args.dz), args.points))
+
+        airfoils = airfoils()
+        multiple = True
+
+    else:
+
+        print("Give both --lower and --upper, or neither to read weights from standard input", file=sys.stderr)
+        return 1
+
+    # Weights from standard input go to a directory unless output names one file
+    writeCoordinates(airfoils, args.output, args.format,
+                     multiple and not str(args.output).endswith((".dat", ".gz", ".npz")), args.gzip, args.workers)
+
+    return 0
+
+# Fit CST weights to airfoils
+def fitCommand(args):
+
+    import batch
+
+    results = (batch.fitFile(path, args.order, args.refine, coordinates)
+               if error is None else dict(dict.fromkeys(batch.FIT_FIELDS), name=airfoilName(path), path=path,
+                                          order=args.order, error=error)
+               for path, coordinates, error in readAirfoils(args.inputs, args.stdin_paths))
+
+    return batch.writeResults(results, sys.stdout, args.format, batch.FIT_FIELDS)
+
+# Add arguments for reading airfoils to a command
+# @param: parser = argparse parser of the command
+def addInputArguments(parser):
+
+    parser.add_argument("inputs", nargs="*", default=[],
+                        help="directories, glob patterns, .dat files or zip and tar archives, "
+                             "- or nothing to read standard input")
+    parser.add_argument("--stdin-paths", action="store_true",
+                        help="read .dat paths from standard input one line at a time, for long running pipelines")
+
+# Headless command for loading, processing, converting, generating and fitting airfoils
+# @param:  arguments = list of command line arguments
+# @return: exit code, 1 if any airfoil failed
+def main(arguments=None):
+
+    parser = argparse.ArgumentParser(description="Work with airfoils without the GUI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    loadParser = commands.add_parser("load", help="check airfoils can be read and count their coordinates")
+    addInputArguments(loadParser)
+    loadParser.add_argument("-f", "--format", choices=["csv", "json", "jsonl"], default="csv")
+    loadParser.set_defaults(run=loadCommand)
+
+    processParser = commands.add_parser("process", help="find max thickness and camber of airfoils")
+    addInputArguments(processParser)
+    processParser.add_argument("-f", "--format", choices=["csv", "json", "jsonl"], default="csv")
+    processParser.add_argument("-p", "--points", type=int, default=None,
+                               help="chordwise points, default the number of coordinates")
+    processParser.add_argument("-m", "--mode", choices=["vectorized", "newton", "scalar"], default="vectorized")
+    processParser.add_argument("-s", "--spacing", choices=["uniform", "cosine", "halfcosine", "adaptive"],
+                               default="uniform", help="how chordwise points are spread")
+    processParser.add_argument("-w", "--workers", type=int, default=1,
+                               help="worker processes, 0 for one per CPU")
+    processParser.add_argument("--read-ahead", type=int, default=None,
+                               help="most airfoils read ahead of written results, default 4 per worker")
+    processParser.add_argument("--cache", help="folder to cache processed results in")
+    processParser.add_argument("--cache-size", type=int, default=64, help="largest cache size in megabytes")
+    processParser.set_defaults(run=processCommand)
+
+    convertParser = commands.add_parser("convert", help="rewrite airfoils in another coordinate format")
+    addInputArguments(convertParser)
+    convertParser.add_argument("-f", "--format", choices=["comma", "selig", "npz"], default="comma",
+                               help="comma or selig text, or npz for a NumPy archive")
+    convertParser.add_argument("-o", "--output", help="file or directory to write to, standard output if not given")
+    convertParser.add_argument("--gzip", action="store_true", help="compress text with gzip and NumPy archives with zip")
+    convertParser.add_argument("-w", "--workers", type=int, default=1,
+                               help="worker processes writing to a directory, 0 for one per CPU")
+    convertParser.set_defaults(run=convertCommand)
+
+    cstParser = commands.add_parser("cst", help="generate airfoil coordinates from CST weights")
+    cstParser.add_argument("--lower", type=float, nargs="+", help="lower surface weights")
+    cstParser.add_argument("--upper", type=float, nargs="+", help="upper surface weights")
+    cstParser.add_argument("--dz", type=float, default=0, help="trailing edge thickness")
+    cstParser.add_argument("-n", "--points", type=int, default=200, help="number of coordinates, must be even")
+    cstParser.add_argument("--name", default="CST", help="name of generated airfoil")
+    cstParser.add_argument("-f", "--format", choices=["comma", "selig", "npz"], default="comma",
+                           help="comma or selig text, or npz for a NumPy archive")
+    cstParser.add_argument("-o", "--output", help="file or directory to write to, standard output if not given")
+    cstParser.add_argument("--gzip", action="store_true", help="compress text with gzip and NumPy archives with zip")
+    cstParser.add_argument("-w", "--workers", type=int, default=1,
+                           help="worker processes writing to a directory, 0 for one per CPU")
+    cstParser.set_defaults(run=cstCommand)
+
+    fitParser = commands.add_parser("fit", help="fit CST weights to airfoils")
+    addInputArguments(fitParser)
+    fitParser.add_argument("-n", "--order", type=int, default=5, help="order of Bernstein polynomials")
+    fitParser.add_argument("--refine", type=int, default=0, help="refinement iterations")
+    fitParser.add_argument("-f", "--format", choices=["csv", "json", "jsonl"], default="csv")
+    fitParser.set_defaults(run=fitCommand)
+
+    args = parser.parse_args(arguments)
+
+    if getattr(args, "workers", 1) == 0:
+        args.workers = None
+
+    try:
+
+        return 1 if args.run(args) else 0
+
+    except BrokenPipeError:
+
+        # Reader of standard output stopped early, like head does
+        sys.stdout = open(os.devnull, "w")
+
+        return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
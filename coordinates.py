@@ -1,63 +1,654 @@
-class Coordinates:
-
-    # @param: xVals = list of x values
-    #         yVals = list of y values
-    def __init__(self, xVals = None, yVals = None):
-        if xVals is None:
-            xVals = []
-            yVals = []
-
-        self.xVals = xVals
-        self.yVals = yVals
-
-    def addCoordinate(self, xVal, yVal):
-
-        self.xVals.append(xVal)
-        self.yVals.append(yVal)
-
-    # Estimate point with linear interpolation
-    # Requires ordered coordinates
-    # @param:  xVal = number to plug in and estimate y for
-    # @return: estimated y value
-    def interpolate(self, targetX):
-
-        # Find index of smallest x value that is bigger
-        upperBoundIndex = 0
-
-        # Exception for target x being equal to first value
-        if targetX == self.xVals[0]:
-
-            upperBoundIndex = 1
-
-        # Exception for x being less than 0
-        elif targetX < 0:
-
-            upperBoundIndex = 1
-
-        # Exception for x being greater than 1
-        elif targetX > 1:
-
-            upperBoundIndex = len(self.xVals) - 1
-
-        else:
-
-            for i in range(len(self.xVals)):
-
-                if targetX <= self.xVals[i]:
-
-                    upperBoundIndex = i
-                    break
-
-        # Upper and lower bound x values
-        upperBoundX = self.xVals[upperBoundIndex]
-        lowerBoundX = self.xVals[upperBoundIndex - 1]
-
-        # Upper and lower bound y values
-        upperBoundY = self.yVals[upperBoundIndex]
-        lowerBoundY = self.yVals[upperBoundIndex - 1]
-
-        # Find slope between upper and lower bound x values
-        slope = (upperBoundY - lowerBoundY) / (upperBoundX - lowerBoundX)
-
-        # Return y value if there was a line between upper and lower bound
-        return lowerBoundY + ((targetX - lowerBoundX) * slope)
\ No newline at end of file
+import bisect
+import numpy as np
+
+class CoordinateValues(np.ndarray):
+
+    # Coordinates the values belong to and their row, None for arrays made from them
+    _coordinates = None
+    _row = None
+
+    # x or y values of Coordinates as a read-only view of its buffer
+    # Item assignment and the list methods append, extend, insert and pop change
+    # the values through the Coordinates, so its lookup tables are dropped
+    # Read xVals or yVals again after changing them, the view is not updated
+    # Slices and adding lists or tuples give new lists like the lists values used to be,
+    # so changing them leaves the Coordinates as it is, use numpy.asarray for array slices
+    # @param:  coordinates = Coordinates the values belong to
+    #          row         = 0 for x values, 1 for y values
+    #          values      = numpy array viewing the row of the buffer
+    # @return: CoordinateValues
+    @staticmethod
+    def attach(coordinates, row, values):
+
+        values = values.view(CoordinateValues)
+        values.flags.writeable = False
+        values._coordinates = coordinates
+        values._row = row
+
+        return values
+
+    # Arrays given to numpy as plain arrays, so results are plain arrays
+    @staticmethod
+    def _plain(value):
+
+        return value.view(np.ndarray) if isinstance(value, CoordinateValues) else value
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+
+        inputs = tuple(CoordinateValues._plain(value) for value in inputs)
+
+        if "out" in kwargs:
+            kwargs["out"] = tuple(CoordinateValues._plain(value) for value in kwargs["out"])
+
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    # Coordinates the values can be changed through
+    # @return: Coordinates
+    def _owner(self):
+
+        if self._coordinates is None:
+            raise TypeError("Values are not attached to Coordinates and cannot change length")
+
+        return self._coordinates
+
+    def __getitem__(self, index):
+
+        if isinstance(index, slice):
+            return self.view(np.ndarray)[index].tolist()
+
+        return super().__getitem__(index)
+
+    def __add__(self, other):
+
+        if isinstance(other, (list, tuple)):
+            return self.tolist() + list(other)
+
+        return super().__add__(other)
+
+    def __radd__(self, other):
+
+        if isinstance(other, (list, tuple)):
+            return list(other) + self.tolist()
+
+        return super().__radd__(other)
+
+    # Lists stay lists, coordinates.xVals += values then sets the longer values on the Coordinates
+    def __iadd__(self, other):
+
+        if isinstance(other, (list, tuple)):
+            return self.tolist() + list(other)
+
+        return super().__iadd__(other)
+
+    # Position of the first value equal to a value like list.index
+    # @param:  value = value to find
+    #          start = index to start looking from
+    #          stop  = index to stop looking before
+    # @return: index of value
+    def index(self, value, start=0, stop=None):
+
+        matches = np.flatnonzero(self.view(np.ndarray)[start:stop] == value)
+
+        if len(matches) == 0:
+            raise ValueError(repr(value) + " is not in list")
+
+        return int(matches[0]) + range(len(self))[start:stop].start
+
+    # Number of values equal to a value like list.count
+    # @param:  value = value to count
+    # @return: number of values
+    def count(self, value):
+
+        return int(np.count_nonzero(self.view(np.ndarray) == value))
+
+    def __setitem__(self, index, value):
+
+        if self._coordinates is None:
+            super().__setitem__(index, value)
+        else:
+            self._coordinates._setValues(self._row, index, value)
+
+    def append(self, value):
+
+        self._owner()._insertValues(self._row, len(self), [value])
+
+    def extend(self, values):
+
+        self._owner()._insertValues(self._row, len(self), list(values))
+
+    def insert(self, index, value):
+
+        self._owner()._insertValues(self._row, index, [value])
+
+    def pop(self, index=-1):
+
+        return self._owner()._popValue(self._row, index)
+
+class Coordinates:
+
+    __slots__ = ("_buffer", "_count", "_xCount", "_yCount", "_ownsBuffer", "_runningMaxXVals", "_runningMaxArray")
+
+    # Coordinates are kept in one contiguous float64 buffer, x values in row 0
+    # and y values in row 1, with room after the last point for a copy of
+    # the first point so the closed loop can be viewed without copying
+    # xVals, yVals and points are read-only views, changes go through
+    # the setters, addCoordinate or the list methods of CoordinateValues
+    # Rows can differ in length while they are changed one at a time,
+    # only complete points are counted and seen in points
+    # @param: xVals = list or array of x values
+    #         yVals = list or array of y values
+    def __init__(self, xVals = None, yVals = None):
+        if xVals is None:
+            xVals = []
+            yVals = []
+
+        count = len(xVals)
+
+        self._buffer = np.empty((2, count + 1))
+        self._buffer[0, :count] = xVals
+        self._buffer[1, :count] = yVals
+        self._count = self._xCount = self._yCount = count
+        self._ownsBuffer = True
+
+        # Lookup tables for interpolation, built when first needed
+        # and dropped by _invalidate whenever coordinates change
+        self._runningMaxXVals = None
+        self._runningMaxArray = None
+
+    # Wrap an existing array of points without copying it
+    # Changes to the array show through the new Coordinates
+    # @param:  points = float64 numpy array with x values in row 0 and y values in row 1
+    # @return: Coordinates viewing points
+    @staticmethod
+    def view(points):
+
+        coordinates = Coordinates.__new__(Coordinates)
+        coordinates._buffer = points
+        coordinates._count = coordinates._xCount = coordinates._yCount = points.shape[1]
+        coordinates._ownsBuffer = False
+
+        coordinates._runningMaxXVals = None
+        coordinates._runningMaxArray = None
+
+        return coordinates
+
+    # x values as a read-only view of the buffer
+    @property
+    def xVals(self):
+
+        return CoordinateValues.attach(self, 0, self._buffer[0, :self._xCount])
+
+    @xVals.setter
+    def xVals(self, xVals):
+
+        self._replaceRow(0, xVals)
+
+    # y values as a read-only view of the buffer
+    @property
+    def yVals(self):
+
+        return CoordinateValues.attach(self, 1, self._buffer[1, :self._yCount])
+
+    @yVals.setter
+    def yVals(self, yVals):
+
+        self._replaceRow(1, yVals)
+
+    # Points as a read-only view of the buffer, x values in row 0 and y values in row 1
+    @property
+    def points(self):
+
+        points = self._buffer[:, :self._count]
+        points.flags.writeable = False
+
+        return points
+
+    def __len__(self):
+
+        return self._count
+
+    # Copy values of a row into a new buffer owned by these Coordinates
+    # @param: row    = 0 for x values, 1 for y values
+    #         values = list or array of values
+    def _replaceRow(self, row, values):
+
+        count = len(values)
+        otherRow = 1 - row
+        otherCount = self._rowCount(otherRow)
+
+        buffer = np.empty((2, max(count, otherCount) + 1))
+        buffer[row, :count] = values
+        buffer[otherRow, :otherCount] = self._buffer[otherRow, :otherCount]
+
+        self._buffer = buffer
+        self._ownsBuffer = True
+        self._setRowCount(row, count)
+
+    # Copy values into a new owned buffer with room for more points
+    # @param: capacity = number of points the new buffer can hold
+    def _grow(self, capacity):
+
+        used = max(self._xCount, self._yCount)
+
+        buffer = np.empty((2, capacity))
+        buffer[:, :used] = self._buffer[:, :used]
+
+        self._buffer = buffer
+        self._ownsBuffer = True
+
+    # Number of values in a row
+    # @param:  row = 0 for x values, 1 for y values
+    # @return: number of values
+    def _rowCount(self, row):
+
+        return self._xCount if row == 0 else self._yCount
+
+    # Change the number of values in a row, points are counted up to the shorter row
+    # @param: row   = 0 for x values, 1 for y values
+    #         count = new number of values
+    def _setRowCount(self, row, count):
+
+        if row == 0:
+            self._xCount = count
+        else:
+            self._yCount = count
+
+        self._count = min(self._xCount, self._yCount)
+        self._invalidate()
+
+    # Set values of a row in place, copying the buffer first if it is not owned
+    # @param: row   = 0 for x values, 1 for y values
+    #         index = index or slice of values
+    #         value = value or values to set
+    def _setValues(self, row, index, value):
+
+        if not self._ownsBuffer:
+            self._grow(max(self._xCount, self._yCount) + 1)
+
+        self._buffer[row, :self._rowCount(row)][index] = value
+        self._invalidate()
+
+    # Insert values into a row like list.insert
+    # @param: row    = 0 for x values, 1 for y values
+    #         index  = index to insert before
+    #         values = list of values to insert
+    def _insertValues(self, row, index, values):
+
+        count = self._rowCount(row)
+        added = len(values)
+
+        index = min(max(index + count if index < 0 else index, 0), count)
+
+        # Keep one free slot after the longer row for the closing copy
+        needed = max(self._xCount, self._yCount, count + added) + 1
+
+        if not self._ownsBuffer or needed > self._buffer.shape[1]:
+            self._grow(max(2 * count, needed))
+
+        rowValues = self._buffer[row]
+        rowValues[index + added:count + added] = rowValues[index:count]
+        rowValues[index:index + added] = values
+
+        self._setRowCount(row, count + added)
+
+    # Remove and return a value of a row like list.pop
+    # @param:  row   = 0 for x values, 1 for y values
+    #          index = index of value
+    # @return: value removed
+    def _popValue(self, row, index=-1):
+
+        count = self._rowCount(row)
+
+        if count == 0:
+            raise IndexError("pop from empty list")
+
+        if index < 0:
+            index += count
+
+        if index < 0 or index >= count:
+            raise IndexError("pop index out of range")
+
+        if not self._ownsBuffer:
+            self._grow(max(self._xCount, self._yCount) + 1)
+
+        rowValues = self._buffer[row]
+        value = float(rowValues[index])
+        rowValues[index:count - 1] = rowValues[index + 1:count]
+
+        self._setRowCount(row, count - 1)
+
+        return value
+
+    def addCoordinate(self, xVal, yVal):
+
+        # Rows part way through being changed are added to one at a time
+        if self._xCount != self._yCount:
+
+            self._insertValues(0, self._xCount, [xVal])
+            self._insertValues(1, self._yCount, [yVal])
+            return
+
+        # Keep one free slot after the last point for the closing copy
+        if not self._ownsBuffer or self._count + 2 > self._buffer.shape[1]:
+            self._grow(max(2 * self._count, self._count + 2))
+
+        self._buffer[0, self._count] = xVal
+        self._buffer[1, self._count] = yVal
+        self._count = self._xCount = self._yCount = self._count + 1
+        self._invalidate()
+
+    # Points of the closed loop, ending with a copy of the first point
+    # Is a read-only view of the buffer unless these Coordinates are a view themselves
+    # @return: numpy array of points with x values in row 0 and y values in row 1
+    def closedPoints(self):
+
+        # The slot after the shorter row holds a value of the longer one
+        if self._xCount != self._yCount:
+            return np.concatenate((self.points, self.points[:, :1]), axis=1)
+
+        if not self._ownsBuffer or self._count + 1 > self._buffer.shape[1]:
+            self._grow(self._count + 1)
+
+        self._buffer[:, self._count] = self._buffer[:, 0]
+
+        points = self._buffer[:, :self._count + 1]
+        points.flags.writeable = False
+
+        return points
+
+    # Coordinates running in the opposite direction, as a view
+    # @return: Coordinates
+    def reversed(self):
+
+        return Coordinates.view(self.points[:, ::-1])
+
+    # Coordinates for a range of points, as a view
+    # @param:  start = index of first point
+    #          stop  = index after last point, None for the end
+    #          step  = step between points, negative to run backwards
+    # @return: Coordinates
+    def slice(self, start, stop=None, step=1):
+
+        return Coordinates.view(self.points[:, start:stop:step])
+
+    # Estimate y values for a grid of x values
+    # The grid is stored next to the estimates in one new buffer
+    # @param:  xGrid = list or array of x values
+    # @return: Coordinates
+    def resample(self, xGrid):
+
+        points = np.empty((2, len(xGrid)))
+        points[0] = xGrid
+        points[1] = self.interpolateMany(points[0])
+
+        return Coordinates.view(points)
+
+    # Running maximum of x values, used to binary search for bounds
+    # The first running maximum not less than a target is at the same index
+    # as the first x value not less than it, so lookups match a linear scan
+    # even for coordinates that are not perfectly ordered
+    # Built when first needed and kept until coordinates change
+    # @return: list of running maximum x values
+    def _runningMax(self):
+
+        if self._runningMaxXVals is None:
+            self._runningMaxXVals = self._runningMaxAsArray().tolist()
+
+        return self._runningMaxXVals
+
+    # Running maximum of x values as a numpy array, kept like _runningMax
+    # @return: numpy array of running maximum x values
+    def _runningMaxAsArray(self):
+
+        if self._runningMaxArray is None:
+            self._runningMaxArray = np.maximum.accumulate(self._buffer[0, :self._count])
+
+        return self._runningMaxArray
+
+    # Drop lookup tables, called by every method that changes coordinates
+    def _invalidate(self):
+
+        self._runningMaxXVals = None
+        self._runningMaxArray = None
+
+    # Drop lookup tables after the array wrapped by Coordinates.view was edited
+    # from outside, changes made through Coordinates drop them already
+    def resetInterpolation(self):
+
+        self._invalidate()
+
+    # Estimate point with linear interpolation
+    # Requires ordered coordinates
+    # @param:  xVal = number to plug in and estimate y for
+    # @return: estimated y value
+    def interpolate(self, targetX):
+
+        xVals = self._buffer[0, :self._count]
+        yVals = self._buffer[1, :self._count]
+
+        # Find index of smallest x value that is bigger
+        upperBoundIndex = 0
+
+        # Exception for target x being equal to first value
+        if targetX == xVals[0]:
+
+            upperBoundIndex = 1
+
+        # Exception for x being less than 0
+        elif targetX < 0:
+
+            upperBoundIndex = 1
+
+        # Exception for x being greater than 1
+        elif targetX > 1:
+
+            upperBoundIndex = len(xVals) - 1
+
+        else:
+
+            upperBoundIndex = bisect.bisect_left(self._runningMax(), targetX)
+
+            # No bigger x value found, wraps around to last segment
+            if upperBoundIndex == len(xVals):
+                upperBoundIndex = 0
+
+        # Upper and lower bound x values
+        upperBoundX = float(xVals[upperBoundIndex])
+        lowerBoundX = float(xVals[upperBoundIndex - 1])
+
+        # Upper and lower bound y values
+        upperBoundY = float(yVals[upperBoundIndex])
+        lowerBoundY = float(yVals[upperBoundIndex - 1])
+
+        # Find slope between upper and lower bound x values
+        slope = (upperBoundY - lowerBoundY) / (upperBoundX - lowerBoundX)
+
+        # Return y value if there was a line between upper and lower bound
+        return lowerBoundY + ((targetX - lowerBoundX) * slope)
+
+    # Estimate many points at once with linear interpolation
+    # Gives the same values as calling interpolate on each x value
+    # @param:  targetXs = list or array of x values to estimate y for
+    # @return: numpy array of estimated y values, same shape as targetXs
+    def interpolateMany(self, targetXs):
+
+        targetXs = np.asarray(targetXs, dtype=float)
+        xVals = self._buffer[0, :self._count]
+        yVals = self._buffer[1, :self._count]
+
+        # Find index of smallest x value that is bigger
+        # Index past the end wraps around to last segment like interpolate
+        upperBoundIndices = np.asarray(np.searchsorted(self._runningMaxAsArray(), targetXs, side="left"))
+        upperBoundIndices[upperBoundIndices == len(xVals)] = 0
+
+        # Exceptions in reverse order of precedence used by interpolate
+        upperBoundIndices[targetXs > 1] = len(xVals) - 1
+        upperBoundIndices[targetXs < 0] = 1
+        upperBoundIndices[targetXs == xVals[0]] = 1
+
+        # Upper and lower bound x and y values
+        upperBoundX = xVals[upperBoundIndices]
+        lowerBoundX = xVals[upperBoundIndices - 1]
+
+        upperBoundY = yVals[upperBoundIndices]
+        lowerBoundY = yVals[upperBoundIndices - 1]
+
+        if np.any(upperBoundX == lowerBoundX):
+            raise ZeroDivisionError("float division by zero")
+
+        # Find slope between upper and lower bound x values
+        slopes = (upperBoundY - lowerBoundY) / (upperBoundX - lowerBoundX)
+
+        return lowerBoundY + ((targetXs - lowerBoundX) * slopes)
+
+class StackedCoordinates:
+
+    # Search keys of every set are kept within these bounds, x values outside
+    # them are still found exactly, only with a slower search
+    keyBounds = (-1.0, 2.0)
+
+    # Distance between the keys of neighbouring sets
+    keySpan = 4.0
+
+    # Many sets of coordinates kept end to end in flat arrays, so points on
+    # all of them are interpolated with one search instead of one per set
+    # @param: coordinatesList = list of Coordinates, each with at least two points
+    def __init__(self, coordinatesList):
+
+        lengths = [len(coordinates) for coordinates in coordinatesList]
+
+        self._stack(np.concatenate([coordinates.xVals for coordinates in coordinatesList]),
+                    np.concatenate([coordinates.yVals for coordinates in coordinatesList]),
+                    np.concatenate([coordinates._runningMaxAsArray() for coordinates in coordinatesList]),
+                    np.array(lengths, dtype=np.int64))
+
+    # Stack rows of equal length without building a Coordinates for each
+    # @param:  xVals = numpy array of x values (sets x points)
+    #          yVals = numpy array of y values (sets x points)
+    # @return: StackedCoordinates
+    @staticmethod
+    def fromRows(xVals, yVals):
+
+        stacked = StackedCoordinates.__new__(StackedCoordinates)
+        stacked._stack(np.ravel(xVals), np.ravel(yVals), np.maximum.accumulate(xVals, axis=1).ravel(),
+                       np.full(len(xVals), xVals.shape[1], dtype=np.int64))
+
+        return stacked
+
+    # Keep flat arrays of every set and build the lookup table searched by interpolateMany
+    # @param: xVals      = numpy array of x values of all sets end to end
+    #         yVals      = numpy array of y values of all sets end to end
+    #         runningMax = numpy array of running maximum x values of each set, end to end
+    #         lengths    = numpy array of number of points in each set
+    def _stack(self, xVals, yVals, runningMax, lengths):
+
+        self.xVals = xVals
+        self.yVals = yVals
+        self.lengths = lengths
+        self.starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+
+        # Extra value so the index after the last set can be read
+        self._runningMax = np.append(runningMax, np.inf)
+        self._hasNaN = bool(np.isnan(runningMax).any())
+
+        # Sets are moved apart so one sorted array holds every running maximum
+        self._offsets = StackedCoordinates.keySpan * np.arange(len(lengths))
+        self._keys = StackedCoordinates._searchKeys(runningMax) + np.repeat(self._offsets, lengths)
+
+    # Search keys of x values, kept between the key bounds so sets never overlap
+    # NaN is placed after every number like numpy sorts it
+    # @param:  xVals = numpy array of x values
+    # @return: numpy array of keys in the same order as xVals
+    @staticmethod
+    def _searchKeys(xVals):
+
+        # fmin gives the bound for NaN
+        return np.fmax(np.fmin(xVals, StackedCoordinates.keyBounds[1]), StackedCoordinates.keyBounds[0])
+
+    # True where a sorts before b, with NaN after every number
+    @staticmethod
+    def _sortsBefore(a, b):
+
+        return (a < b) | (np.isnan(b) & ~np.isnan(a))
+
+    def __len__(self):
+
+        return len(self.lengths)
+
+    # Estimate points on many sets at once with linear interpolation
+    # Gives the same values as interpolateMany of each set
+    # @param:  sets     = numpy array of indices of sets, one for each row of targetXs
+    #          targetXs = numpy array of x values (rows x targets)
+    # @return: numpy array of estimated y values (rows x targets),
+    #          numpy array of booleans, True for rows where interpolateMany would divide by zero
+    def interpolateMany(self, sets, targetXs):
+
+        targetXs = np.asarray(targetXs, dtype=float)
+        runningMax = self._runningMax
+
+        starts = self.starts[sets][:, None]
+        lengths = self.lengths[sets][:, None]
+        ends = starts + lengths
+
+        # Offsets can round targets near a running maximum to the other side of it,
+        # so the search is corrected until it matches searching the set on its own
+        indices = np.searchsorted(self._keys, StackedCoordinates._searchKeys(targetXs) + self._offsets[sets][:, None],
+                                  side="left")
+        np.maximum(indices, starts, out=indices)
+        np.minimum(indices, ends, out=indices)
+
+        # Comparisons only need to handle NaN when there is any
+        if self._hasNaN or np.isnan(targetXs).any():
+            sortsBefore = StackedCoordinates._sortsBefore
+        else:
+            sortsBefore = np.less
+
+        while True:
+
+            # Index before the first set reads the extra value at the end, which is never used
+            before = ~sortsBefore(runningMax[indices - 1], targetXs)
+            before &= indices > starts
+
+            after = sortsBefore(runningMax[indices], targetXs)
+            after &= indices < ends
+
+            if not (before.any() or after.any()):
+                break
+
+            indices -= before
+            indices += after
+
+        upperBoundIndices = indices - starts
+
+        # Index past the end wraps around to last segment like Coordinates.interpolate
+        upperBoundIndices[upperBoundIndices == lengths] = 0
+
+        # Exceptions in reverse order of precedence used by Coordinates.interpolate
+        greater = targetXs > 1
+
+        if greater.any():
+            upperBoundIndices = np.where(greater, lengths - 1, upperBoundIndices)
+
+        upperBoundIndices[targetXs < 0] = 1
+        upperBoundIndices[targetXs == self.xVals[starts]] = 1
+
+        # Index before the first point is the last point of the same set
+        lowerBoundIndices = upperBoundIndices - 1
+        lowerBoundIndices += lengths * (upperBoundIndices == 0)
+
+        upperBoundIndices += starts
+        lowerBoundIndices += starts
+
+        upperBoundX = self.xVals[upperBoundIndices]
+        lowerBoundX = self.xVals[lowerBoundIndices]
+
+        upperBoundY = self.yVals[upperBoundIndices]
+        lowerBoundY = self.yVals[lowerBoundIndices]
+        failed = (upperBoundX == lowerBoundX).any(axis=1)
+
+        # Find slope between upper and lower bound x values
+        with np.errstate(divide="ignore", invalid="ignore"):
+
+            slopes = (upperBoundY - lowerBoundY) / (upperBoundX - lowerBoundX)
+
+            return lowerBoundY + ((targetXs - lowerBoundX) * slopes), failed
@@ -1,92 +1,659 @@
-import math
-from coordinates import Coordinates
-from airfoil import Airfoil
-
-class CST:
-
-    # Create a set of airfoil coordinates using CST (Class-Shape Transformation)
-    # parametrization method
-    # @param:  weightsLower = list of CST weights for lower surface
-    #          weightsUpper = list of CST weights for upper surface
-    #          dz           = trailing edge thickness
-    #          numVals      = number of unique values to find
-    #          xVals        = list of x values to find y values for
-    # @return: Coordinates
-    @staticmethod
-    def genCoordinates(weightsLower, weightsUpper, dz, numVals, xVals=[]):
-
-        if len(xVals) == 0:
-
-            for i in range(numVals):
-                zeta = (2 * math.pi / numVals) * i
-                xVals.append(0.5 * (math.cos(zeta) + 1))
-
-        # Used to separate lower and upper surfaces
-        zeroIndex = -1
-
-        for i in range(numVals):
-
-            if xVals[i] == 0:
-                zeroIndex = i
-                break
-
-        if zeroIndex == -1:
-            raise NameError("No zero value found in x values")
-
-        # Lower and upper values of x
-        xValsLower = xVals[:zeroIndex]
-        xValsUpper = xVals[zeroIndex:]
-
-        # Find surface y coordinates
-        yLowerVals = CST.classShape(weightsLower, dz, xValsLower)
-        yUpperVals = CST.classShape(weightsUpper, dz, xValsUpper)
-
-        # Negate y lower values
-        for i in range(len(yLowerVals)):
-            yLowerVals[i] = -yLowerVals[i]
-
-        # Combine all y values
-        yVals = yLowerVals + yUpperVals
-
-        # Return coordinates
-        return Coordinates(xVals, yVals)
-
-    # Calculates class and shape functions
-    # @param:  weights = list CST weights for
-    #          dz      = trailing edge thickness
-    #          xVals   = list of x values to find y values for
-    # @return: yVals   = list of y values
-    @staticmethod
-    def classShape(weights, dz, xVals):
-
-        # Class function; taking N1 and N2
-        classList = []
-
-        for i in range(len(xVals)):
-            classList.append((xVals[i] ** Airfoil.N1) * ((1 - xVals[i]) ** Airfoil.N2))
-
-        # Shape function; using Bernstein Polynomials
-        # Order of Bernstein Polynomials
-        n = len(weights) - 1
-
-        kVals = []
-
-        for i in range(n + 1):
-            kVals.append(math.factorial(n) / (math.factorial(i) * (math.factorial(n - i))))
-
-        shapeList = []
-
-        for i in range(len(xVals)):
-
-            shapeList.append(0)
-
-            for j in range(n + 1):
-                shapeList[i] = shapeList[i] + weights[j] * kVals[j] * (xVals[i] ** j) * ((1 - xVals[i]) ** (n - j))
-
-        # Calculate y output
-        yVals = []
-
-        for i in range(len(xVals)):
-            yVals.append((classList[i] * shapeList[i]) + (xVals[i] * dz))
-
-        return yVals
\ No newline at end of file
+import math
+from collections import OrderedDict
+from coordinates import Coordinates
+from airfoil import Airfoil, BatchData
+from numerics import solveTridiagonal
+import numpy as np
+
+class CST:
+
+    # Most class function and Bernstein basis pairs kept by CST.basis
+    maxCachedBases = 64
+
+    # Cached class function and Bernstein basis pairs, least recently used first
+    cachedBases = OrderedDict()
+
+    # Cached tables of CST.shapeTable by order
+    cachedShapeTables = {}
+
+    # Convergence threshold of CST.process, surfaces are exact so it can be much
+    # tighter than Airfoil.thicknessConvergenceThreshold
+    analyticTolerance = 1e-12
+
+    # Largest offset of CST._convergeSurfacePoints after which one more Newton step is
+    # certain to land well within CST.analyticTolerance, so it needs no new evaluation
+    linearTolerance = 1e-8
+
+    # Create a set of airfoil coordinates using CST (Class-Shape Transformation)
+    # parametrization method
+    # @param:  weightsLower = list of CST weights for lower surface
+    #          weightsUpper = list of CST weights for upper surface
+    #          dz           = trailing edge thickness
+    #          numVals      = number of unique values to find
+    #          xVals        = list or array of x values to find y values for
+    # @return: Coordinates
+    @staticmethod
+    def genCoordinates(weightsLower, weightsUpper, dz, numVals, xVals=None):
+
+        return CST.genCoordinatesBatch([weightsLower], [weightsUpper], dz, numVals, xVals)[0]
+
+    # Create sets of airfoil coordinates for many sets of weights, like genCoordinates for each
+    # Every airfoil shares the x values, so each surface is one matrix product on the cached basis
+    # @param:  weightsLower = 2D array with one row of CST weights for lower surface per airfoil
+    #          weightsUpper = 2D array with one row of CST weights for upper surface per airfoil
+    #          dz           = trailing edge thickness, or array with one per airfoil
+    #          numVals      = number of unique values to find
+    #          xVals        = list or array of x values to find y values for
+    # @return: list of Coordinates
+    @staticmethod
+    def genCoordinatesBatch(weightsLower, weightsUpper, dz, numVals, xVals=None):
+
+        if xVals is None or len(xVals) == 0:
+
+            zetas = (2 * math.pi / numVals) * np.arange(numVals)
+            xVals = 0.5 * (np.cos(zetas) + 1)
+
+        xVals = np.asarray(xVals, dtype=float)
+
+        # Used to separate lower and upper surfaces
+        zeroIndices = np.flatnonzero(xVals[:numVals] == 0)
+
+        if len(zeroIndices) == 0:
+            raise NameError("No zero value found in x values")
+
+        zeroIndex = zeroIndices[0]
+
+        # Negate y lower values
+        yVals = np.empty((len(weightsLower), len(xVals)))
+        yVals[:, :zeroIndex] = -CST.evaluate(np.asarray(weightsLower, dtype=float), dz, xVals[:zeroIndex])
+        yVals[:, zeroIndex:] = CST.evaluate(np.asarray(weightsUpper, dtype=float), dz, xVals[zeroIndex:])
+
+        return [Coordinates(xVals, row) for row in yVals]
+
+    # Calculates class and shape functions
+    # @param:  weights = list CST weights for
+    #          dz      = trailing edge thickness
+    #          xVals   = list of x values to find y values for
+    # @return: yVals   = list of y values
+    @staticmethod
+    def classShape(weights, dz, xVals):
+
+        return CST.evaluate(weights, dz, xVals).tolist()
+
+    # Class function and Bernstein basis matrix for a set of x values
+    # Cached by x values, order and N1/N2 so repeated evaluations
+    # on the same x values only cost a matrix product
+    # @param:  xVals = list or array of x values
+    #          order = order of Bernstein polynomials, one less than number of weights
+    # @return: numpy array of class function values (points),
+    #          numpy array of Bernstein polynomial values (points x order + 1)
+    @staticmethod
+    def basis(xVals, order):
+
+        xVals = np.asarray(xVals, dtype=float)
+        key = (xVals.tobytes(), order, Airfoil.N1, Airfoil.N2)
+
+        cached = CST.cachedBases.get(key)
+
+        if cached is not None:
+            CST.cachedBases.move_to_end(key)
+            return cached
+
+        # Class function; taking N1 and N2
+        classVals = (xVals ** Airfoil.N1) * ((1 - xVals) ** Airfoil.N2)
+
+        # Bernstein polynomials, one column for each weight
+        k = np.arange(order + 1)
+        binomials = np.array([math.comb(order, i) for i in range(order + 1)], dtype=float)
+        bernstein = binomials * (xVals[:, None] ** k) * ((1 - xVals[:, None]) ** (order - k))
+
+        # Cached arrays are shared, so keep them from being changed
+        classVals.flags.writeable = False
+        bernstein.flags.writeable = False
+
+        CST.cachedBases[key] = (classVals, bernstein)
+
+        if len(CST.cachedBases) > CST.maxCachedBases:
+            CST.cachedBases.popitem(last=False)
+
+        return classVals, bernstein
+
+    # Evaluate class and shape functions for one or many sets of weights
+    # @param:  weights = list of CST weights, or 2D array with one row of weights per candidate
+    #          dz      = trailing edge thickness, or array with one per candidate
+    #          xVals   = list or array of x values to find y values for
+    # @return: numpy array of y values, (candidates x points) when weights is 2D
+    @staticmethod
+    def evaluate(weights, dz, xVals):
+
+        weights = np.asarray(weights, dtype=float)
+        xVals = np.asarray(xVals, dtype=float)
+
+        classVals, bernstein = CST.basis(xVals, weights.shape[-1] - 1)
+
+        # Shape function for every candidate as one matrix product
+        yVals = (weights @ bernstein.T) * classVals
+
+        if weights.ndim == 1:
+            return yVals + (xVals * dz)
+
+        return yVals + np.outer(np.broadcast_to(np.asarray(dz, dtype=float), len(weights)), xVals)
+
+    # Raise the order of CST weights without changing the surface they give
+    # Each step turns the n + 1 weights of order n into the n + 2 weights of order n + 1
+    # @param:  weights = list of CST weights, or 2D array with one row of weights per candidate
+    #          order   = order wanted, at least one less than number of weights
+    # @return: numpy array of weights, with a row per candidate when weights is 2D
+    @staticmethod
+    def elevate(weights, order):
+
+        weights = np.asarray(weights, dtype=float)
+
+        for n in range(weights.shape[-1] - 1, order):
+
+            fractions = np.arange(1, n + 1) / (n + 1)
+            inner = (fractions * weights[..., :-1]) + ((1 - fractions) * weights[..., 1:])
+
+            weights = np.concatenate((weights[..., :1], inner, weights[..., -1:]), axis=-1)
+
+        return weights
+
+    # Table turning weights into polynomial coefficients of the shape function and its slope
+    # Bernstein polynomials are expanded with the binomial theorem once for each order,
+    # so the coefficients of any set of weights are one matrix product
+    # @param:  order = order of Bernstein polynomials, one less than number of weights
+    # @return: numpy array (weights x 2 x order + 1), shape function coefficients then slope
+    #          coefficients for each weight, highest power first like numpy.polyval
+    @staticmethod
+    def shapeTable(order):
+
+        table = CST.cachedShapeTables.get(order)
+
+        if table is not None:
+            return table
+
+        table = np.zeros((order + 1, 2, order + 1))
+
+        # x^i (1 - x)^(order - i) expanded with the binomial theorem
+        for i in range(order + 1):
+            for j in range(i, order + 1):
+                table[i, 0, order - j] = math.comb(order, i) * math.comb(order - i, j - i) * ((-1) ** (j - i))
+
+        # Slopes like numpy.polyder, padded with a zero highest power
+        table[:, 1, 1:] = table[:, 0, :-1] * np.arange(order, 0, -1)
+
+        # Cached arrays are shared, so keep them from being changed
+        table.flags.writeable = False
+
+        CST.cachedShapeTables[order] = table
+
+        return table
+
+    # Shape function of a set of weights as polynomial coefficients in x
+    # Bernstein sums are expanded once so solvers can evaluate the shape
+    # function and its slope at new x values with a few multiplications
+    # @param:  weights = list of CST weights
+    # @return: numpy array of coefficients, highest power first like numpy.polyval
+    @staticmethod
+    def shapeCoefficients(weights):
+
+        weights = np.asarray(weights, dtype=float)
+
+        return weights @ CST.shapeTable(len(weights) - 1)[:, 0]
+
+    # Shape functions of the upper and lower surfaces of many airfoils for CST._surfacePoints
+    # @param:  weightsLower = 2D array with one row of CST weights for lower surface per airfoil
+    #          weightsUpper = 2D array with one row of CST weights for upper surface per airfoil
+    #          dz           = numpy array of trailing edge thickness of each airfoil
+    # @return: numpy array (surfaces x airfoils x 2 x 1 x order + 1) of polynomial coefficients of shape
+    #          functions then their slopes, upper surface first and lower surface negated,
+    #          numpy array (surfaces x airfoils x 1) of trailing edge thicknesses, lower surface negated
+    @staticmethod
+    def _surfaceCoefficients(weightsLower, weightsUpper, dz):
+
+        # Surfaces with fewer weights are raised to the order of the other
+        order = max(weightsLower.shape[1], weightsUpper.shape[1]) - 1
+        weights = np.stack((CST.elevate(weightsUpper, order), -CST.elevate(weightsLower, order)))
+        table = CST.shapeTable(weights.shape[2] - 1)
+
+        coefficients = (weights @ table.reshape(len(table), -1)).reshape(2, len(dz), 2, 1, -1)
+
+        return coefficients, np.stack((dz, -dz))[:, :, None]
+
+    # Points on CST surfaces and their derivatives, from a parameter u with x = u^2
+    # The square root in the class function is smooth in u, so the surface continues
+    # smoothly around the leading edge for negative u instead of ending at x = 0
+    # Upper and lower surfaces of many airfoils are found together, uVals being
+    # (surfaces x airfoils x points) with the upper surface first
+    # @param:  coefficients = shape function coefficients from CST._surfaceCoefficients
+    #          dz           = trailing edge thicknesses from CST._surfaceCoefficients
+    #          uVals        = numpy array of parameter values, square roots of x on the surface itself
+    # @return: numpy arrays of x values, y values, dx/du and dy/du
+    @staticmethod
+    def _surfacePoints(coefficients, dz, uVals):
+
+        uVals = np.maximum(np.minimum(uVals, 1), -1)
+        xVals = uVals ** 2
+
+        # Shape functions and their slopes together by Horner's rule, like numpy.polyval
+        shapes = coefficients[..., 0]
+        xColumns = xVals[:, :, None]
+
+        for power in range(1, coefficients.shape[-1]):
+            shapes = (shapes * xColumns) + coefficients[..., power]
+
+        shapeVals = shapes[:, :, 0]
+        shapeSlopes = shapes[:, :, 1]
+
+        # Usual class function u (1 - x) needs no powers
+        if Airfoil.N1 == 0.5 and Airfoil.N2 == 1:
+
+            tailVals = 1 - xVals
+
+            yVals = (uVals * tailVals * shapeVals) + (xVals * dz)
+            ySlopes = ((1 - 3 * xVals) * shapeVals) + (2 * ((xVals * tailVals * shapeSlopes) + (uVals * dz)))
+
+            return xVals, yVals, 2 * uVals, ySlopes
+
+        # Class function with x^N1 written as sign(u) |u|^(2 N1)
+        absUVals = np.abs(uVals)
+        noseVals = np.sign(uVals) * (absUVals ** (2 * Airfoil.N1))
+        noseSlopes = 2 * Airfoil.N1 * (absUVals ** (2 * Airfoil.N1 - 1))
+        tailVals = (1 - xVals) ** Airfoil.N2
+        tailSlopes = -2 * Airfoil.N2 * ((1 - xVals) ** (Airfoil.N2 - 1)) * uVals
+
+        yVals = (noseVals * tailVals * shapeVals) + (xVals * dz)
+        ySlopes = ((noseSlopes * tailVals * shapeVals) + (noseVals * tailSlopes * shapeVals) +
+                   (2 * uVals * ((noseVals * tailVals * shapeSlopes) + dz)))
+
+        return xVals, yVals, 2 * uVals, ySlopes
+
+    # Process a CST airfoil straight from its weights
+    # Same perpendicular construction as Airfoil.process, with the mean camber line at each
+    # chordwise x value moved up or down until it is halfway between the surfaces along its
+    # perpendicular, perpendiculars coming from the slopes between neighbouring points
+    # Surface points are found on the exact surfaces by Newton steps with exact slopes,
+    # and the mean camber line by Newton steps on all points at once, as each point only
+    # depends on itself and its neighbours, so it settles in a few iterations where
+    # updating every point on its own stops converging once semi-thicknesses are larger
+    # than the spacing near the leading edge
+    # @param:  weightsLower          = list of CST weights for lower surface
+    #          weightsUpper          = list of CST weights for upper surface
+    #          dz                    = trailing edge thickness
+    #          numberChordwisePoints = Integer number of points wanted on chord
+    #          airfoil               = Airfoil the data is for, None to make a CSTAirfoil from the weights
+    #          spacing               = how chordwise points are spread, see Airfoil.chordwiseXVals
+    # @return: AirfoilData object
+    @staticmethod
+    def process(weightsLower, weightsUpper, dz, numberChordwisePoints, airfoil=None, spacing="uniform"):
+
+        # Coordinates of an airfoil made from the weights are only generated for adaptive
+        # spacing or when the warm start is used to reprocess an edited airfoil
+        points = None
+
+        if airfoil is None:
+            airfoil = CSTAirfoil(weightsLower, weightsUpper, dz, 2 * (numberChordwisePoints - 1))
+            points = airfoil.genPoints
+
+        result = BatchData([airfoil], numberChordwisePoints)
+        result.chordwiseXVals[0] = Airfoil.chordwiseXVals(numberChordwisePoints, spacing,
+                                                          airfoil.coordinates if spacing == "adaptive" else None)
+
+        xVals = result.chordwiseXVals[0]
+
+        # Lower surface is negated like in genCoordinates
+        yUpperVals = CST.evaluate(weightsUpper, dz, xVals)
+        yLowerVals = -CST.evaluate(weightsLower, dz, xVals)
+
+        coefficients, surfaceDz = CST._surfaceCoefficients(np.array([weightsLower], dtype=float),
+                                                           np.array([weightsUpper], dtype=float),
+                                                           np.array([dz], dtype=float))
+
+        yMeanCamberLineVals, upperSemiThicknesses, lowerSemiThicknesses = CST._converge(
+            result, coefficients, surfaceDz, yUpperVals[None], yLowerVals[None])
+
+        return Airfoil.dataFromSolution(airfoil, xVals, yUpperVals, yLowerVals, xVals, yMeanCamberLineVals[0],
+                                        upperSemiThicknesses[0], lowerSemiThicknesses[0], points)
+
+    # Process many CST airfoils together straight from their weights, like CST.process for each
+    # Every airfoil is stacked into (airfoils x points) arrays and iterated until its own mean
+    # camber line converges, so each row is the same as processing that airfoil on its own
+    # @param:  weightsLower          = 2D array with one row of CST weights for lower surface per airfoil
+    #          weightsUpper          = 2D array with one row of CST weights for upper surface per airfoil
+    #          dz                    = trailing edge thickness, or array with one per airfoil
+    #          numberChordwisePoints = Integer number of points wanted on chord, the same for every airfoil
+    #          airfoils              = list of Airfoil objects the data is for, None to make them from the weights
+    #          spacing               = how chordwise points are spread, see Airfoil.chordwiseXVals
+    # @return: BatchData object
+    @staticmethod
+    def processBatch(weightsLower, weightsUpper, dz, numberChordwisePoints, airfoils=None, spacing="uniform"):
+
+        weightsLower = np.asarray(weightsLower, dtype=float)
+        weightsUpper = np.asarray(weightsUpper, dtype=float)
+
+        count = len(weightsLower)
+        dz = np.broadcast_to(np.asarray(dz, dtype=float), count)
+
+        if airfoils is None:
+            airfoils = [Airfoil("CST", coordinates) for coordinates in
+                        CST.genCoordinatesBatch(weightsLower, weightsUpper, dz, 2 * (numberChordwisePoints - 1))]
+
+        result = BatchData(airfoils, numberChordwisePoints)
+
+        if count == 0:
+            return result
+
+        # Lower surface is negated like in genCoordinates
+        if spacing == "adaptive":
+
+            for index, airfoil in enumerate(airfoils):
+                result.chordwiseXVals[index] = Airfoil.chordwiseXVals(numberChordwisePoints, spacing,
+                                                                      airfoil.coordinates)
+
+            yUpperVals = np.array([CST.evaluate(weights, dzVal, xVals) for weights, dzVal, xVals in
+                                   zip(weightsUpper, dz, result.chordwiseXVals)])
+            yLowerVals = -np.array([CST.evaluate(weights, dzVal, xVals) for weights, dzVal, xVals in
+                                    zip(weightsLower, dz, result.chordwiseXVals)])
+
+        else:
+
+            result.chordwiseXVals[:] = Airfoil.chordwiseXVals(numberChordwisePoints, spacing)
+
+            yUpperVals = CST.evaluate(weightsUpper, dz, result.chordwiseXVals[0])
+            yLowerVals = -CST.evaluate(weightsLower, dz, result.chordwiseXVals[0])
+
+        coefficients, surfaceDz = CST._surfaceCoefficients(weightsLower, weightsUpper, dz)
+
+        yMeanCamberLineVals, upperSemiThicknesses, lowerSemiThicknesses = CST._converge(
+            result, coefficients, surfaceDz, yUpperVals, yLowerVals)
+
+        result.finish(yUpperVals, yLowerVals, result.chordwiseXVals.copy(), yMeanCamberLineVals,
+                      upperSemiThicknesses, lowerSemiThicknesses)
+
+        return result
+
+    # Converge the mean camber lines of CST.processBatch
+    # Rows stop iterating once their own mean camber line converges, leaving the rest to carry on
+    # @param:  result       = BatchData with the chordwise x values of each airfoil,
+    #                         given the iterations run and whether each airfoil converged
+    #          coefficients = shape function coefficients from CST._surfaceCoefficients
+    #          dz           = trailing edge thicknesses from CST._surfaceCoefficients
+    #          yUpperVals   = numpy array of upper surface y values at the chordwise x values
+    #          yLowerVals   = numpy array of lower surface y values at the chordwise x values, negated
+    # @return: numpy arrays of mean camber line y values, upper semi-thicknesses
+    #          and lower semi-thicknesses, negated
+    @staticmethod
+    def _converge(result, coefficients, dz, yUpperVals, yLowerVals):
+
+        count, numberChordwisePoints = yUpperVals.shape
+        xVals = result.chordwiseXVals
+
+        # Initial estimate for mean camber line using average of surfaces
+        yMeanCamberLineVals = (yUpperVals + yLowerVals) / 2
+
+        # Surface parameters start at the surface points above and below each x value
+        uVals = np.sqrt(np.stack((xVals, xVals)))
+        semiThicknesses = np.zeros((2, count, numberChordwisePoints))
+
+        # Rows of airfoils still iterating
+        active = np.arange(count)
+
+        for iteration in range(Airfoil.maxMeanCamberLineIterations):
+
+            # Views instead of copies while every airfoil is iterating
+            rows = active if len(active) < count else slice(None)
+
+            result.iterations[rows] = iteration + 1
+
+            xMeanCamberLine = xVals[rows]
+            yMeanCamberLine = yMeanCamberLineVals[rows]
+
+            cosAngles, sinAngles = Airfoil.meanCamberLineDirections(xMeanCamberLine, yMeanCamberLine)
+
+            uVals[:, rows], semiThicknesses[:, rows], changes = CST._convergeSurfacePoints(
+                coefficients[:, rows], dz[:, rows], uVals[:, rows], cosAngles, sinAngles,
+                xMeanCamberLine, yMeanCamberLine)
+
+            # Distance of the midpoint of surface points from the mean camber line
+            offsets = semiThicknesses[:, rows].sum(axis=0) / 2
+
+            # Done when every mean camber line point is halfway between the surfaces
+            converged = np.abs(offsets).max(axis=1) < CST.analyticTolerance
+
+            result.converged[rows] = converged
+
+            # Changes in offsets with the y value of each point and with the angles at its neighbours
+            # End angles are fixed
+            changesY, changesAngle, parameterChangesY, parameterChangesAngle = changes
+
+            offsetChangesY = changesY.sum(axis=0) / 2
+            offsetChangesAngle = changesAngle.sum(axis=0) / 2
+
+            slopes = -cosAngles[:, 1:-1] / sinAngles[:, 1:-1]
+            angleChanges = np.zeros(offsets.shape)
+            angleChanges[:, 1:-1] = 1 / ((1 + slopes ** 2) * (xMeanCamberLine[:, 2:] - xMeanCamberLine[:, :-2]))
+
+            # Tridiagonal Newton step, offsets of a point change with the points before and after it
+            belowDiagonal = -offsetChangesAngle * angleChanges
+            aboveDiagonal = offsetChangesAngle * angleChanges
+
+            # Perpendicular at the leading edge is tangent to both surfaces, so its
+            # point is kept where the surfaces meet instead
+            offsetChangesY[:, 0], aboveDiagonal[:, 0], offsets[:, 0] = 1, 0, yMeanCamberLine[:, 0]
+
+            # Converged mean camber lines are left as they are
+            steps = solveTridiagonal(belowDiagonal, offsetChangesY, aboveDiagonal, offsets)
+            steps[converged] = 0
+
+            yMeanCamberLineVals[rows] = yMeanCamberLine - steps
+
+            # Surface points slide along the surfaces with the step, so the next
+            # search starts from where the step moves them to
+            angleSteps = np.zeros(offsets.shape)
+            angleSteps[:, 1:-1] = angleChanges[:, 1:-1] * (steps[:, 2:] - steps[:, :-2])
+
+            uVals[:, rows] -= (parameterChangesY * steps) + (parameterChangesAngle * angleSteps)
+
+            active = active[~converged]
+
+            if len(active) == 0:
+                break
+
+        return yMeanCamberLineVals, semiThicknesses[0], semiThicknesses[1]
+
+    # Find points of CST surfaces on the perpendiculars to mean camber lines
+    # Newton steps on the surface parameter of CST._surfacePoints using exact derivatives,
+    # every airfoil stepping until both of its surfaces are on its perpendiculars
+    # @param:  coefficients         = shape function coefficients from CST._surfaceCoefficients
+    #          dz                   = trailing edge thicknesses from CST._surfaceCoefficients
+    #          uVals                = numpy array of starting surface parameters (surfaces x airfoils x points)
+    #          cosAngles            = cosines of perpendicular angles to mean camber lines
+    #          sinAngles            = sines of perpendicular angles to mean camber lines
+    #          xMeanCamberLinesVals = numpy array of x values of current mean camber lines
+    #          yMeanCamberLinesVals = numpy array of y values of current mean camber lines
+    # @return: numpy array of surface parameters,
+    #          numpy array of distances from mean camber line to surface along the perpendiculars,
+    #          (numpy array of changes of distances with mean camber line y values,
+    #           numpy array of changes of distances with perpendicular angles)
+    @staticmethod
+    def _convergeSurfacePoints(coefficients, dz, uVals, cosAngles, sinAngles,
+                               xMeanCamberLinesVals, yMeanCamberLinesVals):
+
+        uVals = uVals.copy()
+
+        for iteration in range(Airfoil.maxInnerIterations):
+
+            xVals, yVals, xSlopes, ySlopes = CST._surfacePoints(coefficients, dz, uVals)
+
+            # Distance of the surface points off the perpendiculars
+            offsets = ((xVals - xMeanCamberLinesVals) * sinAngles) - ((yVals - yMeanCamberLinesVals) * cosAngles)
+            gradients = (xSlopes * sinAngles) - (ySlopes * cosAngles)
+
+            # Airfoils with both surfaces on the perpendiculars keep their parameters
+            moving = ~(np.abs(offsets).max(axis=(0, 2)) < CST.analyticTolerance)
+
+            if not moving.any():
+                break
+
+            # Points with a zero gradient keep their parameter
+            movable = (gradients != 0) & moving[:, None]
+            steps = np.divide(offsets, gradients, out=np.zeros(offsets.shape), where=movable)
+            uVals -= steps
+
+            # The last step is small enough that moving the points along their tangents
+            # is as exact as evaluating the surfaces again
+            if np.abs(offsets).max() < CST.linearTolerance:
+                xVals = xVals - (xSlopes * steps)
+                yVals = yVals - (ySlopes * steps)
+                break
+
+        semiThicknesses = ((xVals - xMeanCamberLinesVals) * cosAngles) + ((yVals - yMeanCamberLinesVals) * sinAngles)
+
+        # Moving the mean camber line point or turning the perpendicular slides the surface
+        # point along the surface, by how far the perpendicular moves across the surface
+        # divided by how steeply it crosses it
+        normalSlopes = (xSlopes * cosAngles) + (ySlopes * sinAngles)
+        gradients[gradients == 0] = np.inf
+
+        parameterChangesY = -cosAngles / gradients
+        parameterChangesAngle = -semiThicknesses / gradients
+
+        return uVals, semiThicknesses, (normalSlopes * parameterChangesY - sinAngles,
+                                        normalSlopes * parameterChangesAngle,
+                                        parameterChangesY, parameterChangesAngle)
+
+    # Fit CST weights to a set of airfoil coordinates
+    # Surfaces are split at the smallest x value and the surface with the larger
+    # average y value is used as the upper surface
+    # Weights and dz are found together by linear least squares on the
+    # cached basis, refinement then reweights points by surface slope so
+    # distance normal to the surface is minimized instead of vertical distance
+    # @param:  coordinates = Coordinates of airfoil
+    #          order       = order of Bernstein polynomials, one less than number of weights
+    #          refine      = number of refinement iterations, 0 for linear fit only
+    # @return: CSTFit
+    @staticmethod
+    def fit(coordinates, order, refine=0):
+
+        xVals = np.asarray(coordinates.xVals, dtype=float)
+        yVals = np.asarray(coordinates.yVals, dtype=float)
+
+        # Both surfaces include the leading edge point
+        leadingEdgeIndex = int(np.argmin(xVals))
+
+        firstX, firstY = xVals[:leadingEdgeIndex + 1], yVals[:leadingEdgeIndex + 1]
+        secondX, secondY = xVals[leadingEdgeIndex:], yVals[leadingEdgeIndex:]
+
+        if np.mean(firstY) >= np.mean(secondY):
+            xUpper, yUpper, xLower, yLower = firstX, firstY, secondX, secondY
+        else:
+            xUpper, yUpper, xLower, yLower = secondX, secondY, firstX, firstY
+
+        # Design matrix with columns for lower weights, upper weights and dz
+        # Lower surface is negated like in genCoordinates
+        classUpper, bernsteinUpper = CST.basis(xUpper, order)
+        classLower, bernsteinLower = CST.basis(xLower, order)
+
+        weightCount = order + 1
+
+        matrix = np.zeros((len(xUpper) + len(xLower), 2 * weightCount + 1))
+        matrix[:len(xUpper), weightCount:2 * weightCount] = bernsteinUpper * classUpper[:, None]
+        matrix[:len(xUpper), -1] = xUpper
+        matrix[len(xUpper):, :weightCount] = -bernsteinLower * classLower[:, None]
+        matrix[len(xUpper):, -1] = -xLower
+
+        xAll = np.concatenate((xUpper, xLower))
+        yAll = np.concatenate((yUpper, yLower))
+
+        solution = np.linalg.lstsq(matrix, yAll, rcond=None)[0]
+
+        for i in range(refine):
+
+            pointWeights = CST._normalWeights(matrix @ solution, xUpper, xLower)
+
+            newSolution = np.linalg.lstsq(matrix * pointWeights[:, None], yAll * pointWeights, rcond=None)[0]
+
+            change = np.max(np.abs(newSolution - solution))
+            solution = newSolution
+
+            if change < 1e-12:
+                break
+
+        yFit = matrix @ solution
+        residuals = yAll - yFit
+
+        return CSTFit(solution[:weightCount].tolist(), solution[weightCount:2 * weightCount].tolist(),
+                      float(solution[-1]), xAll, residuals,
+                      residuals * CST._normalWeights(yFit, xUpper, xLower))
+
+    # Factors turning vertical distances into distances normal to fitted surfaces
+    # @param:  yFit   = numpy array of fitted y values, upper surface first
+    #          xUpper = numpy array of upper surface x values
+    #          xLower = numpy array of lower surface x values
+    # @return: numpy array of factors for each point
+    @staticmethod
+    def _normalWeights(yFit, xUpper, xLower):
+
+        # Slope of fitted surfaces at each point
+        slopes = np.concatenate((np.gradient(yFit[:len(xUpper)], xUpper),
+                                 np.gradient(yFit[len(xUpper):], xLower)))
+
+        return 1 / np.sqrt(1 + np.nan_to_num(slopes, nan=0, posinf=1e12, neginf=-1e12) ** 2)
+
+class CSTAirfoil(Airfoil):
+
+    # Airfoil made from CST weights, its coordinates are only generated when first used
+    # @param: weightsLower = list of CST weights for lower surface
+    #         weightsUpper = list of CST weights for upper surface
+    #         dz           = trailing edge thickness
+    #         numVals      = number of unique values of the coordinates, see CST.genCoordinates
+    #         name         = name of airfoil
+    def __init__(self, weightsLower, weightsUpper, dz, numVals, name="CST"):
+        self.name = name
+
+        self.weightsLower = weightsLower
+        self.weightsUpper = weightsUpper
+        self.dz           = dz
+        self.numVals      = numVals
+
+        self._coordinates = None
+
+    # Coordinates, generated from the weights the first time they are used
+    @property
+    def coordinates(self):
+
+        if self._coordinates is None:
+            self._coordinates = CST.genCoordinates(self.weightsLower, self.weightsUpper, self.dz, self.numVals)
+
+        return self._coordinates
+
+    @coordinates.setter
+    def coordinates(self, coordinates):
+
+        self._coordinates = coordinates
+
+    # Points of coordinates newly generated from the weights, not changed by edits to coordinates
+    # @return: numpy array with x values in row 0 and y values in row 1
+    def genPoints(self):
+
+        return CST.genCoordinates(self.weightsLower, self.weightsUpper, self.dz, self.numVals).points
+
+class CSTFit:
+
+    # Result of fitting CST weights to airfoil coordinates
+    # @param: weightsLower = list of CST weights for lower surface
+    #         weightsUpper = list of CST weights for upper surface
+    #         dz           = trailing edge thickness
+    #         xVals        = numpy array of x values of fitted points, upper surface first
+    #         residuals       = numpy array of vertical distances from points to fitted surfaces
+    #         normalResiduals = numpy array of distances normal to fitted surfaces
+    def __init__(self, weightsLower, weightsUpper, dz, xVals, residuals, normalResiduals):
+        self.weightsLower      = weightsLower
+        self.weightsUpper      = weightsUpper
+        self.dz                = dz
+        self.xVals             = xVals
+        self.residuals         = residuals
+        self.normalResiduals   = normalResiduals
+        self.rmsResidual       = float(np.sqrt(np.mean(residuals ** 2)))
+        self.maxResidual       = float(np.max(np.abs(residuals)))
+        self.rmsNormalResidual = float(np.sqrt(np.mean(normalResiduals ** 2)))
@@ -0,0 +1,176 @@
+import gzip
+import os
+import sys
+import numpy as np
+
+# Formats coordinates can be exported in
+# "comma" is the format of Airfoil.saveCoordinates, "selig" a name line then space separated coordinates
+# and "npz" a NumPy archive holding many airfoils as three arrays
+EXPORT_FORMATS = ["comma", "selig", "npz"]
+
+# Ending of exported files of each format
+FORMAT_SUFFIXES = {"comma": ".dat", "selig": ".dat", "npz": ".npz"}
+
+# Text of a set of coordinates, formatted in one operation
+# @param:  name        = name of airfoil, the first line of "selig"
+#          coordinates = Coordinates
+#          format      = "comma" or "selig"
+# @return: text
+def formatCoordinates(name, coordinates, format="comma"):
+
+    points = coordinates.points
+
+    if format == "comma":
+
+        # Closing line repeats the first coordinate like saveCoordinates always has
+        values = tuple(points.T.ravel().tolist()) + (points[0, 0], points[1, 0])
+
+        return ("%.6f,%.6f\n" * (len(coordinates) + 1)) % values
+
+    if format == "selig":
+        return name + "\n" + (" %.6f %.6f\n" * len(coordinates)) % tuple(points.T.ravel().tolist())
+
+    raise ValueError("Unknown coordinate format: " + str(format))
+
+# Open a file for writing text, compressed with gzip if asked
+# @param:  path     = path of file
+#          compress = True to compress with gzip
+# @return: open text file
+def openText(path, compress=False):
+
+    if compress:
+        return gzip.open(path, "wt", newline="")
+
+    return open(path, "w")
+
+# Write many airfoils to one NumPy archive as columns, not one array per airfoil
+# Holds names, number of coordinates of each airfoil and all points end to end
+# @param: file     = path or open binary file
+#         airfoils = iterable of (name, Coordinates)
+#         compress = True to compress the archive
+def saveNpz(file, airfoils, compress=False):
+
+    names = []
+    lengths = []
+    points = []
+
+    for name, coordinates in airfoils:
+
+        names.append(name)
+        lengths.append(len(coordinates))
+        points.append(coordinates.points)
+
+    save = np.savez_compressed if compress else np.savez
+
+    save(file, names=np.array(names, dtype=str), lengths=np.array(lengths, dtype=np.int64),
+         points=np.concatenate(points, axis=1) if points else np.empty((2, 0)))
+
+# Read airfoils from a NumPy archive written by saveNpz
+# @param:  path = path of .npz file
+# @return: generator of (name, numpy array of points with x values in row 0 and y values in row 1)
+def loadNpz(path):
+
+    with np.load(path) as arrays:
+
+        names = arrays["names"].tolist()
+        ends = np.cumsum(arrays["lengths"])
+        points = arrays["points"]
+
+    for name, start, end in zip(names, np.concatenate(([0], ends[:-1])), ends):
+        yield name, points[:, start:end]
+
+# File name an airfoil is exported to
+# @param:  name     = name of airfoil
+#          format   = format in EXPORT_FORMATS
+#          compress = True if text is compressed with gzip
+# @return: file name
+def fileName(name, format="comma", compress=False):
+
+    if format not in FORMAT_SUFFIXES:
+        raise ValueError("Unknown coordinate format: " + str(format))
+
+    return name + FORMAT_SUFFIXES[format] + (".gz" if compress and format != "npz" else "")
+
+# Write one airfoil to any path
+# @param: name        = name of airfoil
+#         coordinates = Coordinates
+#         path        = path of file to write
+#         format      = format in EXPORT_FORMATS
+#         compress    = True to compress text with gzip or the NumPy archive
+def exportCoordinates(name, coordinates, path, format="comma", compress=False):
+
+    if format == "npz":
+        saveNpz(path, [(name, coordinates)], compress)
+        return
+
+    text = formatCoordinates(name, coordinates, format)
+
+    with openText(path, compress) as file:
+        file.write(text)
+
+# Write many airfoils to one file, or to standard output with path None
+# Text formats are written one airfoil after another, which batch.readInputs
+# splits apart again for "selig" since each airfoil starts with its name
+# @param:  airfoils = iterable of (name, Coordinates)
+#          path     = path of file to write, None for standard output
+#          format   = format in EXPORT_FORMATS
+#          compress = True to compress text with gzip or the NumPy archive
+# @return: number of airfoils written
+def exportFile(airfoils, path, format="comma", compress=False):
+
+    count = 0
+
+    def counted():
+
+        nonlocal count
+
+        for airfoil in airfoils:
+            count += 1
+            yield airfoil
+
+    if format == "npz":
+
+        saveNpz(path if path is not None else sys.stdout.buffer, counted(), compress)
+        return count
+
+    if path is None:
+
+        for name, coordinates in counted():
+            sys.stdout.write(formatCoordinates(name, coordinates, format))
+            sys.stdout.flush()
+
+        return count
+
+    with openText(path, compress) as file:
+
+        for name, coordinates in counted():
+            file.write(formatCoordinates(name, coordinates, format))
+
+    return count
+
+# Write one airfoil from an argument tuple, for worker processes
+# @param:  args = directory, format, compress, (name, Coordinates)
+def _exportArgs(args):
+
+    directory, format, compress, (name, coordinates) = args
+
+    exportCoordinates(name, coordinates, os.path.join(directory, fileName(name, format, compress)), format, compress)
+
+# Write each airfoil to its own file in a directory, in parallel with more than one worker
+# @param:  airfoils  = iterable of (name, Coordinates)
+#          directory = folder to write to, created if missing
+#          format    = format in EXPORT_FORMATS
+#          compress  = True to compress text with gzip or the NumPy archives
+#          workers   = number of worker processes, None for one per CPU,
+#                      1 to write in this process
+#          chunkSize = number of airfoils handed to a worker at a time
+# @return: number of files written
+def exportDirectory(airfoils, directory, format="comma", compress=False, workers=1, chunkSize=64):
+
+    from batch import mapReadAhead
+
+    os.makedirs(directory, exist_ok=True)
+
+    tasks = ((directory, format, compress, airfoil) for airfoil in airfoils)
+
+    return sum(1 for result in mapReadAhead(_exportArgs, tasks, workers, chunkSize))
@@ -0,0 +1,572 @@
+from airfoil import Airfoil
+from coordinates import Coordinates
+import argparse
+import export
+import functools
+import math
+import mmap
+import os
+import struct
+import sys
+import numpy as np
+
+# Metrics that can be kept for each airfoil, NaN when not processed
+METRIC_FIELDS = ["maxThickness", "maxThicknessX", "maxCamber", "maxCamberX"]
+
+class AirfoilLibrary:
+
+    # Start of every library file, followed by the format version
+    magic = b"AIRFLIB\0"
+    version = 2
+    header = struct.Struct("<8sI4x")
+
+    # End of every index segment: offset of the segment, number of airfoils in it,
+    # length of its names blob, offset of the footer of the segment before it or 0 and a marker
+    footerMagic = b"AFLIBEND"
+    footer = struct.Struct("<QQQQ8s")
+
+    # Packed library of airfoil coordinates in one file
+    # Layout is a header, one block of float64 x values then y values for each airfoil,
+    # and index segments each ending in a footer, the last footer at the end of the file
+    # A segment holds the offset and number of points of the blocks of some airfoils,
+    # name offsets into a UTF-8 names blob and a row of METRIC_FIELDS for each airfoil
+    # Footers link each segment to the one before it, together indexing every airfoil
+    # Appending writes new blocks with a new segment and footer after the old ones,
+    # so the file only ever grows and open readers stay valid
+    # The file is memory mapped so coordinates are views of it, not copies
+    # @param: path = path of library file, created by AirfoilLibrary.create
+    def __init__(self, path):
+        self.path = path
+
+        self._file = None
+        self._map = None
+        self._names = None
+        self._lookup = None
+
+        self._open()
+
+    # Create an empty library file
+    # @param:  path = path of library file, replaced if it exists
+    # @return: AirfoilLibrary
+    @staticmethod
+    def create(path):
+
+        with open(path, "wb") as file:
+
+            file.write(AirfoilLibrary.header.pack(AirfoilLibrary.magic, AirfoilLibrary.version))
+            AirfoilLibrary._writeIndex(file, [], [], [], np.empty((0, len(METRIC_FIELDS))), 0)
+
+        return AirfoilLibrary(path)
+
+    # Map the file and find the index segments from the footers
+    def _open(self):
+
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version = AirfoilLibrary.header.unpack_from(self._map, 0)
+
+        if magic != AirfoilLibrary.magic:
+            raise ValueError(self.path + ": not an airfoil library")
+
+        if version != AirfoilLibrary.version:
+            raise ValueError(self.path + ": unsupported library version " + str(version))
+
+        end = len(self._map)
+
+        while True:
+
+            self._segments = self._readSegments(end - AirfoilLibrary.footer.size)
+
+            if self._segments is not None:
+                break
+
+            # An append stopped part way through leaves blocks without a footer after
+            # the last whole index, so look back for the footer they were written after
+            end = self._map.rfind(AirfoilLibrary.footerMagic, AirfoilLibrary.header.size, end - 1)
+
+            if end < 0:
+                raise ValueError(self.path + ": library index is missing or damaged")
+
+            end += len(AirfoilLibrary.footerMagic)
+
+        # A single segment is viewed in place, several are joined once here
+        columns = [[segment[column] for segment in self._segments] for column in (1, 2, 4)]
+
+        if len(self._segments) > 1:
+            columns = [[AirfoilLibrary._readOnly(np.concatenate(column))] for column in columns]
+
+        self._offsets, self._counts, self._metrics = (column[0] for column in columns)
+
+        self._names = None
+        self._lookup = None
+
+    # Follow the footers back from one footer to the first
+    # Bytes that only look like a footer are rejected by checking each segment fills
+    # the space up to its footer exactly and every footer comes before the one after it
+    # @param:  footerOffset = offset of the last footer
+    # @return: list of segments from first to last, each being [footer offset, offsets, counts,
+    #          name offsets, metrics, names blob offset, names blob length], None if any footer is invalid
+    def _readSegments(self, footerOffset):
+
+        segments = []
+
+        while True:
+
+            if footerOffset < AirfoilLibrary.header.size:
+                return None
+
+            indexOffset, count, namesBytes, previous, footerMagic = AirfoilLibrary.footer.unpack_from(
+                self._map, footerOffset)
+
+            indexBytes = 8 * ((3 + len(METRIC_FIELDS)) * count + 1) + namesBytes + (-namesBytes % 8)
+
+            if (footerMagic != AirfoilLibrary.footerMagic or previous >= footerOffset or
+                    indexOffset < AirfoilLibrary.header.size or indexOffset + indexBytes != footerOffset):
+                return None
+
+            segments.append([footerOffset] + self._readSegment(indexOffset, count) + [namesBytes])
+
+            if previous == 0:
+                break
+
+            footerOffset = previous
+
+        segments.reverse()
+
+        return segments
+
+    # Views of one index segment, nothing is read until used
+    # @param:  indexOffset = offset of the segment in the file
+    #          count       = number of airfoils in the segment
+    # @return: list of offsets, counts, name offsets, metrics and the offset of the names blob
+    def _readSegment(self, indexOffset, count):
+
+        offset = indexOffset
+
+        offsets = np.frombuffer(self._map, dtype="<i8", count=count, offset=offset)
+        offset += 8 * count
+
+        counts = np.frombuffer(self._map, dtype="<i8", count=count, offset=offset)
+        offset += 8 * count
+
+        nameOffsets = np.frombuffer(self._map, dtype="<i8", count=count + 1, offset=offset)
+        offset += 8 * (count + 1)
+
+        metrics = np.frombuffer(self._map, dtype="<f8", count=count * len(METRIC_FIELDS),
+                                offset=offset).reshape(count, len(METRIC_FIELDS))
+        offset += 8 * count * len(METRIC_FIELDS)
+
+        return [offsets, counts, nameOffsets, metrics, offset]
+
+    # Mark a numpy array read only like the views of the file
+    # @param:  array = numpy array
+    # @return: same array
+    @staticmethod
+    def _readOnly(array):
+
+        array.flags.writeable = False
+
+        return array
+
+    # Close the file
+    # Coordinates already handed out keep the mapping alive until they are freed
+    def close(self):
+
+        self._offsets = self._counts = self._metrics = self._segments = None
+
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+
+        self._file.close()
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *exception):
+
+        self.close()
+
+    def __len__(self):
+
+        return len(self._offsets)
+
+    def __contains__(self, name):
+
+        return name in self._nameLookup()
+
+    # Names of every airfoil in the order they were added, decoded on first use
+    @property
+    def names(self):
+
+        if self._names is None:
+
+            self._names = []
+
+            for footerOffset, _, _, nameOffsets, _, namesOffset, namesBytes in self._segments:
+
+                blob = self._map[namesOffset:namesOffset + namesBytes].decode("utf-8")
+                offsets = nameOffsets.tolist()
+
+                self._names.extend(blob[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1))
+
+        return self._names
+
+    # Dictionary of name to index, later airfoils replace earlier ones with the same name
+    def _nameLookup(self):
+
+        if self._lookup is None:
+            self._lookup = {name: index for index, name in enumerate(self.names)}
+
+        return self._lookup
+
+    # Find the index of an airfoil
+    # @param:  key = name or index of airfoil
+    # @return: index of airfoil
+    def index(self, key):
+
+        if isinstance(key, str):
+            return self._nameLookup()[key]
+
+        if not -len(self) <= key < len(self):
+            raise IndexError("library index out of range: " + str(key))
+
+        return key % len(self)
+
+    # Points of an airfoil as a read only view of the file
+    # @param:  key = name or index of airfoil
+    # @return: numpy array with x values in row 0 and y values in row 1
+    def points(self, key):
+
+        index = self.index(key)
+        count = int(self._counts[index])
+
+        return np.frombuffer(self._map, dtype="<f8", count=2 * count,
+                             offset=int(self._offsets[index])).reshape(2, count)
+
+    # Coordinates of an airfoil viewing the file without copying
+    # Adding coordinates copies them first, the file is never changed
+    # @param:  key = name or index of airfoil
+    # @return: Coordinates
+    def coordinates(self, key):
+
+        return Coordinates.view(self.points(key))
+
+    # Airfoil with coordinates viewing the file
+    # @param:  key = name or index of airfoil
+    # @return: Airfoil
+    def airfoil(self, key):
+
+        index = self.index(key)
+
+        return Airfoil(self.names[index], self.coordinates(index))
+
+    # Stored metrics of an airfoil
+    # @param:  key = name or index of airfoil
+    # @return: dictionary of METRIC_FIELDS, None if the airfoil has no metrics
+    def metrics(self, key):
+
+        row = self._metrics[self.index(key)]
+
+        if np.isnan(row).all():
+            return None
+
+        return dict(zip(METRIC_FIELDS, row.tolist()))
+
+    # Metrics of every airfoil as a read only array, a view of the file if it has one index segment
+    # @return: numpy array with a row of METRIC_FIELDS for each airfoil, NaN where not processed
+    @property
+    def metricsArray(self):
+
+        return self._metrics
+
+    # Number of points of every airfoil as a read only array, a view of the file if it has one index segment
+    @property
+    def pointCounts(self):
+
+        return self._counts
+
+    # Metrics row for processed data
+    # @param:  data = AirfoilData, None for no metrics
+    # @return: list of METRIC_FIELDS values
+    @staticmethod
+    def metricsRow(data):
+
+        if data is None:
+            return [math.nan for field in METRIC_FIELDS]
+
+        return [data.thicknesses[data.maxThicknessIndex], data.xVals[data.maxThicknessIndex],
+                data.cambers[data.maxCamberIndex], data.xVals[data.maxCamberIndex]]
+
+    # Add airfoils to the end of the library
+    # Earlier airfoils are not rewritten, a new index segment and footer are written after the new blocks
+    # The last segments are merged into the new one while they hold no more airfoils than it does,
+    # so segments at least double in size going back through the file
+    # Many small appends then leave a number of segments and a size of old segments that
+    # grow with the logarithm of the number of airfoils, not a copy of the whole index each time
+    # @param:  entries = iterable of (name, Coordinates, metrics), metrics being AirfoilData,
+    #                    a list of METRIC_FIELDS values or None
+    # @return: number of airfoils added
+    def append(self, entries):
+
+        with open(self.path, "r+b") as file:
+
+            # New blocks go after the old footer, so the old index stays valid until the new
+            # footer is written, a failed append is cut off again and blocks left by a crash
+            # are skipped by _open looking back for the last whole index
+            start = file.seek(0, os.SEEK_END)
+
+            try:
+                added = self._appendEntries(file, entries)
+            except BaseException:
+                file.truncate(start)
+                raise
+
+        # Map the grown file
+        if added > 0:
+            self.close()
+            self._open()
+
+        return added
+
+    # Write blocks of new airfoils and an index segment for them at the end of a library file
+    # @param:  file    = library file open for writing at its end
+    #          entries = iterable of (name, Coordinates, metrics), see append
+    # @return: number of airfoils added
+    def _appendEntries(self, file, entries):
+
+        offsets = []
+        counts = []
+        names = []
+        metrics = []
+
+        for name, coordinates, data in entries:
+
+            points = np.ascontiguousarray(coordinates.points, dtype="<f8")
+
+            offsets.append(file.tell())
+            counts.append(points.shape[1])
+            names.append(name)
+
+            if data is None or hasattr(data, "thicknesses"):
+                metrics.append(np.array([AirfoilLibrary.metricsRow(data)]))
+            else:
+                metrics.append(np.array([data], dtype=float))
+
+            file.write(points.tobytes())
+
+        added = len(names)
+
+        if added == 0:
+            return 0
+
+        kept = len(self._segments)
+        merged = added
+
+        while kept > 0 and len(self._segments[kept - 1][2]) <= merged:
+            kept -= 1
+            merged += len(self._segments[kept][2])
+
+        first = len(self) - (merged - added)
+        previous = self._segments[kept - 1][0] if kept > 0 else 0
+
+        AirfoilLibrary._writeIndex(file, self._offsets[first:].tolist() + offsets,
+                                   self._counts[first:].tolist() + counts, self.names[first:] + names,
+                                   np.concatenate([self._metrics[first:]] + metrics), previous)
+
+        return added
+
+    # Write an index segment and footer at the current position of a file
+    # @param: file     = library file open for writing
+    #         offsets  = list of block offsets
+    #         counts   = list of numbers of points
+    #         names    = list of names
+    #         metrics  = numpy array with a row of METRIC_FIELDS for each airfoil
+    #         previous = offset of the footer of the segment before, 0 for the first segment
+    @staticmethod
+    def _writeIndex(file, offsets, counts, names, metrics, previous):
+
+        encodedNames = [name.encode("utf-8") for name in names]
+
+        # Offsets into the decoded names blob are character offsets
+        nameOffsets = np.zeros(len(names) + 1, dtype="<i8")
+        np.cumsum([len(name) for name in names], out=nameOffsets[1:])
+
+        blob = b"".join(encodedNames)
+
+        indexOffset = file.tell()
+
+        file.write(np.asarray(offsets, dtype="<i8").tobytes())
+        file.write(np.asarray(counts, dtype="<i8").tobytes())
+        file.write(nameOffsets.tobytes())
+        file.write(np.asarray(metrics, dtype="<f8").tobytes())
+        file.write(blob + b"\0" * (-len(blob) % 8))
+
+        file.write(AirfoilLibrary.footer.pack(indexOffset, len(names), len(blob), previous,
+                                              AirfoilLibrary.footerMagic))
+
+    # Rewrite the library without replaced airfoils and old indexes
+    # Readers that have the library open keep seeing the old file
+    def compact(self):
+
+        lookup = self._nameLookup()
+        keep = sorted(lookup.values())
+
+        temporaryPath = self.path + "." + str(os.getpid()) + ".tmp"
+
+        with AirfoilLibrary.create(temporaryPath) as library:
+            library.append((self.names[index], self.coordinates(index), self._metrics[index].tolist())
+                           for index in keep)
+
+        self.close()
+        os.replace(temporaryPath, self.path)
+        self._open()
+
+    # Read one file to import and process it when metrics are wanted, for worker processes
+    # The coordinates read are processed and added as they are, so each file is parsed once
+    # @param:  path                  = path of .dat file
+    #          metrics               = True to process the airfoil for its metrics
+    #          numberChordwisePoints = number of points wanted on chord when processing,
+    #                                  None to use the number of coordinates
+    # @return: path, Coordinates or None, error message or None, list of METRIC_FIELDS values or None
+    @staticmethod
+    def _importFile(path, metrics=False, numberChordwisePoints=None):
+
+        import batch
+
+        path, coordinates, error = batch.loadFile(path)
+
+        row = None
+
+        if metrics and error is None:
+
+            result = batch.processFile(path, numberChordwisePoints, coordinates=coordinates)
+
+            if result["error"] is None:
+                row = [result[field] for field in METRIC_FIELDS]
+
+        return path, coordinates, error, row
+
+    # Add every .dat file in directories, glob patterns or file paths
+    # Files that cannot be read are skipped and reported
+    # @param:  inputs                = list of directories, glob patterns or file paths
+    #          metrics               = True to process each airfoil and keep its metrics
+    #          numberChordwisePoints = number of points wanted on chord when processing,
+    #                                  None to use the number of coordinates
+    #          workers               = number of worker processes, None for one per CPU
+    # @return: number of airfoils added, list of (path, error message) for files that failed
+    def importFiles(self, inputs, metrics=False, numberChordwisePoints=None, workers=None):
+
+        import batch
+
+        paths = batch.findFiles(inputs)
+
+        function = functools.partial(AirfoilLibrary._importFile, metrics=metrics,
+                                     numberChordwisePoints=numberChordwisePoints)
+
+        failures = []
+
+        # Files are read and processed together by the workers and added in sorted path
+        # order as they arrive, so only the files still being worked on are held in memory
+        def entries():
+
+            for path, coordinates, error, row in batch.mapReadAhead(function, paths, workers,
+                                                                    chunkSize=8 if metrics else 64, ordered=True):
+
+                if error is not None:
+                    failures.append((path, error))
+                else:
+                    yield os.path.splitext(os.path.basename(path))[0], coordinates, row
+
+        return self.append(entries()), failures
+
+    # Write every airfoil to a directory of .dat files
+    # Uses the comma format of Airfoil.saveCoordinates unless another format is given
+    # @param:  directory = folder to write to, created if missing
+    #          format    = format in export.EXPORT_FORMATS
+    #          compress  = True to compress files
+    #          workers   = number of worker processes, None for one per CPU
+    # @return: number of files written
+    def exportDirectory(self, directory, format="comma", compress=False, workers=1):
+
+        airfoils = ((name, self.coordinates(index)) for name, index in self._nameLookup().items())
+
+        return export.exportDirectory(airfoils, directory, format, compress, workers)
+
+# Command for building and reading libraries
+# @param:  arguments = list of command line arguments
+# @return: exit code, 1 if any file failed to import
+def main(arguments=None):
+
+    parser = argparse.ArgumentParser(description="Pack airfoil .dat files into one memory mapped library file.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importParser = commands.add_parser("import", help="add .dat files to a library, creating it if missing")
+    importParser.add_argument("library")
+    importParser.add_argument("inputs", nargs="+", help="directories, glob patterns or .dat files")
+    importParser.add_argument("--metrics", action="store_true", help="process airfoils and keep their metrics")
+    importParser.add_argument("-p", "--points", type=int, default=None,
+                              help="chordwise points for --metrics, default the number of coordinates")
+    importParser.add_argument("-w", "--workers", type=int, default=None, help="worker processes, default one per CPU")
+
+    exportParser = commands.add_parser("export", help="write every airfoil in a library to .dat files")
+    exportParser.add_argument("library")
+    exportParser.add_argument("directory")
+    exportParser.add_argument("-f", "--format", choices=export.EXPORT_FORMATS, default="comma")
+    exportParser.add_argument("--gzip", action="store_true", help="compress files")
+    exportParser.add_argument("-w", "--workers", type=int, default=1, help="worker processes, 0 for one per CPU")
+
+    listParser = commands.add_parser("list", help="list airfoils in a library")
+    listParser.add_argument("library")
+
+    compactParser = commands.add_parser("compact", help="remove replaced airfoils and old indexes")
+    compactParser.add_argument("library")
+
+    args = parser.parse_args(arguments)
+
+    if args.command == "import":
+
+        if os.path.exists(args.library):
+            library = AirfoilLibrary(args.library)
+        else:
+            library = AirfoilLibrary.create(args.library)
+
+        with library:
+            added, failures = library.importFiles(args.inputs, args.metrics, args.points, args.workers)
+
+        for path, error in failures:
+            print(path + ": " + error, file=sys.stderr)
+
+        print("Added " + str(added) + " airfoils, " + str(len(failures)) + " failed", file=sys.stderr)
+
+        return 1 if failures else 0
+
+    with AirfoilLibrary(args.library) as library:
+
+        if args.command == "export":
+
+            count = library.exportDirectory(args.directory, args.format, args.gzip, args.workers or None)
+
+            print("Wrote " + str(count) + " files", file=sys.stderr)
+
+        elif args.command == "list":
+
+            for index, name in enumerate(library.names):
+
+                row = library.metricsArray[index]
+                metrics = " ".join("{0}={1:.4g}".format(field, value) for field, value in zip(METRIC_FIELDS, row)
+                                   if not np.isnan(value))
+
+                print(name + " " + str(int(library.pointCounts[index])) + " points " + metrics)
+
+        elif args.command == "compact":
+
+            library.compact()
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
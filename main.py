@@ -1,242 +1,560 @@
-from airfoil import Airfoil
-from cst import CST
-import tkinter as tk
-import sys
-import os
-from os import listdir
-from os.path import isfile, join
-
-# Possible source for fmincon alternative: https://github.com/xuy/pyipopt
-# tkinter type modules may have solution too
-# fmincon alternatives would look for local solutions
-
-# Constants
-DISPLAY_WIDTH = 30
-BUTTON_WIDTH = 15
-CANVAS_WIDTH = 400
-CANVAS_HEIGHT = 200
-
-# Airfoil being looked at
-airfoil = None
-
-# Clear display
-def clearDisplay():
-
-    for widget in displayFrame.winfo_children():
-        widget.destroy()
-
-# Load airfoil and assign it
-# Update label
-def loadAirfoil(airfoilName):
-
-    global airfoil
-
-    airfoil = Airfoil(airfoilName)
-    airfoilLabel.config(text="Current Airfoil: " + airfoil.name)
-
-# Show buttons for loading airfoils
-def displayLoadAirfoil():
-
-    clearDisplay()
-
-    # Save created button widgets
-    buttonWidgets = []
-
-    # determine if application is a script file or frozen exe
-    if getattr(sys, 'frozen', False):
-        application_path = os.path.dirname(sys.executable)
-    elif __file__:
-        application_path = os.path.dirname(__file__)
-
-    # See possible airfoils to load
-    path = os.path.join(application_path, 'Airfoil/')
-    onlyFiles = [f for f in listdir(path) if isfile(join(path, f))]
-
-    # Load and pack airfoil frame widgets
-    for file in onlyFiles:
-
-        # Check file is a .dat file
-        if file[-4:] == ".dat":
-
-            buttonWidgets.append(tk.Button(text=file[:-4], master=displayFrame, width=DISPLAY_WIDTH,
-                                           command=lambda file=file: loadAirfoil(file[:-4])))
-            buttonWidgets[-1].pack()
-
-# Save airfoil at given file if exists
-def saveAirfoil(airfoilName):
-
-    global airfoil
-
-    if airfoil is not None and len(airfoilName) != 0:
-        airfoil = Airfoil(airfoilName, airfoil.coordinates)
-        airfoilLabel.config(text="Current Airfoil: " + airfoil.name)
-
-        airfoil.saveCoordinates()
-
-# Show display for saving current airfoil
-def displaySaveAirfoil():
-
-    clearDisplay()
-
-    # Entry for typing name of file for airfoil to be saved to
-    airfoilNameEntry = tk.Entry(width=DISPLAY_WIDTH, master=displayFrame)
-    airfoilNameEntry.pack()
-
-    # Button to save airfoil at file
-    airfoilSaveButton = tk.Button(text="Save", width=DISPLAY_WIDTH, master=displayFrame,
-                                  command=lambda: saveAirfoil(airfoilNameEntry.get()))
-    airfoilSaveButton.pack()
-
-# Draw an airfoil
-# @param: canvas object to draw on to
-def drawAirfoil(canvas):
-
-    # Clear canvas
-    canvas.delete("all")
-
-    if airfoil is not None:
-
-        for i in range(len(airfoil.coordinates.xVals)):
-
-            # Translate coordinate to canvas coordinates
-            canvasXVal = CANVAS_WIDTH * airfoil.coordinates.xVals[i]
-            canvasYVal = (CANVAS_HEIGHT * (-airfoil.coordinates.yVals[i])) + (CANVAS_HEIGHT / 2)
-
-            # Convert coordinates to opposite corners of circle to draw
-            # Make circle have diameter equal to canvas width / 100
-            radius = CANVAS_WIDTH / 200
-            coord = canvasXVal - radius, canvasYVal - radius, canvasXVal + radius, canvasYVal + radius
-
-            # Draw circle at location
-            canvas.create_arc(coord, start=0, extent=359, fill="black", outline="")
-
-# Draw the mean camber line
-# @param: canvas object to draw on to
-def drawMeanCamberLine(canvas, data):
-
-    if data is not None:
-
-        for i in range(len(data.yMeanCamberLineVals)):
-
-            # Translate coordinate to canvas coordinates
-            canvasXVal = CANVAS_WIDTH * data.xVals[i]
-            canvasYVal = (CANVAS_HEIGHT * (-data.yMeanCamberLineVals[i])) + (CANVAS_HEIGHT / 2)
-
-            # Convert coordinates to opposite corners of circle to draw
-            # Make circle have diameter equal to canvas width / 100
-            radius = CANVAS_WIDTH / 200
-            coord = canvasXVal - radius, canvasYVal - radius, canvasXVal + radius, canvasYVal + radius
-
-            # Draw circle at location
-            canvas.create_arc(coord, start=0, extent=359, fill="red", outline="")
-
-# Show display for drawing airfoil
-def displayAirfoilInformation():
-
-    clearDisplay()
-
-    # Draw airfoil
-    airfoilCanvas = tk.Canvas(bg="white", height=CANVAS_HEIGHT, width=CANVAS_WIDTH, master=displayFrame)
-    drawAirfoil(airfoilCanvas)
-    airfoilCanvas.pack()
-
-    # Get data on airfoil
-    # Require number of coordinates equal to current amount
-    data = Airfoil.process(airfoil, len(airfoil.coordinates.xVals))
-
-    # Give user option to draw mean camber line
-    meanCamberLineButton = tk.Button(text="Draw Mean Camber Line", master=displayFrame, width=DISPLAY_WIDTH,
-                                     command=lambda: drawMeanCamberLine(airfoilCanvas, data))
-    meanCamberLineButton.pack()
-
-    # Display information
-    tk.Label(
-        text="Max Thickness " + str("{0:.2f}".format(data.thicknesses[data.maxThicknessIndex])) + "% at " +
-        str("{0:.2f}".format(100 * data.maxThicknessIndex / len(data.xVals))) + "% chord",
-        width=DISPLAY_WIDTH, master=displayFrame).pack()
-    tk.Label(
-        text="Max Camber " + str("{0:.2f}".format(data.cambers[data.maxCamberIndex])) + "% at " +
-        str("{0:.2f}".format(100 * data.maxCamberIndex / len(data.xVals))) + "% chord",
-        width=DISPLAY_WIDTH, master=displayFrame).pack()
-
-    # print(data.thicknesses[data.maxThicknessIndex])
-    # print(data.maxThicknessIndex)
-    # print(data.cambers[data.maxCamberIndex])
-    # print(data.maxCamberIndex)
-
-# Show display for editing airfoil
-def displayEditAirfoil():
-
-    clearDisplay()
-
-    # TEST
-    # Button to save airfoil at file
-    testButton = tk.Button(text="TEST", width=DISPLAY_WIDTH, master=displayFrame)
-    testButton.pack()
-
-# Press the green button in the gutter to run the script.
-if __name__ == '__main__':
-
-    #weightsLower = [0.102333995082718,0.138209581186333,0.049306525213022,-0.082982724998046]
-    #weightsUpper = [0.164917727527345,0.320594819913800,0.203199258463692,0.297424182497028]
-
-    #dz = 0
-
-    #numVals = 66
-
-    #xVals = [1,0.996280000000000,0.985230000000000,0.967149000000000,0.942419000000000,0.911508000000000,0.874947000000000,0.833447000000000,0.787766000000000,0.738715000000000,0.687134000000000,0.633893000000000,0.579832000000000,0.525760000000000,0.472439000000000,0.420578000000000,0.370477000000000,0.322126000000000,0.275695000000000,0.231455000000000,0.189764000000000,0.151143000000000,0.116072000000000,0.0850020000000000,0.0583510000000000,0.0364210000000000,0.0193900000000000,0.00954000000000000,0.00422000000000000,0.00175000000000000,0.000520000000000000,9.00000000000000e-05,0,0.000340000000000000,0.00152000000000000,0.00468000000000000,0.00619000000000000,0.0160300000000000,0.0302810000000000,0.0488510000000000,0.0715910000000000,0.0982920000000000,0.128633000000000,0.162303000000000,0.198944000000000,0.238185000000000,0.279606000000000,0.322776000000000,0.367427000000000,0.413418000000000,0.460549000000000,0.508600000000000,0.557221000000000,0.605902000000000,0.654083000000000,0.701214000000000,0.746685000000000,0.789936000000000,0.830367000000000,0.867427000000000,0.900588000000000,0.929358000000000,0.953279000000000,0.972329000000000,0.986860000000000,0.996520000000000]
-
-    #airfoil = Airfoil("CSTtext", CST.genCoordinates(weightsLower, weightsUpper, dz, numVals, xVals))
-
-    #for i in range(len(xVals)):
-
-        #print(airfoil.coordinates.yVals[i])
-
-    #data = Airfoil.process(airfoil, 51)
-
-    #print(data.thicknesses[data.maxThicknessIndex])
-    #print(data.maxThicknessIndex)
-    #print(data.cambers[data.maxCamberIndex])
-    #print(data.maxCamberIndex)
-
-    #for i in range(len(data.xVals)):
-        #print(str(data.xVals[i]) + "/" + str(data.thicknesses[i]))
-        #print(str(data.yUpperVals[i]) + " and " + str(data.yLowerVals[i]))
-        #print(str(data.xVals[i]) + "/" + str(data.cambers[i]))
-
-    # Create global widgets
-    global displayFrame
-    global airfoilLabel
-
-    # Create window
-    window = tk.Tk()
-
-    # Create widgets
-    airfoilLabel = tk.Label(text="Current Airfoil: ")
-
-    # Create display frame for information
-    # Add default widget to fill space
-    displayFrame = tk.Frame()
-    defaultLabel = tk.Label(text="Click a button on the left.", width=DISPLAY_WIDTH, master=displayFrame)
-
-    buttonFrame = tk.Frame()
-    buttons = []
-    buttons.append(tk.Button(master=buttonFrame, text="Load Airfoil", command=displayLoadAirfoil, width=BUTTON_WIDTH))
-    buttons.append(tk.Button(master=buttonFrame, text="Save Airfoil", command=displaySaveAirfoil, width=BUTTON_WIDTH))
-    buttons.append(tk.Button(master=buttonFrame, text="Airfoil Information", command=displayAirfoilInformation,
-                             width=BUTTON_WIDTH))
-    buttons.append(tk.Button(master=buttonFrame, text="Edit Airfoil", command=displayEditAirfoil,
-                             width=BUTTON_WIDTH))
-
-    # Pack widgets
-    airfoilLabel.pack()
-    buttonFrame.pack(side=tk.LEFT)
-    for button in buttons:
-        button.pack()
-    displayFrame.pack(side=tk.RIGHT)
-    defaultLabel.pack()
-
-    # Initiate main loop
-    window.mainloop()
-
-# See PyCharm help at https://www.jetbrains.com/help/pycharm/
+from airfoil import Airfoil, ProcessCancelled
+from cache import ResultCache
+from catalog import AirfoilCatalog
+from cst import CST
+import tkinter as tk
+import numpy as np
+import queue
+import threading
+import sys
+import os
+
+# Possible source for fmincon alternative: https://github.com/xuy/pyipopt
+# tkinter type modules may have solution too
+# fmincon alternatives would look for local solutions
+
+# Constants
+DISPLAY_WIDTH = 30
+BUTTON_WIDTH = 15
+CANVAS_WIDTH = 400
+CANVAS_HEIGHT = 200
+
+# Rows of widgets in the Load Airfoil list
+BROWSER_ROWS = 15
+
+# Airfoil being looked at
+airfoil = None
+
+# Cache of processed airfoil data, created at start up
+resultCache = None
+
+# Messages from the processing thread, handled on the main thread by pollProcessing
+processingQueue = queue.Queue()
+
+# Bumped whenever processing is started or cancelled,
+# messages from an older generation are stale and dropped
+processingGeneration = 0
+
+# Functions to call with progress and the finished result of the current generation
+processingCallbacks = None
+
+# How often in milliseconds the main thread checks for messages from the processing thread
+PROCESSING_POLL_INTERVAL = 50
+
+# Index of airfoils in the Airfoil folder with thumbnails and metrics, created at start up
+airfoilCatalog = None
+
+# Thread refreshing the catalog, None if never started
+catalogThread = None
+
+# How often in milliseconds the Load Airfoil list checks for catalog changes
+CATALOG_POLL_INTERVAL = 200
+
+# How often in milliseconds the Airfoil folder is checked for changed files while the list is shown
+CATALOG_REFRESH_INTERVAL = 5000
+
+# Folder the application is running from
+def applicationPath():
+
+    # determine if application is a script file or frozen exe
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    elif __file__:
+        return os.path.dirname(__file__)
+
+# Clear display
+def clearDisplay():
+
+    cancelProcessing()
+
+    for widget in displayFrame.winfo_children():
+        widget.destroy()
+
+# Process an airfoil on a background thread so the window stays responsive
+# Any processing already running is cancelled
+# Callbacks are called on the main thread by pollProcessing
+# @param: airfoilToProcess      = Airfoil object to be processed
+#         numberChordwisePoints = Integer number of points wanted on chord
+#         onProgress            = function called with the iteration number and max number of iterations
+#         onDone                = function called with the AirfoilData
+#         onError               = function called with the exception if processing fails
+def startProcessing(airfoilToProcess, numberChordwisePoints, onProgress, onDone, onError):
+
+    global processingGeneration
+    global processingCallbacks
+
+    processingGeneration += 1
+    processingCallbacks = (onProgress, onDone, onError)
+
+    generation = processingGeneration
+
+    # Stop at the next iteration once a newer generation has started
+    def progress(iteration, maxIterations):
+
+        if generation != processingGeneration:
+            raise ProcessCancelled()
+
+        processingQueue.put((generation, "progress", (iteration, maxIterations)))
+
+    def work():
+
+        try:
+            data = resultCache.process(airfoilToProcess, numberChordwisePoints, progress=progress)
+        except ProcessCancelled:
+            return
+        except Exception as error:
+            processingQueue.put((generation, "error", error))
+            return
+
+        processingQueue.put((generation, "done", data))
+
+    threading.Thread(target=work, daemon=True).start()
+
+# Cancel processing started by startProcessing, its results will be dropped
+def cancelProcessing():
+
+    global processingGeneration
+    global processingCallbacks
+
+    processingGeneration += 1
+    processingCallbacks = None
+
+# Hand messages from the processing thread to their callbacks
+# Runs on the main thread every PROCESSING_POLL_INTERVAL milliseconds
+def pollProcessing():
+
+    global processingCallbacks
+
+    while True:
+
+        try:
+            generation, kind, value = processingQueue.get_nowait()
+        except queue.Empty:
+            break
+
+        # Drop messages from cancelled or replaced processing
+        if generation != processingGeneration or processingCallbacks is None:
+            continue
+
+        onProgress, onDone, onError = processingCallbacks
+
+        if kind == "progress":
+
+            onProgress(*value)
+
+        else:
+
+            processingCallbacks = None
+
+            if kind == "done":
+                onDone(value)
+            else:
+                onError(value)
+
+    window.after(PROCESSING_POLL_INTERVAL, pollProcessing)
+
+# Load airfoil and assign it
+# Update label
+def loadAirfoil(airfoilName):
+
+    global airfoil
+
+    airfoil = Airfoil(airfoilName)
+    airfoilLabel.config(text="Current Airfoil: " + airfoil.name)
+
+# Start bringing the airfoil catalog up to date on a background thread
+# Nothing is started if a refresh is already running
+def refreshCatalog():
+
+    global catalogThread
+
+    if catalogThread is not None and catalogThread.is_alive():
+        return
+
+    catalogThread = threading.Thread(target=airfoilCatalog.refresh, daemon=True)
+    catalogThread.start()
+
+# Show a searchable list of airfoils to load
+# Only BROWSER_ROWS rows of widgets are made, scrolling and filtering show other airfoils in them
+# Thumbnails and metrics come from the catalog, which is refreshed in the background while shown
+def displayLoadAirfoil():
+
+    clearDisplay()
+
+    # Entry for typing part of a name to filter airfoils
+    filterEntry = tk.Entry(width=DISPLAY_WIDTH, master=displayFrame)
+    filterEntry.pack()
+
+    countLabel = tk.Label(width=DISPLAY_WIDTH, master=displayFrame)
+    countLabel.pack()
+
+    listFrame = tk.Frame(master=displayFrame)
+    listFrame.pack()
+
+    rowsFrame = tk.Frame(master=listFrame)
+    rowsFrame.pack(side=tk.LEFT)
+
+    scrollbar = tk.Scrollbar(master=listFrame, orient=tk.VERTICAL)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+    # Names shown, text they were filtered by, first name in the top row and catalog generation drawn
+    matches = []
+    filterText = ""
+    firstRow = 0
+    shownGeneration = None
+
+    # Pool of row widgets, each a thumbnail, a button and a label of metrics
+    rows = []
+
+    for rowIndex in range(BROWSER_ROWS):
+
+        rowFrame = tk.Frame(master=rowsFrame)
+        thumbnailCanvas = tk.Canvas(bg="white", width=AirfoilCatalog.thumbnailWidth,
+                                    height=AirfoilCatalog.thumbnailHeight, highlightthickness=0, master=rowFrame)
+        nameButton = tk.Button(width=BUTTON_WIDTH, master=rowFrame,
+                               command=lambda rowIndex=rowIndex: chooseRow(rowIndex))
+        metricsLabel = tk.Label(width=DISPLAY_WIDTH, anchor="w", master=rowFrame)
+
+        thumbnailCanvas.pack(side=tk.LEFT)
+        nameButton.pack(side=tk.LEFT)
+        metricsLabel.pack(side=tk.LEFT)
+        rowFrame.pack()
+
+        rows.append((thumbnailCanvas, nameButton, metricsLabel))
+
+        for widget in (rowFrame, thumbnailCanvas, nameButton, metricsLabel):
+            widget.bind("<MouseWheel>", lambda event: scrollRows(-1 if event.delta > 0 else 1))
+            widget.bind("<Button-4>", lambda event: scrollRows(-1))
+            widget.bind("<Button-5>", lambda event: scrollRows(1))
+
+    # Fill the row widgets with the names from firstRow on
+    def showRows():
+
+        for rowIndex, (thumbnailCanvas, nameButton, metricsLabel) in enumerate(rows):
+
+            index = firstRow + rowIndex
+
+            if index >= len(matches):
+
+                nameButton.config(text="", state=tk.DISABLED)
+                metricsLabel.config(text="")
+                thumbnailCanvas.itemconfigure("thumbnail", state="hidden")
+                continue
+
+            entry = airfoilCatalog.entry(matches[index])
+
+            nameButton.config(text=matches[index], state=tk.NORMAL)
+            metricsLabel.config(text=AirfoilCatalog.describe(entry))
+            drawLine(thumbnailCanvas, "thumbnail", entry["thumbnail"] if entry is not None else [], fill="black")
+
+        if len(matches) > 0:
+            scrollbar.set(firstRow / len(matches), min(firstRow + BROWSER_ROWS, len(matches)) / len(matches))
+        else:
+            scrollbar.set(0, 1)
+
+        countLabel.config(text=str(len(matches)) + " airfoils")
+
+    # Move the top row, keeping rows filled where there are enough names
+    # @param: index = index of name to show in the top row
+    def scrollTo(index):
+
+        nonlocal firstRow
+
+        firstRow = max(0, min(int(index), len(matches) - BROWSER_ROWS))
+        showRows()
+
+    # @param: amount = number of rows to scroll by, negative to scroll up
+    def scrollRows(amount):
+
+        scrollTo(firstRow + amount)
+
+    # Handle the scrollbar, which asks to move to a fraction of the list or by units or pages
+    def scrollCommand(action, amount, unit=None):
+
+        if action == "moveto":
+            scrollTo(round(float(amount) * len(matches)))
+        elif unit == "pages":
+            scrollRows(int(amount) * BROWSER_ROWS)
+        else:
+            scrollRows(int(amount))
+
+    scrollbar.config(command=scrollCommand)
+
+    # Filter names by the text typed, narrowing the last matches when the text only grew
+    # @param: allNames = True to filter every name in the catalog again
+    def applyFilter(allNames=False):
+
+        nonlocal matches
+        nonlocal filterText
+
+        text = filterEntry.get().lower()
+
+        if allNames or filterText not in text:
+            matches = AirfoilCatalog.filterNames(airfoilCatalog.names(), text)
+        elif text != filterText:
+            matches = AirfoilCatalog.filterNames(matches, text)
+
+        filterText = text
+        scrollTo(firstRow if allNames else 0)
+
+    filterEntry.bind("<KeyRelease>", lambda event: applyFilter())
+
+    # Load the airfoil shown in a row
+    def chooseRow(rowIndex):
+
+        if firstRow + rowIndex < len(matches):
+            loadAirfoil(matches[firstRow + rowIndex])
+
+    # Redraw when the catalog changes, stops once the display is cleared
+    def pollCatalog():
+
+        nonlocal shownGeneration
+
+        if not rowsFrame.winfo_exists():
+            return
+
+        if airfoilCatalog.generation != shownGeneration:
+            shownGeneration = airfoilCatalog.generation
+            applyFilter(allNames=True)
+
+        window.after(CATALOG_POLL_INTERVAL, pollCatalog)
+
+    # Look for added, changed and removed files while shown
+    def watchFolder():
+
+        if not rowsFrame.winfo_exists():
+            return
+
+        refreshCatalog()
+        window.after(CATALOG_REFRESH_INTERVAL, watchFolder)
+
+    pollCatalog()
+    watchFolder()
+
+    filterEntry.focus_set()
+
+# Save airfoil at given file if exists
+def saveAirfoil(airfoilName):
+
+    global airfoil
+
+    if airfoil is not None and len(airfoilName) != 0:
+        airfoil = Airfoil(airfoilName, airfoil.coordinates)
+        airfoilLabel.config(text="Current Airfoil: " + airfoil.name)
+
+        airfoil.saveCoordinates()
+
+# Show display for saving current airfoil
+def displaySaveAirfoil():
+
+    clearDisplay()
+
+    # Entry for typing name of file for airfoil to be saved to
+    airfoilNameEntry = tk.Entry(width=DISPLAY_WIDTH, master=displayFrame)
+    airfoilNameEntry.pack()
+
+    # Button to save airfoil at file
+    airfoilSaveButton = tk.Button(text="Save", width=DISPLAY_WIDTH, master=displayFrame,
+                                  command=lambda: saveAirfoil(airfoilNameEntry.get()))
+    airfoilSaveButton.pack()
+
+# Translate coordinates to a flat list of canvas pixels for one line item
+# Points landing on the same pixel as the point before are dropped,
+# so dense airfoils are decimated down to the canvas resolution
+# @param:  xVals = list or array of x values
+#          yVals = list or array of y values
+# @return: flat list of alternating canvas x and y values
+def canvasPoints(xVals, yVals):
+
+    canvasXVals = np.rint(CANVAS_WIDTH * np.asarray(xVals, dtype=float))
+    canvasYVals = np.rint((CANVAS_HEIGHT * -np.asarray(yVals, dtype=float)) + (CANVAS_HEIGHT / 2))
+
+    keep = np.ones(len(canvasXVals), dtype=bool)
+    keep[1:] = (canvasXVals[1:] != canvasXVals[:-1]) | (canvasYVals[1:] != canvasYVals[:-1])
+
+    pixels = np.empty((np.count_nonzero(keep), 2))
+    pixels[:, 0] = canvasXVals[keep]
+    pixels[:, 1] = canvasYVals[keep]
+
+    return pixels.ravel().tolist()
+
+# Draw a line as a single canvas item
+# The item is found by its tag and moved with coords() if it already exists
+# @param: canvas  = canvas object to draw on to
+#         tag     = tag naming the item
+#         points  = flat list of alternating canvas x and y values
+#         options = options for create_line when the item is new
+def drawLine(canvas, tag, points, **options):
+
+    items = canvas.find_withtag(tag)
+
+    # A line needs at least two points
+    if len(points) < 4:
+        canvas.itemconfigure(tag, state="hidden")
+        return
+
+    if len(items) > 0:
+        canvas.coords(items[0], points)
+        canvas.itemconfigure(items[0], state="normal")
+    else:
+        canvas.create_line(points, tags=tag, **options)
+
+# Draw an airfoil
+# @param: canvas object to draw on to
+def drawAirfoil(canvas):
+
+    if airfoil is None:
+
+        canvas.itemconfigure("airfoil", state="hidden")
+
+    else:
+
+        # Closed loop of both surfaces as one line
+        closedPoints = airfoil.coordinates.closedPoints()
+        drawLine(canvas, "airfoil", canvasPoints(closedPoints[0], closedPoints[1]), fill="black", width=2)
+
+# Draw the mean camber line
+# @param: canvas object to draw on to
+def drawMeanCamberLine(canvas, data):
+
+    if data is not None:
+
+        drawLine(canvas, "meanCamberLine", canvasPoints(data.xVals, data.yMeanCamberLineVals), fill="red", width=2)
+
+# Show display for drawing airfoil
+def displayAirfoilInformation():
+
+    clearDisplay()
+
+    # Draw airfoil
+    airfoilCanvas = tk.Canvas(bg="white", height=CANVAS_HEIGHT, width=CANVAS_WIDTH, master=displayFrame)
+    drawAirfoil(airfoilCanvas)
+    airfoilCanvas.pack()
+
+    # Show progress while the airfoil is processed in the background
+    progressLabel = tk.Label(text="Processing...", width=DISPLAY_WIDTH, master=displayFrame)
+    progressLabel.pack()
+
+    def showProgress(iteration, maxIterations):
+
+        progressLabel.config(text="Processing... " + str(100 * iteration // maxIterations) + "%")
+
+    def showError(error):
+
+        progressLabel.config(text="Could not process airfoil: " + str(error))
+
+    def showData(data):
+
+        progressLabel.destroy()
+
+        # Give user option to draw mean camber line
+        meanCamberLineButton = tk.Button(text="Draw Mean Camber Line", master=displayFrame, width=DISPLAY_WIDTH,
+                                         command=lambda: drawMeanCamberLine(airfoilCanvas, data))
+        meanCamberLineButton.pack()
+
+        # Display information
+        tk.Label(
+            text="Max Thickness " + str("{0:.2f}".format(data.thicknesses[data.maxThicknessIndex])) + "% at " +
+            str("{0:.2f}".format(100 * data.xVals[data.maxThicknessIndex])) + "% chord",
+            width=DISPLAY_WIDTH, master=displayFrame).pack()
+        tk.Label(
+            text="Max Camber " + str("{0:.2f}".format(data.cambers[data.maxCamberIndex])) + "% at " +
+            str("{0:.2f}".format(100 * data.xVals[data.maxCamberIndex])) + "% chord",
+            width=DISPLAY_WIDTH, master=displayFrame).pack()
+
+    # Get data on airfoil, reusing cached data if airfoil has not changed
+    # Require number of coordinates equal to current amount
+    startProcessing(airfoil, len(airfoil.coordinates.xVals), showProgress, showData, showError)
+
+    # print(data.thicknesses[data.maxThicknessIndex])
+    # print(data.maxThicknessIndex)
+    # print(data.cambers[data.maxCamberIndex])
+    # print(data.maxCamberIndex)
+
+# Show display for editing airfoil
+def displayEditAirfoil():
+
+    clearDisplay()
+
+    # TEST
+    # Button to save airfoil at file
+    testButton = tk.Button(text="TEST", width=DISPLAY_WIDTH, master=displayFrame)
+    testButton.pack()
+
+# Press the green button in the gutter to run the script.
+if __name__ == '__main__':
+
+    #weightsLower = [0.102333995082718,0.138209581186333,0.049306525213022,-0.082982724998046]
+    #weightsUpper = [0.164917727527345,0.320594819913800,0.203199258463692,0.297424182497028]
+
+    #dz = 0
+
+    #numVals = 66
+
+    #xVals = [1,0.996280000000000,0.985230000000000,0.967149000000000,0.942419000000000,0.911508000000000,0.874947000000000,0.833447000000000,0.787766000000000,0.738715000000000,0.687134000000000,0.633893000000000,0.579832000000000,0.525760000000000,0.472439000000000,0.420578000000000,0.370477000000000,0.322126000000000,0.275695000000000,0.231455000000000,0.189764000000000,0.151143000000000,0.116072000000000,0.0850020000000000,0.0583510000000000,0.0364210000000000,0.0193900000000000,0.00954000000000000,0.00422000000000000,0.00175000000000000,0.000520000000000000,9.00000000000000e-05,0,0.000340000000000000,0.00152000000000000,0.00468000000000000,0.00619000000000000,0.0160300000000000,0.0302810000000000,0.0488510000000000,0.0715910000000000,0.0982920000000000,0.128633000000000,0.162303000000000,0.198944000000000,0.238185000000000,0.279606000000000,0.322776000000000,0.367427000000000,0.413418000000000,0.460549000000000,0.508600000000000,0.557221000000000,0.605902000000000,0.654083000000000,0.701214000000000,0.746685000000000,0.789936000000000,0.830367000000000,0.867427000000000,0.900588000000000,0.929358000000000,0.953279000000000,0.972329000000000,0.986860000000000,0.996520000000000]
+
+    #airfoil = Airfoil("CSTtext", CST.genCoordinates(weightsLower, weightsUpper, dz, numVals, xVals))
+
+    #for i in range(len(xVals)):
+
+        #print(airfoil.coordinates.yVals[i])
+
+    #data = Airfoil.process(airfoil, 51)
+
+    #print(data.thicknesses[data.maxThicknessIndex])
+    #print(data.maxThicknessIndex)
+    #print(data.cambers[data.maxCamberIndex])
+    #print(data.maxCamberIndex)
+
+    #for i in range(len(data.xVals)):
+        #print(str(data.xVals[i]) + "/" + str(data.thicknesses[i]))
+        #print(str(data.yUpperVals[i]) + " and " + str(data.yLowerVals[i]))
+        #print(str(data.xVals[i]) + "/" + str(data.cambers[i]))
+
+    # Create global widgets
+    global displayFrame
+    global airfoilLabel
+
+    # Create cache for processed airfoil data
+    resultCache = ResultCache(os.path.join(applicationPath(), '.airfoil_cache'))
+
+    # Create catalog of airfoils, start indexing before the list is first shown
+    airfoilCatalog = AirfoilCatalog(os.path.join(applicationPath(), 'Airfoil'),
+                                    os.path.join(applicationPath(), '.airfoil_index.json'))
+    refreshCatalog()
+
+    # Create window
+    window = tk.Tk()
+
+    # Create widgets
+    airfoilLabel = tk.Label(text="Current Airfoil: ")
+
+    # Create display frame for information
+    # Add default widget to fill space
+    displayFrame = tk.Frame()
+    defaultLabel = tk.Label(text="Click a button on the left.", width=DISPLAY_WIDTH, master=displayFrame)
+
+    buttonFrame = tk.Frame()
+    buttons = []
+    buttons.append(tk.Button(master=buttonFrame, text="Load Airfoil", command=displayLoadAirfoil, width=BUTTON_WIDTH))
+    buttons.append(tk.Button(master=buttonFrame, text="Save Airfoil", command=displaySaveAirfoil, width=BUTTON_WIDTH))
+    buttons.append(tk.Button(master=buttonFrame, text="Airfoil Information", command=displayAirfoilInformation,
+                             width=BUTTON_WIDTH))
+    buttons.append(tk.Button(master=buttonFrame, text="Edit Airfoil", command=displayEditAirfoil,
+                             width=BUTTON_WIDTH))
+
+    # Pack widgets
+    airfoilLabel.pack()
+    buttonFrame.pack(side=tk.LEFT)
+    for button in buttons:
+        button.pack()
+    displayFrame.pack(side=tk.RIGHT)
+    defaultLabel.pack()
+
+    # Start handing results of background processing to the display
+    window.after(PROCESSING_POLL_INTERVAL, pollProcessing)
+
+    # Initiate main loop
+    window.mainloop()
+
+# See PyCharm help at https://www.jetbrains.com/help/pycharm/
@@ -0,0 +1,69 @@
+import numpy as np
+
+# Solve tridiagonal systems of equations with the Thomas algorithm
+# Systems of the same size can be given as the rows of 2D arrays, they are then
+# solved together with each step of the sweeps done for every system at once
+# @param:  belowDiagonal = numpy array of values below the diagonal, first value unused
+#          diagonal      = numpy array of values on the diagonal
+#          aboveDiagonal = numpy array of values above the diagonal, last value unused
+#          values        = numpy array of right hand side values
+# @return: numpy array of solution, one row for each system when given rows
+def solveTridiagonal(belowDiagonal, diagonal, aboveDiagonal, values):
+
+    if np.ndim(values) == 1:
+        return _solveSingleTridiagonal(belowDiagonal, diagonal, aboveDiagonal, values)
+
+    if len(values) == 1:
+        return _solveSingleTridiagonal(belowDiagonal[0], diagonal[0], aboveDiagonal[0], values[0])[None]
+
+    count = values.shape[1]
+
+    # Points down the first axis so each step works on one contiguous row of every system
+    below = np.ascontiguousarray(belowDiagonal.T)
+    above = np.ascontiguousarray(aboveDiagonal.T)
+    diagonal = np.array(diagonal.T, dtype=float)
+    values = np.array(values.T, dtype=float)
+
+    for i in range(1, count):
+
+        factor = below[i] / diagonal[i - 1]
+        diagonal[i] -= factor * above[i - 1]
+        values[i] -= factor * values[i - 1]
+
+    solution = np.empty_like(values)
+    solution[-1] = values[-1] / diagonal[-1]
+
+    for i in range(count - 2, -1, -1):
+        solution[i] = (values[i] - above[i] * solution[i + 1]) / diagonal[i]
+
+    return solution.T.copy()
+
+# Solve one tridiagonal system of equations with the Thomas algorithm
+# @param:  belowDiagonal = numpy array of values below the diagonal, first value unused
+#          diagonal      = numpy array of values on the diagonal
+#          aboveDiagonal = numpy array of values above the diagonal, last value unused
+#          values        = numpy array of right hand side values
+# @return: numpy array of solution
+def _solveSingleTridiagonal(belowDiagonal, diagonal, aboveDiagonal, values):
+
+    count = len(values)
+
+    # Python floats are much faster than numpy scalars in the sweeps
+    below = belowDiagonal.tolist()
+    above = aboveDiagonal.tolist()
+    diagonal = diagonal.tolist()
+    values = values.tolist()
+
+    for i in range(1, count):
+
+        factor = below[i] / diagonal[i - 1]
+        diagonal[i] -= factor * above[i - 1]
+        values[i] -= factor * values[i - 1]
+
+    solution = [0.0] * count
+    solution[-1] = values[-1] / diagonal[-1]
+
+    for i in range(count - 2, -1, -1):
+        solution[i] = (values[i] - above[i] * solution[i + 1]) / diagonal[i]
+
+    return np.array(solution)
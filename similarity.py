@@ -0,0 +1,212 @@
+from airfoil import Airfoil
+from library import METRIC_FIELDS
+import numpy as np
+
+class AirfoilIndex:
+
+    # Search index over processed airfoils
+    # Each airfoil is described by its thickness and camber distributions
+    # resampled to a fixed chordwise grid, plus its METRIC_FIELDS
+    # Features are kept in growing arrays and searched by brute force with
+    # one matrix product, which stays in milliseconds for hundreds of thousands of airfoils
+    # @param: gridPoints = number of chordwise points distributions are resampled to
+    def __init__(self, gridPoints=32):
+        self.grid = np.linspace(0, 1, gridPoints)
+
+        self.names = []
+
+        # Rows beyond len(names) are spare room for inserts
+        self._features = np.empty((0, 2 * gridPoints))
+        self._metrics = np.empty((0, len(METRIC_FIELDS)))
+
+        # Squared length of each feature row, kept for distance calculations
+        self._squaredNorms = np.empty(0)
+
+    def __len__(self):
+
+        return len(self.names)
+
+    # Feature rows of every airfoil, thicknesses on the grid then cambers on the grid
+    @property
+    def features(self):
+
+        return self._features[:len(self.names)]
+
+    # Metrics of every airfoil, a row of METRIC_FIELDS each
+    @property
+    def metrics(self):
+
+        return self._metrics[:len(self.names)]
+
+    # Resample thickness and camber distributions of processed data to the grid
+    # @param:  data = AirfoilData
+    # @return: numpy array of thicknesses then cambers on the grid
+    def featuresOf(self, data):
+
+        xVals = np.asarray(data.xVals, dtype=float)
+        thicknesses = np.asarray(data.thicknesses, dtype=float)
+        cambers = np.asarray(data.cambers, dtype=float)
+
+        # Converged mean camber line x values are not always in order
+        usable = ~(np.isnan(xVals) | np.isnan(thicknesses) | np.isnan(cambers))
+        order = np.argsort(xVals[usable], kind="stable")
+
+        xVals = xVals[usable][order]
+
+        if len(xVals) == 0:
+            return np.full(2 * len(self.grid), np.nan)
+
+        return np.concatenate((np.interp(self.grid, xVals, thicknesses[usable][order]),
+                               np.interp(self.grid, xVals, cambers[usable][order])))
+
+    # Metrics of processed data
+    # @param:  data = AirfoilData
+    # @return: numpy array of METRIC_FIELDS values
+    @staticmethod
+    def metricsOf(data):
+
+        return np.array([data.thicknesses[data.maxThicknessIndex], data.xVals[data.maxThicknessIndex],
+                         data.cambers[data.maxCamberIndex], data.xVals[data.maxCamberIndex]], dtype=float)
+
+    # Make room for more airfoils, doubling capacity so inserts are amortized
+    # @param: count = number of airfoils that need to fit
+    def _reserve(self, count):
+
+        if count <= len(self._features):
+            return
+
+        capacity = max(count, 2 * len(self._features), 64)
+
+        for name in ("_features", "_metrics", "_squaredNorms"):
+
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:])
+            new[:len(self.names)] = old[:len(self.names)]
+
+            setattr(self, name, new)
+
+    # Insert airfoils from their processed data
+    # @param: entries = iterable of (name, AirfoilData)
+    def addMany(self, entries):
+
+        for name, data in entries:
+            self.addFeatures(name, self.featuresOf(data), AirfoilIndex.metricsOf(data))
+
+    # Insert one airfoil from its processed data
+    # @param: name = name of airfoil
+    #         data = AirfoilData
+    def add(self, name, data):
+
+        self.addFeatures(name, self.featuresOf(data), AirfoilIndex.metricsOf(data))
+
+    # Insert one airfoil, processing it first
+    # @param: airfoil               = Airfoil to add
+    #         numberChordwisePoints = number of points wanted on chord, None to use the number of coordinates
+    def addAirfoil(self, airfoil, numberChordwisePoints=None):
+
+        if numberChordwisePoints is None:
+            numberChordwisePoints = len(airfoil.coordinates)
+
+        self.add(airfoil.name, Airfoil.process(airfoil, numberChordwisePoints))
+
+    # Insert one airfoil from features already found
+    # @param: name     = name of airfoil
+    #         features = numpy array from featuresOf
+    #         metrics  = list or numpy array of METRIC_FIELDS values
+    def addFeatures(self, name, features, metrics):
+
+        index = len(self.names)
+
+        self._reserve(index + 1)
+
+        self._features[index] = features
+        self._metrics[index] = metrics
+        self._squaredNorms[index] = np.dot(self._features[index], self._features[index])
+
+        self.names.append(name)
+
+    # Find the airfoils with the most similar thickness and camber distributions
+    # Airfoils with unusable features are never returned
+    # @param:  query = AirfoilData or numpy array from featuresOf to compare against
+    #          k     = number of airfoils to return
+    #          where = dictionary of metric name to (low, high) bounds the results must be within,
+    #                  see matching
+    # @return: list of (name, distance) from closest to furthest, distance being the
+    #          root mean square difference in percent of chord over the grid
+    def nearest(self, query, k=20, where=None):
+
+        if not isinstance(query, np.ndarray):
+            query = self.featuresOf(query)
+
+        # Squared distances from lengths and one matrix product
+        squaredDistances = self._squaredNorms[:len(self.names)] - 2 * (self.features @ query) + np.dot(query, query)
+        squaredDistances[np.isnan(squaredDistances)] = np.inf
+
+        if where:
+            squaredDistances[~self.matching(where)] = np.inf
+
+        k = min(k, len(self.names))
+
+        if k == 0:
+            return []
+
+        nearestIndices = np.argpartition(squaredDistances, k - 1)[:k]
+        nearestIndices = nearestIndices[np.argsort(squaredDistances[nearestIndices], kind="stable")]
+        nearestIndices = nearestIndices[np.isfinite(squaredDistances[nearestIndices])]
+
+        # Rounding can leave tiny negative values for identical airfoils
+        distances = np.sqrt(np.maximum(squaredDistances[nearestIndices], 0) / len(query))
+
+        return [(self.names[index], float(distance)) for index, distance in zip(nearestIndices.tolist(), distances)]
+
+    # Mask of airfoils whose metrics are within bounds
+    # @param:  where = dictionary of metric name to (low, high), either bound may be None
+    # @return: numpy array of booleans, one for each airfoil
+    def matching(self, where):
+
+        mask = np.ones(len(self.names), dtype=bool)
+
+        for field, (low, high) in where.items():
+
+            column = self.metrics[:, METRIC_FIELDS.index(field)]
+
+            if low is not None:
+                mask &= column >= low
+
+            if high is not None:
+                mask &= column <= high
+
+        return mask
+
+    # Find airfoils whose metrics are within bounds
+    # For example thickness between 10% and 14% with max camber aft of 40% chord is
+    # index.within(maxThickness=(10, 14), maxCamberX=(0.4, None))
+    # @param:  bounds = metric names of METRIC_FIELDS with (low, high) bounds, either may be None
+    # @return: list of names in insert order
+    def within(self, **bounds):
+
+        return [self.names[index] for index in np.flatnonzero(self.matching(bounds)).tolist()]
+
+    # Save the index to a .npz file
+    # @param: path = path of file
+    def save(self, path):
+
+        np.savez(path, grid=self.grid, names=np.array(self.names, dtype=str), features=self.features,
+                 metrics=self.metrics, squaredNorms=self._squaredNorms[:len(self.names)])
+
+    # Load an index saved by save
+    # @param:  path = path of file
+    # @return: AirfoilIndex
+    @staticmethod
+    def load(path):
+
+        with np.load(path) as arrays:
+
+            index = AirfoilIndex(len(arrays["grid"]))
+
+            index.names = arrays["names"].tolist()
+            index._features = arrays["features"]
+            index._metrics = arrays["metrics"]
+            index._squaredNorms = arrays["squaredNorms"]
+
+        return index
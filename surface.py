@@ -0,0 +1,265 @@
+from numerics import solveTridiagonal
+import math
+import numpy as np
+
+class SurfaceModel:
+
+    # Largest x difference inverse queries stop at
+    inverseTolerance = 1e-12
+
+    # Max Newton iterations of inverse queries and of finding the leading edge
+    maxInverseIterations = 20
+
+    # Cubic splines of x and y through the coordinates of an airfoil, parameterized by
+    # arc length around the whole loop from the upper trailing edge to the lower one
+    # The spline runs through the leading edge so both surfaces meet smoothly there
+    # Coefficients of every segment are found once, every query after that is an
+    # array evaluation of the cached tables
+    # @param: coordinates = Coordinates of airfoil in Selig order, at least three distinct points
+    def __init__(self, coordinates):
+
+        xVals = np.asarray(coordinates.xVals, dtype=float)
+        yVals = np.asarray(coordinates.yVals, dtype=float)
+
+        # Repeated points would give segments of no length
+        distinct = np.concatenate(([True], (np.diff(xVals) != 0) | (np.diff(yVals) != 0)))
+        xVals = xVals[distinct]
+        yVals = yVals[distinct]
+
+        if len(xVals) < 3:
+            raise ValueError("Surface model needs at least three distinct points")
+
+        # Arc length approximated by distances between points
+        self.arcLengths = np.concatenate(([0], np.cumsum(np.hypot(np.diff(xVals), np.diff(yVals)))))
+        self.xVals = xVals
+        self.yVals = yVals
+
+        self.xCoefficients = SurfaceModel.splineCoefficients(self.arcLengths, xVals)
+        self.yCoefficients = SurfaceModel.splineCoefficients(self.arcLengths, yVals)
+
+        self.leadingEdgeArcLength = self._findLeadingEdge()
+
+    # Coefficients of a natural cubic spline through values
+    # On segment i the spline is a + b * t + c * t^2 + d * t^3 with t = knot - knots[i]
+    # @param:  knots  = numpy array of increasing parameter values
+    #          values = numpy array of values at knots
+    # @return: numpy array of coefficients, rows of a, b, c and d (4 x segments)
+    @staticmethod
+    def splineCoefficients(knots, values):
+
+        lengths = np.diff(knots)
+        slopes = np.diff(values) / lengths
+
+        # Second derivatives are zero at both ends and continuous at every other knot
+        secondDerivatives = np.zeros(len(knots))
+
+        if len(knots) > 2:
+
+            belowDiagonal = lengths[:-1].copy()
+            diagonal = 2 * (lengths[:-1] + lengths[1:])
+            aboveDiagonal = lengths[1:].copy()
+
+            secondDerivatives[1:-1] = solveTridiagonal(belowDiagonal, diagonal, aboveDiagonal, 6 * np.diff(slopes))
+
+        coefficients = np.empty((4, len(lengths)))
+        coefficients[0] = values[:-1]
+        coefficients[1] = slopes - lengths * (2 * secondDerivatives[:-1] + secondDerivatives[1:]) / 6
+        coefficients[2] = secondDerivatives[:-1] / 2
+        coefficients[3] = np.diff(secondDerivatives) / (6 * lengths)
+
+        return coefficients
+
+    # Segment and distance along it of arc lengths, ends extend the first and last segments
+    # @param:  arcLengths = numpy array of arc lengths
+    # @return: numpy array of segment indices, numpy array of distances from segment start
+    def _segments(self, arcLengths):
+
+        indices = np.searchsorted(self.arcLengths, arcLengths, side="right") - 1
+        indices = np.clip(indices, 0, len(self.arcLengths) - 2)
+
+        return indices, arcLengths - self.arcLengths[indices]
+
+    # Value or derivative of a spline
+    # @param:  coefficients = coefficients from splineCoefficients
+    #          indices      = numpy array of segment indices
+    #          distances    = numpy array of distances from segment start
+    #          derivative   = 0 for values, 1 for first and 2 for second derivatives
+    # @return: numpy array of values
+    @staticmethod
+    def _evaluate(coefficients, indices, distances, derivative=0):
+
+        a, b, c, d = coefficients[:, indices]
+
+        if derivative == 0:
+            return a + distances * (b + distances * (c + distances * d))
+
+        if derivative == 1:
+            return b + distances * (2 * c + distances * 3 * d)
+
+        return 2 * c + 6 * d * distances
+
+    # Points at arc lengths
+    # @param:  arcLengths = number or numpy array of arc lengths
+    # @return: x values, y values
+    def point(self, arcLengths):
+
+        indices, distances = self._segments(np.asarray(arcLengths, dtype=float))
+
+        return (SurfaceModel._evaluate(self.xCoefficients, indices, distances),
+                SurfaceModel._evaluate(self.yCoefficients, indices, distances))
+
+    # Derivatives of x and y with arc length
+    # @param:  arcLengths = number or numpy array of arc lengths
+    #          derivative = 1 for first and 2 for second derivatives
+    # @return: x derivatives, y derivatives
+    def derivatives(self, arcLengths, derivative=1):
+
+        indices, distances = self._segments(np.asarray(arcLengths, dtype=float))
+
+        return (SurfaceModel._evaluate(self.xCoefficients, indices, distances, derivative),
+                SurfaceModel._evaluate(self.yCoefficients, indices, distances, derivative))
+
+    # Slopes dy/dx at arc lengths
+    # @param:  arcLengths = number or numpy array of arc lengths
+    # @return: slopes, infinite where the surface is vertical
+    def slope(self, arcLengths):
+
+        xDerivatives, yDerivatives = self.derivatives(arcLengths)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return yDerivatives / xDerivatives
+
+    # Curvature at arc lengths, positive where the loop turns counterclockwise
+    # @param:  arcLengths = number or numpy array of arc lengths
+    # @return: curvatures
+    def curvature(self, arcLengths):
+
+        xDerivatives, yDerivatives = self.derivatives(arcLengths)
+        xSecondDerivatives, ySecondDerivatives = self.derivatives(arcLengths, 2)
+
+        return (((xDerivatives * ySecondDerivatives) - (yDerivatives * xSecondDerivatives)) /
+                np.hypot(xDerivatives, yDerivatives) ** 3)
+
+    # Arc length of the leading edge, where x is smallest
+    # @return: arc length
+    def _findLeadingEdge(self):
+
+        index = int(np.argmin(self.xVals))
+
+        lowest = self.arcLengths[max(index - 1, 0)]
+        highest = self.arcLengths[min(index + 1, len(self.arcLengths) - 1)]
+
+        arcLength = self.arcLengths[index]
+
+        # Newton steps to where x stops changing with arc length
+        for iteration in range(SurfaceModel.maxInverseIterations):
+
+            xDerivative = self.derivatives(arcLength)[0]
+            xSecondDerivative = self.derivatives(arcLength, 2)[0]
+
+            if xSecondDerivative <= 0:
+                break
+
+            step = xDerivative / xSecondDerivative
+            arcLength = min(max(arcLength - step, lowest), highest)
+
+            if abs(step) < SurfaceModel.inverseTolerance:
+                break
+
+        return float(arcLength)
+
+    # Range of arc lengths of a surface
+    # @param:  surface = "upper" from the trailing edge to the leading edge or "lower" from the leading edge
+    # @return: smallest arc length, largest arc length
+    def surfaceRange(self, surface):
+
+        if surface == "upper":
+            return 0.0, self.leadingEdgeArcLength
+
+        if surface == "lower":
+            return self.leadingEdgeArcLength, float(self.arcLengths[-1])
+
+        raise ValueError("Unknown surface: " + str(surface))
+
+    # Arc lengths of points on a surface with given x values, the inverse of point
+    # Starts from linear interpolation of the knots and takes Newton steps
+    # @param:  xVals   = number or numpy array of x values
+    #          surface = "upper" or "lower"
+    # @return: numpy array of arc lengths
+    def arcLengthAt(self, xVals, surface="upper"):
+
+        xVals = np.asarray(xVals, dtype=float)
+        lowest, highest = self.surfaceRange(surface)
+
+        # Knots of the surface ordered by x
+        knots = np.concatenate(([lowest], self.arcLengths[(self.arcLengths > lowest) & (self.arcLengths < highest)],
+                                [highest]))
+        knotXVals = self.point(knots)[0]
+        order = np.argsort(knotXVals, kind="stable")
+
+        arcLengths = np.array(np.interp(xVals, knotXVals[order], knots[order]), dtype=float)
+
+        # Newton steps on points still further than the tolerance from their x values
+        active = np.flatnonzero(np.ones(arcLengths.shape, dtype=bool))
+        flatArcLengths = arcLengths.reshape(-1)
+        flatXVals = np.broadcast_to(xVals, arcLengths.shape).reshape(-1)
+
+        for iteration in range(SurfaceModel.maxInverseIterations):
+
+            indices, distances = self._segments(flatArcLengths[active])
+
+            differences = SurfaceModel._evaluate(self.xCoefficients, indices, distances) - flatXVals[active]
+            xDerivatives = SurfaceModel._evaluate(self.xCoefficients, indices, distances, 1)
+
+            # Points where the surface is vertical keep their arc length
+            moving = (np.abs(differences) >= SurfaceModel.inverseTolerance) & (xDerivatives != 0)
+            active = active[moving]
+
+            if len(active) == 0:
+                break
+
+            flatArcLengths[active] = np.clip(flatArcLengths[active] - differences[moving] / xDerivatives[moving],
+                                             lowest, highest)
+
+        return arcLengths
+
+    # y values of a surface at x values
+    # @param:  xVals   = number or numpy array of x values
+    #          surface = "upper" or "lower"
+    # @return: numpy array of y values
+    def valueAt(self, xVals, surface="upper"):
+
+        return self.point(self.arcLengthAt(xVals, surface))[1]
+
+    # Slopes dy/dx of a surface at x values
+    # @param:  xVals   = number or numpy array of x values
+    #          surface = "upper" or "lower"
+    # @return: numpy array of slopes
+    def slopeAt(self, xVals, surface="upper"):
+
+        return self.slope(self.arcLengthAt(xVals, surface))
+
+    # Curvature of a surface at x values
+    # @param:  xVals   = number or numpy array of x values
+    #          surface = "upper" or "lower"
+    # @return: numpy array of curvatures
+    def curvatureAt(self, xVals, surface="upper"):
+
+        return self.curvature(self.arcLengthAt(xVals, surface))
+
+    # Radius of the circle matching the curve of the leading edge
+    # @return: leading edge radius, in chord lengths for normalized coordinates
+    def leadingEdgeRadius(self):
+
+        return float(1 / abs(self.curvature(self.leadingEdgeArcLength)))
+
+    # Angle between the upper and lower surfaces where they meet the trailing edge
+    # @return: trailing edge angle in degrees
+    def trailingEdgeAngle(self):
+
+        # Upper surface runs away from the trailing edge, lower surface runs towards it
+        xUpper, yUpper = self.derivatives(0.0)
+        xLower, yLower = self.derivatives(self.arcLengths[-1])
+
+        return math.degrees(abs(math.atan2((xUpper * -yLower) - (yUpper * -xLower),
+                                           (xUpper * -xLower) + (yUpper * -yLower))))
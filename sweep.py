@@ -0,0 +1,470 @@
+from cst import CST
+import argparse
+import csv
+import math
+import struct
+import sys
+import numpy as np
+
+# Metrics found for each candidate
+# maxThickness to maxCamberX are measured perpendicular to the mean camber line by
+# CST.processBatch, like AirfoilData and the library, and the vertical metrics are measured
+# between the surfaces at each chordwise point, like the starting estimate of Airfoil.process
+# minVerticalThickness is the smallest between the leading and trailing edge, negative when
+# the surfaces cross
+SWEEP_METRIC_FIELDS = ["maxThickness", "maxThicknessX", "maxCamber", "maxCamberX",
+                       "maxVerticalThickness", "maxVerticalThicknessX", "maxVerticalCamber", "maxVerticalCamberX",
+                       "minVerticalThickness"]
+
+# Number of SWEEP_METRIC_FIELDS measured by CST.processBatch, the rest are vertical
+PERPENDICULAR_METRIC_COUNT = 4
+
+# Sobol direction numbers from Joe and Kuo (new-joe-kuo-6.21201), for dimensions 2 to 21
+# Each is (degree s, coefficients a, initial direction numbers m)
+SOBOL_DIRECTIONS = [
+    (1, 0, [1]),
+    (2, 1, [1, 3]),
+    (3, 1, [1, 3, 1]),
+    (3, 2, [1, 1, 1]),
+    (4, 1, [1, 1, 3, 3]),
+    (4, 4, [1, 3, 5, 13]),
+    (5, 2, [1, 1, 5, 5, 17]),
+    (5, 4, [1, 1, 5, 5, 5]),
+    (5, 7, [1, 1, 7, 11, 19]),
+    (5, 11, [1, 1, 5, 1, 1]),
+    (5, 13, [1, 1, 1, 3, 11]),
+    (5, 14, [1, 3, 5, 5, 31]),
+    (6, 1, [1, 3, 3, 9, 7, 49]),
+    (6, 13, [1, 1, 1, 15, 21, 21]),
+    (6, 16, [1, 3, 1, 13, 27, 49]),
+    (6, 19, [1, 1, 1, 15, 7, 5]),
+    (6, 22, [1, 3, 1, 15, 13, 25]),
+    (6, 25, [1, 1, 5, 5, 19, 61]),
+    (7, 1, [1, 3, 7, 11, 23, 15, 103]),
+    (7, 4, [1, 3, 7, 13, 13, 15, 69]),
+]
+
+# Bits of each Sobol coordinate, enough for 2^32 points
+SOBOL_BITS = 32
+
+# Direction numbers of a Sobol sequence as integers
+# @param:  dimensions = number of dimensions, at most 1 + len(SOBOL_DIRECTIONS)
+# @return: numpy array of direction numbers (dimensions x SOBOL_BITS), no rows for no dimensions
+def sobolDirections(dimensions):
+
+    if dimensions < 0:
+        raise ValueError("Sobol sampling needs a number of dimensions of at least 0, not " + str(dimensions))
+
+    if dimensions > len(SOBOL_DIRECTIONS) + 1:
+        raise ValueError("Sobol sampling supports at most " + str(len(SOBOL_DIRECTIONS) + 1) + " dimensions")
+
+    directions = np.zeros((dimensions, SOBOL_BITS), dtype=np.uint64)
+
+    # Nothing is sampled when every parameter is fixed, like the other samplers
+    if dimensions == 0:
+        return directions
+
+    # First dimension is the van der Corput sequence
+    directions[0] = [1 << (SOBOL_BITS - 1 - bit) for bit in range(SOBOL_BITS)]
+
+    for dimension in range(1, dimensions):
+
+        degree, coefficients, initial = SOBOL_DIRECTIONS[dimension - 1]
+        values = []
+
+        for bit in range(SOBOL_BITS):
+
+            if bit < degree:
+
+                values.append(initial[bit] << (SOBOL_BITS - 1 - bit))
+
+            else:
+
+                value = values[bit - degree] ^ (values[bit - degree] >> degree)
+
+                for term in range(1, degree):
+                    if (coefficients >> (degree - 1 - term)) & 1:
+                        value ^= values[bit - term]
+
+                values.append(value)
+
+        directions[dimension] = values
+
+    return directions
+
+# Points of a Sobol sequence in the unit cube, generated in chunks
+# Point i is found directly from the Gray code of i, so chunks need no state between them
+# @param:  dimensions = number of dimensions, 0 for points with no coordinates
+#          count      = number of points
+#          chunkSize  = most points in each chunk
+#          skip       = number of points at the start of the sequence to skip
+# @return: generator of numpy arrays (points x dimensions)
+def sobolSamples(dimensions, count, chunkSize=10000, skip=0):
+
+    directions = sobolDirections(dimensions)
+
+    for start in range(skip, skip + count, chunkSize):
+
+        indices = np.arange(start, min(start + chunkSize, skip + count), dtype=np.uint64)
+        grayCodes = indices ^ (indices >> np.uint64(1))
+
+        points = np.zeros((len(indices), dimensions), dtype=np.uint64)
+
+        for bit in range(SOBOL_BITS):
+
+            hasBit = ((grayCodes >> np.uint64(bit)) & np.uint64(1)).astype(bool)
+            points[hasBit] ^= directions[:, bit]
+
+        yield points / float(1 << SOBOL_BITS)
+
+# Points of a Latin hypercube in the unit cube, generated in chunks
+# Each chunk is its own Latin hypercube so memory does not grow with count
+# @param:  dimensions = number of dimensions
+#          count      = number of points
+#          chunkSize  = most points in each chunk
+#          seed       = seed for random numbers
+# @return: generator of numpy arrays (points x dimensions)
+def latinHypercubeSamples(dimensions, count, chunkSize=10000, seed=0):
+
+    generator = np.random.default_rng(seed)
+
+    for start in range(0, count, chunkSize):
+
+        size = min(chunkSize, count - start)
+
+        # One random point in each stratum, strata shuffled separately for each dimension
+        strata = generator.permuted(np.tile(np.arange(size), (dimensions, 1)), axis=1).T
+
+        yield (strata + generator.random((size, dimensions))) / size
+
+# Points of a full grid in the unit cube, generated in chunks
+# A grid of no dimensions is one point with no coordinates
+# @param:  levels    = list of number of levels for each dimension, 1 puts the dimension at its middle
+#          chunkSize = most points in each chunk
+# @return: generator of numpy arrays (points x dimensions)
+def gridSamples(levels, chunkSize=10000):
+
+    levels = list(levels)
+    count = math.prod(levels)
+
+    if len(levels) == 0:
+        yield np.empty((1, 0))
+        return
+
+    for start in range(0, count, chunkSize):
+
+        indices = np.unravel_index(np.arange(start, min(start + chunkSize, count)), levels)
+
+        yield np.column_stack([index / (level - 1) if level > 1 else np.full(len(index), 0.5)
+                               for index, level in zip(indices, levels)])
+
+class CSTSweep:
+
+    # Sweep over ranges of CST weights and trailing edge thickness
+    # Candidates are made and measured in chunks of arrays so memory stays bounded
+    # @param: weightsLowerRanges    = list of (low, high) for each lower surface weight
+    #         weightsUpperRanges    = list of (low, high) for each upper surface weight
+    #         dzRange               = (low, high) of trailing edge thickness
+    #         numberChordwisePoints = number of chordwise points candidates are measured at
+    def __init__(self, weightsLowerRanges, weightsUpperRanges, dzRange=(0, 0), numberChordwisePoints=101):
+        self.weightsLowerRanges = [tuple(bounds) for bounds in weightsLowerRanges]
+        self.weightsUpperRanges = [tuple(bounds) for bounds in weightsUpperRanges]
+        self.dzRange = tuple(dzRange)
+
+        ranges = np.array(self.weightsLowerRanges + self.weightsUpperRanges + [self.dzRange], dtype=float)
+        self.lows = ranges[:, 0]
+        self.highs = ranges[:, 1]
+
+        # Only parameters with a range are sampled, the rest are fixed
+        self.varying = np.flatnonzero(self.highs != self.lows)
+
+        # Cosine spaced chordwise points, ends excluded from minVerticalThickness
+        self.numberChordwisePoints = numberChordwisePoints
+        self.xVals = 0.5 * (1 - np.cos(np.linspace(0, math.pi, numberChordwisePoints)))
+
+    # Number of sampled parameters
+    @property
+    def dimensions(self):
+
+        return len(self.varying)
+
+    # Names of columns written for each candidate
+    @property
+    def columns(self):
+
+        return (["weightsLower" + str(i) for i in range(len(self.weightsLowerRanges))] +
+                ["weightsUpper" + str(i) for i in range(len(self.weightsUpperRanges))] +
+                ["dz"] + SWEEP_METRIC_FIELDS)
+
+    # Unit cube samples for the sampled parameters
+    # @param:  sampler   = "sobol", "lhs" or "grid"
+    #          count     = number of candidates for "sobol" and "lhs"
+    #          levels    = number of levels of each sampled parameter for "grid", or one for all
+    #          chunkSize = most candidates in each chunk
+    #          seed      = seed for "lhs"
+    # @return: generator of numpy arrays (candidates x dimensions)
+    def samples(self, sampler="sobol", count=None, levels=None, chunkSize=10000, seed=0):
+
+        if sampler == "sobol":
+            return sobolSamples(self.dimensions, count, chunkSize)
+
+        if sampler == "lhs":
+            return latinHypercubeSamples(self.dimensions, count, chunkSize, seed)
+
+        if sampler == "grid":
+
+            if isinstance(levels, int):
+                levels = [levels] * self.dimensions
+
+            return gridSamples(levels, chunkSize)
+
+        raise ValueError("Unknown sampler: " + str(sampler))
+
+    # Parameters of candidates from unit cube samples
+    # @param:  unit = numpy array of samples (candidates x dimensions)
+    # @return: numpy array of parameters (candidates x lower weights, upper weights, dz)
+    def scale(self, unit):
+
+        parameters = np.tile(self.lows, (len(unit), 1))
+        parameters[:, self.varying] += unit * (self.highs - self.lows)[self.varying]
+
+        return parameters
+
+    # Measure candidates
+    # @param:  parameters = numpy array of parameters from scale
+    # @return: numpy array of SWEEP_METRIC_FIELDS values (candidates x metrics),
+    #          NaN perpendicular metrics for candidates that could not be processed
+    def measure(self, parameters):
+
+        return np.hstack((self.measurePerpendicular(parameters), self.measureVertical(parameters)))
+
+    # Measure candidates perpendicular to their mean camber lines with CST.processBatch
+    # @param:  parameters = numpy array of parameters from scale
+    # @return: numpy array of the first PERPENDICULAR_METRIC_COUNT of SWEEP_METRIC_FIELDS (candidates x metrics)
+    def measurePerpendicular(self, parameters):
+
+        numberLower = len(self.weightsLowerRanges)
+
+        # CST.processBatch leaves the values of an empty batch unset
+        if len(parameters) == 0:
+            return np.empty((0, PERPENDICULAR_METRIC_COUNT))
+
+        result = CST.processBatch(parameters[:, :numberLower], parameters[:, numberLower:-1], parameters[:, -1],
+                                  self.numberChordwisePoints, spacing="cosine")
+
+        # Failed rows are NaN with an index of -1, which picks a NaN value
+        rows = np.arange(len(parameters))
+
+        return np.column_stack((result.thicknesses[rows, result.maxThicknessIndices],
+                                result.xVals[rows, result.maxThicknessIndices],
+                                result.cambers[rows, result.maxCamberIndices],
+                                result.xVals[rows, result.maxCamberIndices]))
+
+    # Measure candidates vertically between their surfaces, much faster than measurePerpendicular
+    # @param:  parameters = numpy array of parameters from scale
+    # @return: numpy array of the vertical SWEEP_METRIC_FIELDS values (candidates x metrics)
+    def measureVertical(self, parameters):
+
+        numberLower = len(self.weightsLowerRanges)
+        numberUpper = len(self.weightsUpperRanges)
+
+        dz = parameters[:, -1]
+
+        # Surfaces of every candidate as matrix products on the cached basis
+        # Lower surface is negated like CST.genCoordinates
+        yUpperVals = CST.evaluate(parameters[:, numberLower:numberLower + numberUpper], dz, self.xVals)
+        yLowerVals = -CST.evaluate(parameters[:, :numberLower], dz, self.xVals)
+
+        thicknesses = 100 * (yUpperVals - yLowerVals)
+        cambers = 100 * (yUpperVals + yLowerVals) / 2
+
+        maxThicknessIndices = np.argmax(thicknesses, axis=1)
+        maxCamberIndices = np.argmax(cambers, axis=1)
+
+        rows = np.arange(len(parameters))
+
+        return np.column_stack((thicknesses[rows, maxThicknessIndices], self.xVals[maxThicknessIndices],
+                                cambers[rows, maxCamberIndices], self.xVals[maxCamberIndices],
+                                np.min(thicknesses[:, 1:-1], axis=1)))
+
+    # Mask of candidates meeting constraints
+    # @param:  metrics     = numpy array from measure
+    #          constraints = dictionary of SWEEP_METRIC_FIELDS name to (low, high), either may be None
+    #          fields      = names of the columns of metrics, None for SWEEP_METRIC_FIELDS
+    # @return: numpy array of booleans
+    @staticmethod
+    def matching(metrics, constraints, fields=None):
+
+        fields = SWEEP_METRIC_FIELDS if fields is None else fields
+        mask = np.ones(len(metrics), dtype=bool)
+
+        for field, (low, high) in constraints.items():
+
+            column = metrics[:, fields.index(field)]
+
+            if low is not None:
+                mask &= column >= low
+
+            if high is not None:
+                mask &= column <= high
+
+        return mask
+
+    # Make, measure and filter candidates one chunk at a time
+    # Candidates are filtered on their vertical metrics first so only the rest are processed
+    # @param:  sampler       = "sobol", "lhs" or "grid", see samples
+    #          count         = number of candidates for "sobol" and "lhs"
+    #          levels        = levels for "grid"
+    #          chunkSize     = most candidates in each chunk
+    #          seed          = seed for "lhs"
+    #          constraints   = dictionary of SWEEP_METRIC_FIELDS name to (low, high), None for none
+    #          allowCrossing = False to drop candidates whose surfaces cross
+    # @return: generator of numpy arrays of surviving rows, columns as in columns
+    def run(self, sampler="sobol", count=None, levels=None, chunkSize=10000, seed=0, constraints=None,
+            allowCrossing=False):
+
+        constraints = dict(constraints or {})
+
+        if not allowCrossing:
+            low, high = constraints.get("minVerticalThickness", (None, None))
+            constraints["minVerticalThickness"] = (0 if low is None else max(low, 0), high)
+
+        verticalFields = SWEEP_METRIC_FIELDS[PERPENDICULAR_METRIC_COUNT:]
+        verticalConstraints = {field: constraints.pop(field) for field in verticalFields if field in constraints}
+
+        for unit in self.samples(sampler, count, levels, chunkSize, seed):
+
+            parameters = self.scale(unit)
+            verticalMetrics = self.measureVertical(parameters)
+
+            keep = CSTSweep.matching(verticalMetrics, verticalConstraints, verticalFields)
+            parameters = parameters[keep]
+            metrics = np.hstack((self.measurePerpendicular(parameters), verticalMetrics[keep]))
+
+            keep = CSTSweep.matching(metrics, constraints)
+
+            yield np.hstack((parameters[keep], metrics[keep]))
+
+class SweepWriter:
+
+    # Header size of .npy output, fixed so the row count can be written once the sweep is done
+    npyHeaderBytes = 128
+
+    # Streams rows of a sweep to a .csv or .npy file as they arrive
+    # @param: path    = path of output file, format from its extension
+    #         columns = names of columns
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self.rows = 0
+
+        self.binary = path.endswith(".npy")
+
+        if self.binary:
+
+            self._file = open(path, "wb")
+            self._file.write(self._npyHeader())
+
+        else:
+
+            self._file = open(path, "w", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(columns)
+
+    # Header of a .npy file of float64 rows, padded to npyHeaderBytes
+    # @return: bytes
+    def _npyHeader(self):
+
+        dictionary = "{'descr': '<f8', 'fortran_order': False, 'shape': (" + str(self.rows) + ", " + \
+                     str(len(self.columns)) + "), }"
+
+        prefix = np.lib.format.magic(1, 0) + struct.pack("<H", SweepWriter.npyHeaderBytes - 10)
+
+        return prefix + (dictionary.ljust(SweepWriter.npyHeaderBytes - 11) + "\n").encode("latin1")
+
+    # Write rows
+    # @param: rows = numpy array (rows x columns)
+    def write(self, rows):
+
+        if self.binary:
+            self._file.write(np.ascontiguousarray(rows, dtype="<f8").tobytes())
+        else:
+            self._writer.writerows(rows.tolist())
+
+        self.rows += len(rows)
+
+    # Finish the file, writing the row count into a .npy header
+    def close(self):
+
+        if self.binary:
+            self._file.seek(0)
+            self._file.write(self._npyHeader())
+
+        self._file.close()
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *exception):
+
+        self.close()
+
+# Parse a range argument
+# @param:  text = "low:high" or one number for a fixed value
+# @return: (low, high)
+def parseRange(text):
+
+    parts = text.split(":")
+
+    if len(parts) == 1:
+        return float(parts[0]), float(parts[0])
+
+    return float(parts[0]), float(parts[1])
+
+# Command for sweeping CST parameters and streaming survivors to a file
+# @param:  arguments = list of command line arguments
+# @return: exit code
+def main(arguments=None):
+
+    parser = argparse.ArgumentParser(description="Sweep CST weights and keep candidates meeting constraints.")
+    parser.add_argument("output", help=".csv or .npy file to stream surviving candidates to")
+    parser.add_argument("--lower", nargs="+", type=parseRange, required=True,
+                        help="low:high of each lower surface weight, or a fixed value")
+    parser.add_argument("--upper", nargs="+", type=parseRange, required=True,
+                        help="low:high of each upper surface weight, or a fixed value")
+    parser.add_argument("--dz", type=parseRange, default=(0, 0), help="low:high of trailing edge thickness")
+    parser.add_argument("-s", "--sampler", choices=["sobol", "lhs", "grid"], default="sobol")
+    parser.add_argument("-n", "--count", type=int, default=100000, help="candidates for sobol and lhs")
+    parser.add_argument("--levels", type=int, default=5, help="levels of each parameter for grid")
+    parser.add_argument("-p", "--points", type=int, default=101, help="chordwise points candidates are measured at")
+    parser.add_argument("-c", "--chunk-size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-thickness", type=float, help="smallest max thickness in percent")
+    parser.add_argument("--max-thickness", type=float, help="largest max thickness in percent")
+    parser.add_argument("--min-camber", type=float, help="smallest max camber in percent")
+    parser.add_argument("--max-camber", type=float, help="largest max camber in percent")
+    parser.add_argument("--allow-crossing", action="store_true", help="keep candidates whose surfaces cross")
+    args = parser.parse_args(arguments)
+
+    sweep = CSTSweep(args.lower, args.upper, args.dz, args.points)
+
+    constraints = {
+        "maxThickness": (args.min_thickness, args.max_thickness),
+        "maxCamber":    (args.min_camber, args.max_camber),
+    }
+
+    generated = args.count if args.sampler != "grid" else args.levels ** sweep.dimensions
+
+    with SweepWriter(args.output, sweep.columns) as writer:
+
+        for rows in sweep.run(args.sampler, args.count, args.levels, args.chunk_size, args.seed, constraints,
+                              args.allow_crossing):
+            writer.write(rows)
+
+    print("Kept " + str(writer.rows) + " of " + str(generated) + " candidates", file=sys.stderr)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import time
+
+class ProcessTelemetry:
+
+    # Record of how one Airfoil.process call converged
+    # Only created when asked for, so processing without it costs nothing extra
+    # @param: mode                  = processing mode passed to Airfoil.process
+    #         numberChordwisePoints = Integer number of points wanted on chord
+    def __init__(self, mode, numberChordwisePoints):
+        self.mode                  = mode
+        self.numberChordwisePoints = numberChordwisePoints
+
+        # True for a result ResultCache found already processed,
+        # which records no iterations and only the time of the lookup
+        self.cached = False
+
+        # Outer iterations of the mean camber line and whether it converged
+        self.outerIterations = 0
+        self.converged       = False
+
+        # Largest difference between upper and lower semi-thicknesses after each outer iteration
+        self.largestDifferences = []
+
+        # One dictionary per surface convergence, upper surface first in each outer iteration
+        # with outerIteration, surface, iterations, converged and residuals,
+        # residuals being the largest y difference the solver checked after each inner iteration
+        self.surfaces = []
+
+        # Interpolations done, counting a call of interpolateMany as one call
+        self.interpolateCalls   = 0
+        self.interpolatedPoints = 0
+
+        # Seconds spent in each phase of processing
+        self.phaseTimes = {}
+
+        self._phaseStart = time.perf_counter()
+
+    # End the current phase and start the next one
+    # @param: phase = name of the phase that just ended
+    def endPhase(self, phase):
+
+        now = time.perf_counter()
+        self.phaseTimes[phase] = self.phaseTimes.get(phase, 0) + now - self._phaseStart
+        self._phaseStart = now
+
+    # Count interpolations done
+    # @param: calls  = number of calls to interpolate or interpolateMany
+    #         points = number of x values interpolated
+    def countInterpolations(self, calls, points):
+
+        self.interpolateCalls += calls
+        self.interpolatedPoints += points
+
+    # Record the start of an outer iteration
+    def startOuterIteration(self):
+
+        self.outerIterations += 1
+
+    # Record the end of an outer iteration
+    # @param: largestDifference = largest difference between upper and lower semi-thicknesses
+    def endOuterIteration(self, largestDifference):
+
+        self.largestDifferences.append(float(largestDifference))
+
+    # Record the convergence of one surface
+    # @param: iterations = inner iterations run
+    #         converged  = True if converged before reaching Airfoil.maxInnerIterations
+    #         residuals  = list of largest y differences checked after each inner iteration
+    def recordSurface(self, iterations, converged, residuals):
+
+        surfaces = [surface for surface in self.surfaces if surface["outerIteration"] == self.outerIterations]
+
+        self.surfaces.append({
+            "outerIteration": self.outerIterations,
+            "surface":        "upper" if len(surfaces) % 2 == 0 else "lower",
+            "iterations":     iterations,
+            "converged":      converged,
+            "residuals":      [float(residual) for residual in residuals],
+        })
+
+    # Total inner iterations over every surface convergence
+    @property
+    def innerIterations(self):
+
+        return sum(surface["iterations"] for surface in self.surfaces)
+
+    # Number of surface convergences that stopped at Airfoil.maxInnerIterations without converging
+    @property
+    def innerLimitHits(self):
+
+        return sum(1 for surface in self.surfaces if not surface["converged"])
+
+    # Total seconds over every phase
+    @property
+    def totalTime(self):
+
+        return sum(self.phaseTimes.values())
+
+    # Telemetry as a dictionary of plain values, ready to be saved as JSON
+    # @return: dictionary
+    def asDict(self):
+
+        return {
+            "mode":                  self.mode,
+            "numberChordwisePoints": self.numberChordwisePoints,
+            "cached":                self.cached,
+            "outerIterations":       self.outerIterations,
+            "converged":             self.converged,
+            "innerIterations":       self.innerIterations,
+            "innerLimitHits":        self.innerLimitHits,
+            "largestDifferences":    self.largestDifferences,
+            "surfaces":              self.surfaces,
+            "interpolateCalls":      self.interpolateCalls,
+            "interpolatedPoints":    self.interpolatedPoints,
+            "phaseTimes":            self.phaseTimes,
+            "totalTime":             self.totalTime,
+        }